@@ -22,6 +22,9 @@ from fabrics.planner.parameterized_planner import ParameterizedFabricPlanner
 
 logging.basicConfig(level=logging.INFO)
 
+# Time step of the simulation, also used to estimate the ESDF Jdot.
+DT = 0.01
+
 def edf(pos, proj_rgb) -> tuple:
     # to binary image, obstacle are red
     proj_r = proj_rgb[:, :, 1]
@@ -84,7 +87,7 @@ def initalize_environment(render=True):
         GenericUrdfReacher(urdf=urdf_file, mode="acc"),
     ]
     env: UrdfEnv  = UrdfEnv(
-        dt=0.01, robots=robots, render=render
+        dt=DT, robots=robots, render=render
     ).unwrapped
     full_sensor = FullSensor(
             goal_mask=["position", "weight"],
@@ -184,6 +187,7 @@ def run_planar_robot_esdf(n_steps=5000, render=True):
         input("Make sure that the pybullet window is in default window size. Then press any key.")
         proj_rgb, proj_depth = get_top_view_image(save=True)
 
+    planner.esdf_jdot_estimator('panda_link4', time_step=DT)
     for _ in range(n_steps):
         ob_robot = ob['robot_0']
         pos_joints = ob_robot['joint_state']['position'][0:2]
@@ -204,10 +208,9 @@ def run_planar_robot_esdf(n_steps=5000, render=True):
             qdot=ob_robot["joint_state"]["velocity"],
             x_goal_0=goal.sub_goals()[0].position(),
             weight_goal_0=goal.sub_goals()[0].weight(),
+            radius_body_panda_link4=0.1,
             esdf_phi_panda_link4=edf_phi,
             esdf_J_panda_link4=edf_gradient_phi_x,
-            esdf_Jdot_panda_link4=np.zeros(2),
-            radius_body_panda_link4=0.1,
         )
 
         ob, *_ = env.step(action)
@@ -18,6 +18,9 @@ from fabrics.planner.parameterized_planner import ParameterizedFabricPlanner
 
 logging.basicConfig(level=logging.ERROR)
 
+# Time step of the simulation, also used to estimate the ESDF Jdot.
+DT = 0.01
+
 
 def edf(pos, proj_rgb) -> tuple:
     #to binary image, obstacle are red
@@ -108,7 +111,7 @@ def initalize_environment(render):
         GenericUrdfReacher(urdf=urdf_file, mode="acc"),
     ]
     env: UrdfEnv  = UrdfEnv(
-        dt=0.01, robots=robots, render=render
+        dt=DT, robots=robots, render=render
     ).unwrapped
     # Set the initial position and velocity of the point mass.
     pos0 = np.array([-2.0, 0.5, 0.0])
@@ -230,6 +233,7 @@ def run_point_robot_esdf(n_steps=10000, render=True):
         plt.show()
         test_edf_evaluation(proj_rgb)
 
+    planner.esdf_jdot_estimator('base_link', time_step=DT)
     for _ in range(n_steps):
         ob_robot = ob['robot_0']
         proj_rgb, proj_depth = get_top_view_image(load_only=True, save=False)
@@ -247,10 +251,9 @@ def run_point_robot_esdf(n_steps=10000, render=True):
             qdot=ob_robot["joint_state"]["velocity"],
             x_goal_0=ob_robot['FullSensor']['goals'][2]['position'][0:2],
             weight_goal_0=ob_robot['FullSensor']['goals'][2]['weight'],
+            radius_body_base_link=np.array([0.4]),
             esdf_phi_base_link=edf_phi,
             esdf_J_base_link=edf_gradient,
-            esdf_Jdot_base_link=np.zeros(3),
-            radius_body_base_link=np.array([0.4])
         )
         ob, *_, = env.step(action)
     env.close()
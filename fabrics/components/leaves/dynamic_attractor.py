@@ -5,6 +5,7 @@ from fabrics.diffGeometry.diffMap import DifferentialMap
 from fabrics.diffGeometry.geometry import Geometry
 from fabrics.diffGeometry.energy import Lagrangian
 from fabrics.components.leaves.dynamic_leaf import DynamicLeaf
+from fabrics.helpers.splines import spline_reference
 from fabrics.helpers.variables import Variables
 
 
@@ -67,3 +68,55 @@ class GenericDynamicAttractor(DynamicLeaf):
 
     def map(self):
         return self._forward_map
+
+
+class SplineAttractor(GenericDynamicAttractor):
+    """
+    The SplineAttractor is a GenericDynamicAttractor following a B-spline.
+
+    Instead of passing the references at runtime, the references are
+    computed from the control points, the duration and the time inside
+    the CasADi graph. The reference parameters of the dynamic attractor are
+    replaced by these expressions when the planner is concretized, see
+    reference_substitutions.
+    """
+
+    def __init__(
+        self, root_variables: Variables,
+        fk_goal: ca.SX,
+        attractor_name: str,
+        degree: int,
+        number_control_points: int,
+        time_variable: ca.SX,
+    ):
+        super().__init__(root_variables, fk_goal, attractor_name)
+        control_points_name = f"control_points_{attractor_name}"
+        duration_name = f"duration_{attractor_name}"
+        self._control_points = ca.SX.sym(
+            control_points_name, number_control_points, self._dim_ref
+        )
+        self._duration = ca.SX.sym(duration_name, 1)
+        self._spline_parameters = {
+            control_points_name: self._control_points,
+            duration_name: self._duration,
+            time_variable.name(): time_variable,
+        }
+        self._references = spline_reference(
+            self._control_points, self._duration, time_variable, degree
+        )
+
+    def spline_parameters(self) -> dict:
+        return self._spline_parameters
+
+    def reference_substitutions(self) -> dict:
+        reference_symbols = {
+            f"x_ref_{self._leaf_name}": self._x_ref,
+            f"xdot_ref_{self._leaf_name}": self._xdot_ref,
+            f"xddot_ref_{self._leaf_name}": self._xddot_ref,
+        }
+        return {
+            name: (reference_symbol, reference)
+            for (name, reference_symbol), reference in zip(
+                reference_symbols.items(), self._references
+            )
+        }
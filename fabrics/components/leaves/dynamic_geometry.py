@@ -7,9 +7,10 @@ from fabrics.components.maps.parameterized_maps import (
 )
 from fabrics.diffGeometry.geometry import Geometry
 from fabrics.diffGeometry.energy import Lagrangian
+from fabrics.diffGeometry.spec import Spec
 from fabrics.components.leaves.dynamic_leaf import DynamicLeaf
 from fabrics.helpers.variables import Variables
-from fabrics.helpers.functions import parse_symbolic_input
+from fabrics.helpers.templates import finsler_template, geometry_template
 
 
 class GenericDynamicGeometryLeaf(DynamicLeaf):
@@ -31,9 +32,10 @@ class GenericDynamicGeometryLeaf(DynamicLeaf):
         geometry: str
             String that holds the geometry. The variables must be x, xdot.
         """
-        x = self._x
-        xdot = self._xdot
-        new_parameters, h_geometry = parse_symbolic_input(geometry, x, xdot, name=self._leaf_name)
+        template = geometry_template(geometry, self._x.size()[0])
+        new_parameters, (h_geometry,) = template.instantiate(
+            self._x, self._xdot, name=self._leaf_name
+        )
         self._parent_variables.add_parameters(new_parameters)
         self._geo = Geometry(h=h_geometry, var=self._leaf_variables)
 
@@ -46,11 +48,17 @@ class GenericDynamicGeometryLeaf(DynamicLeaf):
         finsler_structure: str
             String that holds the Finsler structure. The variables must be x, xdot.
         """
-        x = self._x
-        xdot = self._xdot
-        new_parameters, lagrangian_geometry = parse_symbolic_input(finsler_structure, x, xdot, name=self._leaf_name)
+        template = finsler_template(finsler_structure, self._x.size()[0])
+        new_parameters, (l, M, f, H) = template.instantiate(
+            self._x, self._xdot, name=self._leaf_name
+        )
         self._parent_variables.add_parameters(new_parameters)
-        self._lag = Lagrangian(lagrangian_geometry, var=self._leaf_variables)
+        self._lag = Lagrangian(
+            l,
+            var=self._leaf_variables,
+            spec=Spec(M, f=f, var=self._leaf_variables),
+            hamiltonian=H,
+        )
 
 
 class DynamicObstacleLeaf(GenericDynamicGeometryLeaf):
@@ -1,3 +1,5 @@
+from typing import Dict, List, Optional
+
 import casadi as ca
 
 from fabrics.components.maps.parameterized_maps import (
@@ -10,9 +12,13 @@ from fabrics.components.maps.parameterized_maps import (
 from fabrics.diffGeometry.diffMap import DifferentialMap, ExplicitDifferentialMap
 from fabrics.diffGeometry.geometry import Geometry
 from fabrics.diffGeometry.energy import Lagrangian
+from fabrics.diffGeometry.energized_geometry import WeightedGeometry
+from fabrics.diffGeometry.spec import Spec
 from fabrics.components.leaves.leaf import Leaf
 from fabrics.helpers.variables import Variables
+from fabrics.helpers.distances import CuboidTerms
 from fabrics.helpers.functions import parse_symbolic_input
+from fabrics.helpers.templates import finsler_template, geometry_template
 
 
 class GenericGeometryLeaf(Leaf):
@@ -32,9 +38,10 @@ class GenericGeometryLeaf(Leaf):
         geometry: str
             String that holds the geometry. The variables must be x, xdot.
         """
-        x = self._x
-        xdot = self._xdot
-        new_parameters, h_geometry = parse_symbolic_input(geometry, x, xdot, name=self._leaf_name)
+        template = geometry_template(geometry, self._x.size()[0])
+        new_parameters, (h_geometry,) = template.instantiate(
+            self._x, self._xdot, name=self._leaf_name
+        )
         self._parent_variables.add_parameters(new_parameters)
         self._geo = Geometry(h=h_geometry, var=self._leaf_variables)
 
@@ -47,20 +54,29 @@ class GenericGeometryLeaf(Leaf):
         finsler_structure: str
             String that holds the Finsler structure. The variables must be x, xdot.
         """
-        x = self._x
-        xdot = self._xdot
-        new_parameters, lagrangian_geometry = parse_symbolic_input(finsler_structure, x, xdot, name=self._leaf_name)
+        template = finsler_template(finsler_structure, self._x.size()[0])
+        new_parameters, (l, M, f, H) = template.instantiate(
+            self._x, self._xdot, name=self._leaf_name
+        )
         self._parent_variables.add_parameters(new_parameters)
-        self._lag = Lagrangian(lagrangian_geometry, var=self._leaf_variables)
+        self._lag = Lagrangian(
+            l,
+            var=self._leaf_variables,
+            spec=Spec(M, f=f, var=self._leaf_variables),
+            hamiltonian=H,
+        )
 
 class AvoidanceLeaf(GenericGeometryLeaf):
-    def _init__(
-            self, 
+    def __init__(
+            self,
             parent_variables: Variables,
             name: str,
             phi: ca.SX,
+            witness: Optional[tuple] = None,
             ):
-        super().__init__(parent_variables, name, phi)
+        super().__init__(parent_variables, name, None)
+        self._forward_kinematics = phi
+        self._map = DifferentialMap(phi, parent_variables, witness=witness)
 
 
 class LimitLeaf(GenericGeometryLeaf):
@@ -93,6 +109,168 @@ class LimitLeaf(GenericGeometryLeaf):
     def set_forward_map(self):
         self._map = DifferentialMap(self._forward_kinematics, self._parent_variables)
 
+
+class JointLimitsLeaf(GenericGeometryLeaf):
+    """
+    The JointLimitsLeaf is a geometry leaf for all joint limits of a robot.
+
+    The geometry and the Finsler structure are given for a scalar distance
+    x to a limit, with x = q_i - lower_i and x = upper_i - q_i. As these maps
+    only shift and flip the sign of single joints, the pullback is formed in
+    closed form, so that the leaf has no differential map. The
+    Euler-Lagrange equations are solved once for the scalar structure and
+    evaluated for all limits, so that the metric in the configuration space
+    is diagonal and no Jacobians are computed. Runtime symbols of the
+    geometry and the Finsler structure are created per limit, with the
+    names of the corresponding LimitLeaf.
+    """
+    def __init__(
+        self,
+        parent_variables: Variables,
+        lower_limits: list,
+        upper_limits: list,
+    ):
+        super().__init__(
+            parent_variables,
+            "joint_limits_leaf",
+            None,
+            dim=2 * len(lower_limits),
+        )
+        q = parent_variables.position_variable()
+        qdot = parent_variables.velocity_variable()
+        number_joints = len(lower_limits)
+        self._phi = ca.vertcat(
+            q[0:number_joints] - ca.DM(lower_limits),
+            ca.DM(upper_limits) - q[0:number_joints],
+        )
+        self._phidot = ca.vertcat(qdot[0:number_joints], -qdot[0:number_joints])
+        self._number_joints = number_joints
+        self._x_limit = ca.SX.sym("x_joint_limit")
+        self._xdot_limit = ca.SX.sym("xdot_joint_limit")
+        self._limit_parameters = {}
+        self._parameters = {}
+
+    def limit_name(self, joint_index: int, limit_index: int) -> str:
+        return f"limit_joint_{joint_index}_{limit_index}_leaf"
+
+    def set_geometry(self, geometry: str) -> None:
+        new_parameters, self._h_limit = parse_symbolic_input(
+            geometry, self._x_limit, self._xdot_limit
+        )
+        self._limit_parameters.update(new_parameters)
+
+    def set_finsler_structure(self, finsler_structure: str) -> None:
+        new_parameters, self._l_limit = parse_symbolic_input(
+            finsler_structure, self._x_limit, self._xdot_limit
+        )
+        self._limit_parameters.update(new_parameters)
+
+    def limit_parameters(self, joint_index: int, limit_index: int) -> dict:
+        """
+        Returns the runtime symbols of one limit, named as in LimitLeaf.
+        """
+        limit_name = self.limit_name(joint_index, limit_index)
+        limit_parameters = {}
+        for name, parameter in self._limit_parameters.items():
+            limit_parameter_name = f"{name}_{limit_name}"
+            if limit_parameter_name in self._parent_variables.parameters():
+                limit_parameters[limit_parameter_name] = self._parent_variables.parameters()[limit_parameter_name]
+            else:
+                limit_parameters[limit_parameter_name] = ca.SX.sym(limit_parameter_name, parameter.shape[0])
+        return limit_parameters
+
+    def distances(self) -> ca.SX:
+        """
+        Returns the distances to all lower and then all upper limits.
+        """
+        return self._phi
+
+    def jacobian(self) -> ca.SX:
+        """
+        Returns the constant Jacobian of the distances to the limits.
+        """
+        return ca.jacobian(self._phi, self._parent_variables.position_variable())
+
+    def limit_terms(self) -> List[List[ca.SX]]:
+        """
+        Returns the scalar terms of every limit in the parent variables.
+
+        The limits are ordered as the distances. For every limit, the terms
+        are the metric m, the force f of the Finsler structure, the force
+        m * h of the geometry, the Hamiltonian H, the energy l and the
+        geometry h.
+        """
+        x = self._x_limit
+        xdot = self._xdot_limit
+        l_limit = ca.SX(self._l_limit)
+        dL_dxdot = ca.gradient(l_limit, xdot)
+        dL_dx = ca.gradient(l_limit, x)
+        m = ca.jacobian(dL_dxdot, xdot)
+        f_le = ca.jacobian(dL_dx, xdot) * xdot - dL_dx
+        H = dL_dxdot * xdot - l_limit
+        f_geometry = m * self._h_limit
+        qdot = self._parent_variables.velocity_variable()
+        symbols = [x, xdot] + list(self._limit_parameters.values())
+        terms = [None] * (2 * self._number_joints)
+        for i in range(self._number_joints):
+            for limit_index, sign in enumerate([1, -1]):
+                index = limit_index * self._number_joints + i
+                limit_parameters = self.limit_parameters(i, limit_index)
+                self._parameters.update(limit_parameters)
+                terms[index] = ca.substitute(
+                    [m, f_le, f_geometry, H, l_limit, ca.SX(self._h_limit)],
+                    symbols,
+                    [self._phi[index], sign * qdot[i]] + list(limit_parameters.values()),
+                )
+        return terms
+
+    def diagnostics(self) -> Dict[str, ca.SX]:
+        """
+        Returns the distances x to all limits and their velocities xdot.
+
+        If a geometry and a Finsler structure are set, the geometry h, the
+        diagonal metric M and the force f of all limits and the total energy
+        are returned as well.
+        """
+        expressions = dict(x=self._phi, xdot=self._phidot)
+        if hasattr(self, '_h_limit') and hasattr(self, '_l_limit'):
+            m, f_le, _, _, l, h = (ca.vertcat(*term) for term in zip(*self.limit_terms()))
+            expressions.update(h=h, M=ca.diag(m), f=f_le, energy=ca.sum1(l))
+        return expressions
+
+    def weighted_geometry(self) -> WeightedGeometry:
+        """
+        Returns the weighted geometry of all limits in configuration space.
+        """
+        q = self._parent_variables.position_variable()
+        dof = q.size()[0]
+        M_q = ca.SX(dof, dof)
+        f_le_q = ca.SX(dof, 1)
+        f_geometry_q = ca.SX(dof, 1)
+        l_q = ca.SX(0)
+        H_q = ca.SX(0)
+        for index, (m_i, f_le_i, f_geometry_i, H_i, l_i, _) in enumerate(self.limit_terms()):
+            i = index % self._number_joints
+            sign = 1 if index < self._number_joints else -1
+            M_q[i, i] += m_i
+            f_le_q[i] += sign * f_le_i
+            f_geometry_q[i] += sign * f_geometry_i
+            H_q += H_i
+            l_q += l_i
+        self._parent_variables.add_parameters(self._parameters)
+        variables = Variables(
+            state_variables=dict(self._parent_variables.state_variables()),
+            parameters=dict(self._parameters),
+        )
+        lagrangian = Lagrangian(
+            l_q,
+            var=variables,
+            spec=Spec(M_q, f=f_le_q, var=variables),
+            hamiltonian=H_q,
+        )
+        return WeightedGeometry(s=Spec(M_q, f=f_geometry_q, var=variables), le=lagrangian)
+
+
 class SelfCollisionLeaf(GenericGeometryLeaf):
     """
     The SelfCollisionLeaf is a geometry leaf for self collision avoidanceself.
@@ -326,6 +504,7 @@ class CapsuleSphereLeaf(GenericGeometryLeaf):
         sphere_name: str,
         capsule_center_1: ca.SX,
         capsule_center_2: ca.SX,
+        witness_point_jacobians: bool = False,
     ):
         super().__init__(
             parent_variables, f"{capsule_name}_{sphere_name}_leaf", None
@@ -336,6 +515,7 @@ class CapsuleSphereLeaf(GenericGeometryLeaf):
         ]
         self._capsule_name = capsule_name
         self._sphere_name = sphere_name
+        self._witness_point_jacobians = witness_point_jacobians
         self.set_forward_map()
 
     def set_forward_map(self):
@@ -358,6 +538,7 @@ class CapsuleSphereLeaf(GenericGeometryLeaf):
             sphere_center,
             capsule_radius,
             sphere_radius,
+            witness_point_jacobians=self._witness_point_jacobians,
         )
 
 class CapsuleCuboidLeaf(GenericGeometryLeaf):
@@ -368,6 +549,8 @@ class CapsuleCuboidLeaf(GenericGeometryLeaf):
         cuboid_name: str,
         capsule_center_1: ca.SX,
         capsule_center_2: ca.SX,
+        cuboid_terms: Optional[CuboidTerms] = None,
+        witness_point_jacobians: bool = False,
     ):
         super().__init__(
             parent_variables, f"{capsule_name}_{cuboid_name}_leaf", None
@@ -378,6 +561,8 @@ class CapsuleCuboidLeaf(GenericGeometryLeaf):
         ]
         self._capsule_name = capsule_name
         self._cuboid_name = cuboid_name
+        self._cuboid_terms = cuboid_terms
+        self._witness_point_jacobians = witness_point_jacobians
         self.set_forward_map()
 
     def set_forward_map(self):
@@ -402,6 +587,8 @@ class CapsuleCuboidLeaf(GenericGeometryLeaf):
             cuboid_center,
             capsule_radius,
             cuboid_size,
+            cuboid_terms=self._cuboid_terms,
+            witness_point_jacobians=self._witness_point_jacobians,
         )
 
 class SphereCuboidLeaf(GenericGeometryLeaf):
@@ -414,10 +601,12 @@ class SphereCuboidLeaf(GenericGeometryLeaf):
             forward_kinematics: ca.SX,
             obstacle_name: str,
             collision_link: str,
+            cuboid_terms: Optional[CuboidTerms] = None,
     ):
         super().__init__(
             parent_variables, f"{obstacle_name}_{collision_link}_leaf", forward_kinematics
         )
+        self._cuboid_terms = cuboid_terms
         self.set_forward_map(obstacle_name, collision_link)
 
     def set_forward_map(self, obstacle_name, collision_link):
@@ -441,6 +630,7 @@ class SphereCuboidLeaf(GenericGeometryLeaf):
             cuboid_center,
             radius_body,
             size_cuboid,
+            cuboid_terms=self._cuboid_terms,
         )
 
 
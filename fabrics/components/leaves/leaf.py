@@ -57,6 +57,29 @@ class Leaf(object):
             self._geo.concretize()
             self._lag.concretize()
 
+    def diagnostics(self) -> Dict[str, ca.SX]:
+        """
+        Returns the task-space quantities of the leaf in the parent variables.
+
+        These are the position x and the velocity xdot of the leaf and, if
+        a geometry and a Finsler structure are set, the geometry h, the
+        metric M, the force f and the energy l at x and xdot. Leaves without
+        a differential map have no diagnostics.
+        """
+        if self.map() is None:
+            return {}
+        x = self._map._phi
+        xdot = self._map.phidot()
+        expressions = dict(x=x, xdot=xdot)
+        if hasattr(self, '_geo') and hasattr(self, '_lag'):
+            h, M, f, l = ca.substitute(
+                [self._geo._h, self._lag._S.M(), self._lag._S.f(), self._lag._l],
+                [self._x, self._xdot],
+                [x, xdot],
+            )
+            expressions.update(h=h, M=M, f=f, energy=l)
+        return expressions
+
     def evaluate(self, **kwargs) -> Dict[str, np.ndarray]:
         x, J, Jdot = self._map.forward(**kwargs)
         xdot = np.dot(J, kwargs['qdot'])
@@ -64,23 +87,3 @@ class Leaf(object):
             x=x,
             xdot=xdot,
         )
-        if hasattr(self, '_geo') and hasattr(self, '_lag'):
-            state_variable_names = list(self._geo._vars.state_variables().keys())
-            task_space_arguments = {
-                    state_variable_names[0]:x,
-                    state_variable_names[1]:xdot,
-            }
-            task_space_arguments.update(**kwargs)
-            h, xddot = self._geo.evaluate(**task_space_arguments)
-            M, f, H = self._lag.evaluate(**task_space_arguments)
-            pulled_geo = self._geo.pull(self._map)
-            pulled_geo.concretize()
-            h_pulled, xddot_pulled = pulled_geo.evaluate(**kwargs)
-            return dict(
-                x=x,
-                xdot=xdot,
-                h=h,
-                M=M,
-                f=f,
-                h_pulled=h_pulled
-            )
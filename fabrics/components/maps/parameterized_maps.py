@@ -1,10 +1,13 @@
-from typing import List
+from typing import List, Optional
 import casadi as ca
 from fabrics.diffGeometry.diffMap import (
     DifferentialMap,
 )
-from fabrics.helpers.distances import (capsule_to_sphere, cuboid_to_sphere,
-                                       sphere_to_plane, cuboid_to_capsule)
+from fabrics.helpers.distances import (CuboidTerms, capsule_to_sphere,
+                                       capsule_to_sphere_witness,
+                                       cuboid_to_sphere, sphere_to_plane,
+                                       cuboid_to_capsule,
+                                       cuboid_to_capsule_witness)
 from fabrics.helpers.variables import Variables
 
 class ParameterizedGoalMap(DifferentialMap):
@@ -40,11 +43,18 @@ class CapsuleSphereMap(ParameterizedGeometryMap):
         sphere_center: ca.SX,
         capsule_radius: ca.SX,
         sphere_radius: ca.SX,
+        witness_point_jacobians: bool = False,
     ):
-        phi = capsule_to_sphere(
-            capsule_centers, sphere_center, capsule_radius, sphere_radius
-        )
-        super().__init__(phi, var)
+        witness = None
+        if witness_point_jacobians:
+            phi, *witness = capsule_to_sphere_witness(
+                capsule_centers, sphere_center, capsule_radius, sphere_radius
+            )
+        else:
+            phi = capsule_to_sphere(
+                capsule_centers, sphere_center, capsule_radius, sphere_radius
+            )
+        super().__init__(phi, var, witness=witness)
 
 class CapsuleCuboidMap(ParameterizedGeometryMap):
     def __init__(
@@ -54,11 +64,27 @@ class CapsuleCuboidMap(ParameterizedGeometryMap):
         cuboid_center: ca.SX,
         capsule_radius: ca.SX,
         cuboid_size: ca.SX,
+        cuboid_terms: Optional[CuboidTerms] = None,
+        witness_point_jacobians: bool = False,
     ):
-        phi = cuboid_to_capsule(
-            cuboid_center, capsule_centers, cuboid_size, capsule_radius
-        )
-        super().__init__(phi, var)
+        witness = None
+        if witness_point_jacobians:
+            phi, *witness = cuboid_to_capsule_witness(
+                cuboid_center,
+                capsule_centers,
+                cuboid_size,
+                capsule_radius,
+                terms=cuboid_terms,
+            )
+        else:
+            phi = cuboid_to_capsule(
+                cuboid_center,
+                capsule_centers,
+                cuboid_size,
+                capsule_radius,
+                terms=cuboid_terms,
+            )
+        super().__init__(phi, var, witness=witness)
 
 class PlaneSphereMap(ParameterizedGeometryMap):
     def __init__(
@@ -80,8 +106,15 @@ class CuboidSphereMap(ParameterizedGeometryMap):
         cuboid_center: ca.SX,
         sphere_radius: ca.SX,
         cuboid_size: ca.SX,
+        cuboid_terms: Optional[CuboidTerms] = None,
     ):
-        phi = cuboid_to_sphere(cuboid_center, sphere_center, cuboid_size, sphere_radius)
+        phi = cuboid_to_sphere(
+            cuboid_center,
+            sphere_center,
+            cuboid_size,
+            sphere_radius,
+            terms=cuboid_terms,
+        )
 
         super().__init__(phi, var)
 
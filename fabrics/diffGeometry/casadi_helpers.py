@@ -8,3 +8,34 @@ def outerProduct(a: ca.SX, b: ca.SX):
     A = ca.transpose(ca.repmat(ca.transpose(a), m))
     B = ca.repmat(ca.transpose(b), m)
     return ca.times(A, B)
+
+
+def regularizedLeastSquares(A: ca.SX, b: ca.SX, regularization: float):
+    """
+    Solves min |A x - b|^2 + regularization * |x|^2 for x.
+
+    The solution approaches pinv(A) b for vanishing regularization, but only
+    the smaller of the normal equations is solved for the single right hand
+    side instead of expanding the pseudo-inverse symbolically.
+    """
+    m, n = A.size()
+    if m <= n:
+        return ca.mtimes(
+            ca.transpose(A),
+            ca.solve(ca.mtimes(A, ca.transpose(A)) + regularization * ca.SX.eye(m), b),
+        )
+    return ca.solve(
+        ca.mtimes(ca.transpose(A), A) + regularization * ca.SX.eye(n),
+        ca.mtimes(ca.transpose(A), b),
+    )
+
+
+def choleskySolve(A: ca.SX, b: ca.SX):
+    """
+    Solves A x = b for a symmetric, positive definite matrix A.
+
+    The Cholesky factor is triangular, so that both solves are symbolic
+    substitutions, which is much shorter than forming the inverse of A.
+    """
+    R = ca.chol(A)
+    return ca.solve(R, ca.solve(ca.transpose(R), b))
@@ -6,6 +6,17 @@ from fabrics.helpers.variables import Variables
 
 
 class DifferentialMap:
+    """
+    Differential map phi(q) with its Jacobian J and its time derivative Jdot.
+
+    If a witness tuple (symbols, values) is passed, phi is expressed in
+    terms of the witness symbols, e.g. the parameters of the closest points
+    of a distance, see helpers.distances.WitnessDistance. The symbols are
+    held fixed for differentiation and replaced by their values in phi, J
+    and Jdot. This avoids differentiating through the case distinctions of
+    the closest point computation. J is exact, Jdot neglects the motion of
+    the witness points along the bodies.
+    """
     _vars: Variables
     _J: ca.SX
     _Jdot: ca.SX
@@ -23,6 +34,11 @@ class DifferentialMap:
         qdot = self._vars.velocity_variable()
         self._J = ca.jacobian(phi, q)
         self._Jdot = Jdot_sign * ca.jacobian(ca.mtimes(self._J, qdot), q)
+        if kwargs.get('witness') is not None:
+            witness, witness_value = kwargs.get('witness')
+            self._phi, self._J, self._Jdot = ca.substitute(
+                [self._phi, self._J, self._Jdot], [witness], [witness_value]
+            )
 
     def Jdotqdot(self) -> ca.SX:
         return ca.mtimes(self._Jdot, self.qdot())
@@ -62,12 +62,14 @@ class WeightedGeometry(Spec):
         return WeightedGeometry(s=spec, le=le, ref_names=spec.ref_names())
 
     def computeAlpha(self, ref_sign: int = 1):
-        xdot = self._le.xdot_rel(ref_sign=ref_sign)
-        frac = 1 / (
-            eps + ca.dot(xdot, ca.mtimes(self._le._S.M(), xdot))
-        )
-        self._alpha = -frac * ca.dot(xdot, self.f() - self._le._S.f())
-        self._alpha_fraction = eps + ca.dot(xdot, ca.mtimes(self._le._S.M(), xdot))
+        xdot, M_xdot, xdot_M_xdot, xdot_f_le = self._le.quadratic_forms(ref_sign=ref_sign)
+        if hasattr(self, '_f'):
+            xdot_f = ca.dot(xdot, self._f)
+        else:
+            # f = M h with the symmetric metric of the Lagrangian
+            xdot_f = ca.dot(M_xdot, self._h)
+        self._alpha_fraction = eps + xdot_M_xdot
+        self._alpha = -(xdot_f - xdot_f_le) / self._alpha_fraction
 
     def concretize(self, ref_sign: int = 1):
         self.computeAlpha(ref_sign=ref_sign)
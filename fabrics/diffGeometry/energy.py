@@ -2,12 +2,14 @@ import casadi as ca
 import numpy as np
 import logging
 
+from collections import OrderedDict
 from copy import deepcopy
+from typing import List, Optional
 
 from fabrics.diffGeometry.spec import Spec, checkCompatability
 from fabrics.diffGeometry.diffMap import DifferentialMap, DynamicDifferentialMap
 
-from fabrics.helpers.functions import joinRefTrajs
+from fabrics.helpers.functions import joinRefTrajs, structural_hash
 from fabrics.helpers.variables import Variables
 from fabrics.helpers.casadiFunctionWrapper import CasadiFunctionWrapper
 
@@ -22,6 +24,63 @@ class LagrangianException(Exception):
         return self._expression + ": " + self._message
 
 
+class EulerLagrangeCache(object):
+    """
+    Least recently used cache for the Euler-Lagrange equations.
+
+    The equations are stored as casadi functions of the state variables,
+    the reference trajectory and the remaining symbols of the Lagrangian.
+    They are keyed by the structural hash of the Lagrangian, so that
+    Lagrangians that only differ in the names of their symbols, e.g. of
+    identical leaves or of a rebuilt planner, are derived once.
+
+    Equations taken from the cache are instantiated by calling the stored
+    function, so that they do not share subexpressions, e.g. the forward
+    kinematics, with the rest of the planner. Concretize the planner with
+    cse=True to eliminate them again. As this costs more build time than
+    the cache saves for a single planner, the cache is disabled by default,
+    enable it with resize(maxsize) when many similar planners are built.
+    Freezing a planner clears the cache, so that it does not keep the
+    equations of earlier planners alive.
+    """
+
+    def __init__(self, maxsize: int = 0):
+        self._maxsize = maxsize
+        self._functions = OrderedDict()
+
+    def enabled(self) -> bool:
+        return self._maxsize > 0
+
+    def maxsize(self) -> int:
+        return self._maxsize
+
+    def get(self, key: str) -> Optional[ca.Function]:
+        if key not in self._functions:
+            return None
+        self._functions.move_to_end(key)
+        return self._functions[key]
+
+    def put(self, key: str, function: ca.Function) -> None:
+        self._functions[key] = function
+        self._functions.move_to_end(key)
+        while len(self._functions) > self._maxsize:
+            self._functions.popitem(last=False)
+
+    def resize(self, maxsize: int) -> None:
+        self._maxsize = maxsize
+        while len(self._functions) > self._maxsize:
+            self._functions.popitem(last=False)
+
+    def clear(self) -> None:
+        self._functions.clear()
+
+    def __len__(self) -> int:
+        return len(self._functions)
+
+
+euler_lagrange_cache = EulerLagrangeCache()
+
+
 class Lagrangian(object):
     """description"""
 
@@ -79,6 +138,26 @@ class Lagrangian(object):
         else:
             return self.xdot()
 
+    def quadratic_forms(self, ref_sign: int = 1) -> List[ca.SX]:
+        """
+        Returns xdot, M xdot, xdot^T M xdot and xdot^T f for the relative velocity.
+
+        The forms are built once per reference sign, so that all weighted
+        geometries energized by this Lagrangian share them in their alpha.
+        """
+        if not hasattr(self, '_quadratic_forms'):
+            self._quadratic_forms = {}
+        if ref_sign not in self._quadratic_forms:
+            xdot = self.xdot_rel(ref_sign=ref_sign)
+            M_xdot = ca.mtimes(self._S.M(), xdot)
+            self._quadratic_forms[ref_sign] = [
+                xdot,
+                M_xdot,
+                ca.dot(xdot, M_xdot),
+                ca.dot(xdot, self._S.f()),
+            ]
+        return self._quadratic_forms[ref_sign]
+
     def __add__(self, b):
         assert isinstance(b, Lagrangian)
         checkCompatability(self, b)
@@ -102,7 +181,47 @@ class Lagrangian(object):
         return self._x_ref_name in self._vars.parameters()
 
 
+    def euler_lagrange_inputs(self) -> List[ca.SX]:
+        """
+        Returns the symbols the Euler-Lagrange equations depend on.
+
+        These are the state variables, the reference trajectory for dynamic
+        Lagrangians and all other symbols of the Lagrangian in the order
+        they appear in it.
+        """
+        inputs = [self.x(), self.xdot()]
+        if self.is_dynamic():
+            parameters = self._vars.parameters()
+            inputs += [parameters[name] for name in self.ref_names()]
+        known_symbols = set(
+            symbol.element_hash() for symbol in ca.symvar(ca.vertcat(*inputs))
+        )
+        inputs += [
+            symbol for symbol in ca.symvar(self._l)
+            if symbol.element_hash() not in known_symbols
+        ]
+        return inputs
+
     def applyEulerLagrange(self):
+        if not euler_lagrange_cache.enabled() or not all(
+            ca.SX.is_valid_input(expression) for expression in [self.x(), self.xdot()]
+        ):
+            self.deriveEulerLagrange()
+            return
+        inputs = self.euler_lagrange_inputs()
+        key = structural_hash([self._l], inputs) + str(self.is_dynamic())
+        function = euler_lagrange_cache.get(key)
+        if function is None:
+            self.deriveEulerLagrange()
+            function = ca.Function(
+                "euler_lagrange", inputs, [self._S.M(), self._S.f(), self._H]
+            )
+            euler_lagrange_cache.put(key, function)
+            return
+        M, f, self._H = function(*inputs)
+        self._S = Spec(M, f=f, var=self._vars, refTrajs=self._refTrajs)
+
+    def deriveEulerLagrange(self):
         dL_dxdot = ca.gradient(self._l, self.xdot())
         dL_dx = ca.gradient(self._l, self.x())
         d2L_dxdxdot = ca.jacobian(dL_dx, self.xdot())
@@ -150,8 +269,9 @@ class Lagrangian(object):
 
     def pull(self, dm: DifferentialMap):
         assert isinstance(dm, DifferentialMap)
-        l_subst = ca.substitute(self._l, self.x(), dm._phi)
-        l_subst2 = ca.substitute(l_subst, self.xdot(), dm.phidot())
+        l_subst2 = ca.substitute(
+            [self._l], [self.x(), self.xdot()], [dm._phi, dm.phidot()]
+        )[0]
         new_state_variables = dm.state_variables()
         new_parameters = {}
         new_parameters.update(self._vars.parameters())
@@ -168,9 +288,9 @@ class Lagrangian(object):
             return Lagrangian(l_subst2, var=new_vars, ref_names=self.ref_names())
 
     def dynamic_pull(self, dm: DynamicDifferentialMap):
-        l_pulled = self._l
-        l_pulled_subst_x = ca.substitute(l_pulled, self.x(), dm._phi)
-        l_pulled_subst_x_xdot = ca.substitute(l_pulled_subst_x, self.xdot(), dm.phidot())
+        l_pulled_subst_x_xdot = ca.substitute(
+            [self._l], [self.x(), self.xdot()], [dm._phi, dm.phidot()]
+        )[0]
         return Lagrangian(l_pulled_subst_x_xdot, var=dm._vars, ref_names=dm.ref_names())
 
 
@@ -3,6 +3,8 @@ import numpy as np
 from copy import deepcopy
 
 from fabrics.diffGeometry.diffMap import DifferentialMap, DynamicDifferentialMap
+from fabrics.diffGeometry.casadi_helpers import regularizedLeastSquares
+from fabrics.helpers.constants import eps
 from fabrics.helpers.variables import Variables
 from fabrics.helpers.casadiFunctionWrapper import CasadiFunctionWrapper
 
@@ -44,10 +46,18 @@ class Geometry:
         return Geometry(h=self._h + b._h, var=var)
 
     def pull(self, dm: DifferentialMap):
+        """
+        Pulls the geometry back through the differential map.
+
+        The pulled geometry is the regularized least-squares solution of
+        J h_pulled = h + Jdot qdot. Weighted geometries do not need it, they
+        are pulled through the metric.
+        """
         assert isinstance(dm, DifferentialMap)
-        h_pulled = ca.mtimes(ca.pinv(dm._J), self._h + dm.Jdotqdot())
-        h_pulled_subst_x = ca.substitute(h_pulled, self.x(), dm._phi)
-        h_pulled_subst_x_xdot = ca.substitute(h_pulled_subst_x, self.xdot(), dm.phidot())
+        h_subst = ca.substitute(
+            [self._h], [self.x(), self.xdot()], [dm._phi, dm.phidot()]
+        )[0]
+        h_pulled_subst_x_xdot = regularizedLeastSquares(dm._J, h_subst + dm.Jdotqdot(), eps)
         new_state_variables = dm.state_variables()
         new_parameters = {}
         new_parameters.update(self._vars.parameters())
@@ -60,9 +70,10 @@ class Geometry:
         return Geometry(h=h_pulled_subst_x_xdot, var=new_vars, refTrajs=refTrajs)
 
     def dynamic_pull(self, dm: DynamicDifferentialMap):
-        h_pulled = self._h - dm.xddot_ref()
-        h_pulled_subst_x = ca.substitute(h_pulled, self.x(), dm._phi)
-        h_pulled_subst_x_xdot = ca.substitute(h_pulled_subst_x, self.xdot(), dm.phidot())
+        h_subst = ca.substitute(
+            [self._h], [self.x(), self.xdot()], [dm._phi, dm.phidot()]
+        )[0]
+        h_pulled_subst_x_xdot = h_subst - dm.xddot_ref()
         return Geometry(h=h_pulled_subst_x_xdot, var=dm._vars)
 
     def concretize(self):
@@ -5,7 +5,7 @@ from copy import deepcopy
 
 from fabrics.diffGeometry.diffMap import DifferentialMap, DynamicDifferentialMap
 from fabrics.helpers.constants import eps
-from fabrics.helpers.functions import checkCompatability
+from fabrics.helpers.functions import checkCompatability, sparsify, sparsity_statistics
 
 from fabrics.helpers.casadiFunctionWrapper import CasadiFunctionWrapper
 from fabrics.helpers.variables import Variables
@@ -27,11 +27,11 @@ class Spec:
         if 'f' in kwargs:
             f = kwargs.get('f')
             assert isinstance(f, ca.SX)
-            self._f = f
+            self._f = sparsify(f)
         if 'h' in kwargs:
             h = kwargs.get('h')
             assert isinstance(h, ca.SX)
-            self._h = h
+            self._h = sparsify(h)
         if 'x' in kwargs:
             self._vars = Variables(state_variables={"x": kwargs.get('x'), "xdot": kwargs.get('xdot')})
         elif 'var' in kwargs:
@@ -49,7 +49,7 @@ class Spec:
         self._xdot_d = np.zeros(self.x().size()[0])
         self._vars.verify()
         assert isinstance(M, ca.SX)
-        self._M = M
+        self._M = sparsify(M)
 
     def x_ref(self):
         return self._vars.parameter_by_name(self._x_ref_name)
@@ -73,8 +73,16 @@ class Spec:
         return self._M
 
     def Minv(self):
-        logging.debug("Casadi pseudo inverse is used in spec")
-        return ca.pinv(self._M + np.identity(self.x().size()[0]) * eps)
+        if not hasattr(self, '_Minv'):
+            logging.debug("Casadi pseudo inverse is used in spec")
+            self._Minv = ca.pinv(self._M + ca.SX.eye(self.x().size()[0]) * eps)
+        return self._Minv
+
+    def sparsity_statistics(self) -> dict:
+        return {
+            'M': sparsity_statistics(self.M()),
+            'f': sparsity_statistics(self.f()),
+        }
 
     def x(self):
         return self._vars.position_variable()
@@ -129,20 +137,17 @@ class Spec:
 
     def pull(self, dm: DifferentialMap):
         assert isinstance(dm, DifferentialMap)
-        M_pulled = ca.mtimes(ca.transpose(dm._J), ca.mtimes(self.M(), dm._J))
-        Jt = ca.transpose(dm._J)
-        f_1 = ca.mtimes(Jt, ca.mtimes(self.M(), dm.Jdotqdot()))
-        f_2 = ca.mtimes(Jt, self.f())
-        f_pulled = f_1 + f_2
         x = self._vars.position_variable()
         xdot = self._vars.velocity_variable()
-        M_pulled_subst_x = ca.substitute(M_pulled, x, dm._phi)
-        M_pulled_subst_x_xdot = ca.substitute(
-            M_pulled_subst_x, xdot, dm.phidot()
+        # Substituting the leaf state before forming the products keeps the
+        # substitution on the small leaf expressions instead of the Jacobians.
+        M_subst, f_subst = ca.substitute(
+            [self.M(), self.f()], [x, xdot], [dm._phi, dm.phidot()]
         )
-        f_pulled_subst_x = ca.substitute(f_pulled, x, dm._phi)
-        f_pulled_subst_x_xdot = ca.substitute(
-            f_pulled_subst_x, xdot, dm.phidot()
+        Jt = ca.transpose(dm._J)
+        M_pulled_subst_x_xdot = ca.mtimes(Jt, ca.mtimes(M_subst, dm._J))
+        f_pulled_subst_x_xdot = ca.mtimes(
+            Jt, ca.mtimes(M_subst, dm.Jdotqdot()) + f_subst
         )
         new_state_variables = dm.state_variables()
         new_parameters = {}
@@ -167,14 +172,10 @@ class Spec:
         return self._x_ref_name in self._vars.parameters()
 
     def dynamic_pull(self, dm: DynamicDifferentialMap):
-        M_pulled = self.M()
         x = self._vars.position_variable()
         xdot = self._vars.velocity_variable()
-        M_pulled_subst_x = ca.substitute(M_pulled, x, dm._phi)
-        M_pulled_subst_x_xdot = ca.substitute(M_pulled_subst_x, xdot, dm.phidot())
-        f_pulled = self.f()  - ca.mtimes(self.M(), dm.xddot_ref())
-        f_pulled_subst_x = ca.substitute(f_pulled, x, dm._phi)
-        f_pulled_subst_x_xdot = ca.substitute(
-            f_pulled_subst_x, xdot, dm.phidot()
+        M_pulled_subst_x_xdot, f_subst = ca.substitute(
+            [self.M(), self.f()], [x, xdot], [dm._phi, dm.phidot()]
         )
+        f_pulled_subst_x_xdot = f_subst - ca.mtimes(M_pulled_subst_x_xdot, dm.xddot_ref())
         return Spec(M_pulled_subst_x_xdot, f=f_pulled_subst_x_xdot, var=dm._vars, ref_names=dm.ref_names())
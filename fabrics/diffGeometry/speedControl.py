@@ -48,10 +48,11 @@ class Damper:
 
     def substitute_beta(self, a_ex_fun, a_le_fun):
         if not self._constant_beta_expression:
-            beta_subst = ca.substitute(self._beta, self._a_ex, a_ex_fun)
-            beta_subst2 = ca.substitute(beta_subst, self._a_le, a_le_fun)
-            beta_subst3 = ca.substitute(beta_subst2, self._x, self._dm._phi)
-            return beta_subst3
+            return ca.substitute(
+                [self._beta],
+                [self._a_ex, self._a_le, self._x],
+                [a_ex_fun, a_le_fun, self._dm._phi],
+            )[0]
         else:
             beta_subst = ca.substitute(self._beta, self._x, self._dm._phi)
             return beta_subst
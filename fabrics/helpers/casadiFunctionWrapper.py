@@ -1,3 +1,6 @@
+from copy import copy
+from typing import List, Optional
+
 import casadi as ca
 from fabrics.helpers.variables import Variables
 import numpy as np
@@ -12,6 +15,99 @@ class InputMissmatchError(Exception):
     pass
 
 
+class ReleasedExpressionsError(Exception):
+    pass
+
+
+class PackedInputs(object):
+    """
+    Base class of the typed input structs generated by packed_input_class.
+
+    All inputs are stored in one contiguous buffer. Every input is an
+    attribute holding a preallocated view into that buffer, assigning to the
+    attribute copies the value into the buffer.
+    """
+    __slots__ = ('_buffer', '_views')
+    _layout: dict = {}
+    _size: int = 0
+
+    def __init__(self, **kwargs):
+        self._buffer = np.zeros(self._size)
+        self._views = tuple(
+            self._buffer[offset:offset + int(np.prod(shape))].reshape(shape, order='F')
+            for offset, shape in self._layout.values()
+        )
+        self.update(**kwargs)
+
+    @property
+    def buffer(self) -> np.ndarray:
+        return self._buffer
+
+    def names(self) -> List[str]:
+        return list(self._layout.keys())
+
+    def update(self, **kwargs) -> None:
+        for name, value in kwargs.items():
+            setattr(self, name, value)
+
+
+def _input_property(index: int, name: str) -> property:
+    def get_view(self):
+        return self._views[index]
+
+    def set_view(self, value):
+        self._views[index][...] = np.reshape(value, self._views[index].shape, order='F')
+
+    return property(get_view, set_view, doc=f"View on the input {name}.")
+
+
+def packed_input_class(function: ca.Function) -> type:
+    """
+    Generates the typed input struct for the inputs of function.
+
+    Column vectors are exposed as one-dimensional arrays, matrices in
+    column-major order as CasADi stores them.
+    """
+    layout = {}
+    attributes = {'__slots__': ()}
+    offset = 0
+    for index, name in enumerate(function.name_in()):
+        if not name.isidentifier():
+            raise InputMissmatchError(f"Input {name} is not a valid attribute name.")
+        rows, columns = function.size_in(index)
+        shape = (rows,) if columns == 1 else (rows, columns)
+        layout[name] = (offset, shape)
+        attributes[name] = _input_property(index, name)
+        offset += rows * columns
+    attributes['_layout'] = layout
+    attributes['_size'] = offset
+    return type(f"{function.name()}_inputs", (PackedInputs,), attributes)
+
+
+def packed_function(function: ca.Function) -> ca.Function:
+    """
+    Wraps function into a function of one vector holding all inputs.
+
+    The vector is the buffer of the struct from packed_input_class.
+    """
+    size = sum(function.numel_in(index) for index in range(function.n_in()))
+    symbol_type = ca.SX if function.is_a('SXFunction') else ca.MX
+    buffer = symbol_type.sym("inputs", size)
+    arguments = []
+    offset = 0
+    for index in range(function.n_in()):
+        rows, columns = function.size_in(index)
+        arguments.append(ca.reshape(buffer[offset:offset + rows * columns], rows, columns))
+        offset += rows * columns
+    return ca.Function(
+        f"{function.name()}_packed",
+        [buffer],
+        function.call(arguments),
+        ["inputs"],
+        function.name_out(),
+    )
+
+
 class CasadiFunctionWrapper(object):
 
     def __init__(self, name: str, variables: Variables, expressions: dict):
@@ -44,11 +140,15 @@ class CasadiFunctionWrapper(object):
 
     def evaluate(self, **kwargs):
         self.process_inputs(**kwargs)
+        output_dict = self.call_function(self._function, self._argument_dictionary)
+        return self.convert_outputs(output_dict)
+
+    def call_function(self, function: ca.Function, arguments: dict) -> dict:
         try:
-            output_dict = self._function(**self._argument_dictionary)
+            return function(**arguments)
         except NotImplementedError:
-            expected_inputs = list(self._inputs.keys())
-            received_inputs = list(self._argument_dictionary.keys())
+            expected_inputs = function.name_in()
+            received_inputs = list(arguments.keys())
             unique_expected = [x for x in expected_inputs if x not in received_inputs]
             unique_received = [x for x in received_inputs if x not in expected_inputs]
 
@@ -56,6 +156,8 @@ class CasadiFunctionWrapper(object):
             msg += f"Found unexpected inputs: {unique_received}\n"
             msg += f"Found missing inputs: {unique_expected}\n"
             raise InputMissmatchError(msg)
+
+    def convert_outputs(self, output_dict: dict) -> dict:
         for key, value in output_dict.items():
             if value.size() == (1, 1):
                 output_dict[key] = np.array(value)[:, 0]
@@ -65,48 +167,82 @@ class CasadiFunctionWrapper(object):
                 output_dict[key] = np.array(value)
         return output_dict
 
+    def input_struct(self) -> PackedInputs:
+        """
+        Returns a new typed input struct, filled with the known parameters.
+        """
+        if not hasattr(self, '_input_class'):
+            self._input_class = packed_input_class(self._function)
+            self._packed_function = packed_function(self._function)
+        inputs = self._input_class()
+        inputs.update(**{
+            key: value for key, value in self._argument_dictionary.items()
+            if key in inputs._layout
+        })
+        return inputs
+
+    def evaluate_packed(self, inputs: PackedInputs) -> dict:
+        outputs = self._packed_function.call([inputs.buffer])
+        return self.convert_outputs(dict(zip(self._packed_function.name_out(), outputs)))
+
     def process_inputs(self, **kwargs):
+        self._argument_dictionary.update(self.translate_inputs(**kwargs))
+
+    def translate_inputs(self, **kwargs) -> dict:
+        """
+        Translates convenience arguments into the names of the inputs.
+
+        Lists of obstacles, e.g. x_obsts, are split into x_obst_0, x_obst_1,
+        ... and body radii passed as radius_body_links are mapped to the
+        corresponding radius_body inputs.
+        """
+        arguments = {}
         for key in kwargs: # pragma no cover
             if key == 'x_obst' or key == 'x_obsts':
                 obstacle_dictionary = {}
                 for j, x_obst_j in enumerate(kwargs[key]):
                     obstacle_dictionary[f'x_obst_{j}'] = x_obst_j
-                self._argument_dictionary.update(obstacle_dictionary)
+                arguments.update(obstacle_dictionary)
             elif key == 'radius_obst' or key == 'radius_obsts':
                 radius_dictionary = {}
                 for j, radius_obst_j in enumerate(kwargs[key]):
                     radius_dictionary[f'radius_obst_{j}'] = radius_obst_j
-                self._argument_dictionary.update(radius_dictionary)
+                arguments.update(radius_dictionary)
             elif key == 'x_obst_dynamic' or key == 'x_obsts_dynamic':
                 obstacle_dyn_dictionary = {}
                 for j, x_obst_dyn_j in enumerate(kwargs[key]):
                     obstacle_dyn_dictionary[f'x_obst_dynamic_{j}'] = x_obst_dyn_j
-                self._argument_dictionary.update(obstacle_dyn_dictionary)
+                arguments.update(obstacle_dyn_dictionary)
             elif key == 'xdot_obst_dynamic' or key == 'xdot_obsts_dynamic':
                 xdot_dyn_dictionary = {}
                 for j, xdot_obst_dyn_j in enumerate(kwargs[key]):
                     xdot_dyn_dictionary[f'xdot_obst_dynamic_{j}'] = xdot_obst_dyn_j
-                self._argument_dictionary.update(xdot_dyn_dictionary)
+                arguments.update(xdot_dyn_dictionary)
             elif key == 'xddot_obst_dynamic' or key == 'xddot_obsts_dynamic':
                 xddot_dyn_dictionary = {}
                 for j, xddot_obst_dyn_j in enumerate(kwargs[key]):
                     xddot_dyn_dictionary[f'xddot_obst_dynamic_{j}'] = xddot_obst_dyn_j
-                self._argument_dictionary.update(xddot_dyn_dictionary)
+                arguments.update(xddot_dyn_dictionary)
             elif key == 'radius_obst_dynamic' or key == 'radius_obsts_dynamic':
                 radius_dyn_dictionary = {}
                 for j, radius_obst_dyn_j in enumerate(kwargs[key]):
                     radius_dyn_dictionary[f'radius_obst_dynamic_{j}'] = radius_obst_dyn_j
-                self._argument_dictionary.update(radius_dyn_dictionary)
+                arguments.update(radius_dyn_dictionary)
+            elif key == 't_obst_dynamic' or key == 't_obsts_dynamic':
+                t_dyn_dictionary = {}
+                for j, t_obst_dyn_j in enumerate(kwargs[key]):
+                    t_dyn_dictionary[f't_obst_dynamic_{j}'] = t_obst_dyn_j
+                arguments.update(t_dyn_dictionary)
             elif key == 'x_obst_cuboid' or key == 'x_obsts_cuboid':
                 x_obst_cuboid_dictionary = {}
                 for j, x_obst_cuboid_j in enumerate(kwargs[key]):
                     x_obst_cuboid_dictionary[f'x_obst_cuboid_{j}'] = x_obst_cuboid_j
-                self._argument_dictionary.update(x_obst_cuboid_dictionary)
+                arguments.update(x_obst_cuboid_dictionary)
             elif key == 'size_obst_cuboid' or key == 'size_obsts_cuboid':
                 size_obst_cuboid_dictionary = {}
                 for j, size_obst_cuboid_j in enumerate(kwargs[key]):
                     size_obst_cuboid_dictionary[f'size_obst_cuboid_{j}'] = size_obst_cuboid_j
-                self._argument_dictionary.update(size_obst_cuboid_dictionary)
+                arguments.update(size_obst_cuboid_dictionary)
             elif key.startswith('radius_body') and key.endswith('links'):
                 # Radius bodies can be passed using a dictionary where the keys are simple integers.
                 radius_body_dictionary = {}
@@ -117,9 +253,145 @@ class CasadiFunctionWrapper(object):
                     except IndexError as e:
                         logging.warning(f"No body link with index {link_nr} in the inputs. Body link {link_nr} is ignored.")
                     radius_body_dictionary[key] = radius_body_j
-                self._argument_dictionary.update(radius_body_dictionary)
+                arguments.update(radius_body_dictionary)
             else:
-                self._argument_dictionary[key] = kwargs[key]
+                arguments[key] = kwargs[key]
+
+        return arguments
+
+    def fold(self, simplify: bool = False, **values) -> None:
+        """
+        Replaces inputs by constant values and regenerates the function.
+
+        The folded inputs are no longer inputs of the function, CasADi
+        simplifies all operations on the constants when the expressions are
+        rebuilt. With simplify, common subexpressions are eliminated
+        afterwards.
+        """
+        if getattr(self, '_released', False):
+            raise ReleasedExpressionsError(f"Cannot fold {self._name}, its expressions were released")
+        unknown_inputs = [key for key in values if key not in self._inputs]
+        if unknown_inputs:
+            raise InputMissmatchError(f"Cannot fold unknown inputs {unknown_inputs}")
+        symbols = [self._inputs.pop(key) for key in values]
+        constants = [
+            ca.DM(np.reshape(np.asarray(value, dtype=float), symbol.shape, order='F'))
+            for symbol, value in zip(symbols, values.values())
+        ]
+        expressions = ca.substitute(list(self._expressions.values()), symbols, constants)
+        if simplify:
+            expressions = ca.cse(expressions)
+        self._expressions = dict(zip(self._expressions.keys(), expressions))
+        for key in values:
+            self._argument_dictionary.pop(key, None)
+        if hasattr(self, '_input_class'):
+            del self._input_class
+            del self._packed_function
+        self.create_function()
+
+    def release_expressions(self) -> None:
+        """
+        Drops the symbolic inputs and expressions, keeping their names.
+
+        Only the compiled function remains, so that the expression graphs
+        can be freed. Folding is not possible afterwards.
+        """
+        self._inputs = dict.fromkeys(self._inputs)
+        self._expressions = dict.fromkeys(self._expressions)
+        self._released = True
+
+    def specialize(self, simplify: bool = True, **values) -> "CasadiFunctionWrapper":
+        """
+        Returns a copy with the given inputs folded, see fold.
+        """
+        specialized = copy(self)
+        specialized._inputs = dict(self._inputs)
+        specialized._argument_dictionary = dict(self._argument_dictionary)
+        specialized.fold(simplify=simplify, **values)
+        return specialized
+
+
+class StagedCasadiFunctionWrapper(CasadiFunctionWrapper):
+    """
+    Function wrapper with a cached parameter-only stage.
+
+    All subexpressions that depend only on the static inputs are extracted
+    into a parameter stage. Its outputs are cached and only recomputed when
+    one of the static inputs changes. The state stage receives the cached
+    terms and computes everything that depends on the remaining inputs.
+    The full function is kept for serialization and export.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        variables: Variables,
+        expressions: dict,
+        static_inputs: List[str],
+    ):
+        self._static_inputs = static_inputs
+        self._static_key = None
+        self._parametric_terms = None
+        super().__init__(name, variables, expressions)
+
+    def create_function(self):
+        super().create_function()
+        unknown_inputs = [x for x in self._static_inputs if x not in self._inputs]
+        if unknown_inputs:
+            raise InputMissmatchError(f"Static inputs {unknown_inputs} are not inputs of {self._name}")
+        static_symbols = [self._inputs[input_key] for input_key in self._static_inputs]
+        expression_keys = list(self._expressions.keys())
+        expressions, intermediates, parametric_terms = ca.extract_parametric(
+            list(self._expressions.values()),
+            ca.vertcat(*[ca.vec(symbol) for symbol in static_symbols]),
+        )
+        logging.info(f"Extracted {len(intermediates)} parameter-only terms from {self._name}")
+        self._parameter_function = ca.Function(
+            f"{self._name}_parameter_stage",
+            static_symbols,
+            [ca.vertcat(*parametric_terms)],
+            self._static_inputs,
+            ["parametric_terms"],
+        )
+        self._state_function = ca.Function(
+            f"{self._name}_state_stage",
+            list(self._inputs.values()) + [ca.vertcat(*intermediates)],
+            expressions,
+            list(self._inputs.keys()) + ["parametric_terms"],
+            expression_keys,
+        )
+
+    def fold(self, simplify: bool = False, **values) -> None:
+        self._static_inputs = [key for key in self._static_inputs if key not in values]
+        self._static_key = None
+        super().fold(simplify=simplify, **values)
+
+    def static_key(self) -> tuple:
+        try:
+            return tuple(
+                np.asarray(self._argument_dictionary[input_key], dtype=float).tobytes()
+                for input_key in self._static_inputs
+            )
+        except KeyError as key_error:
+            raise InputMissmatchError(f"Found missing static input: {key_error}")
+
+    def evaluate(self, **kwargs):
+        self.process_inputs(**kwargs)
+        static_key = self.static_key()
+        if static_key != self._static_key:
+            static_arguments = {
+                input_key: self._argument_dictionary[input_key]
+                for input_key in self._static_inputs
+            }
+            self._parametric_terms = self._parameter_function(
+                **static_arguments
+            )["parametric_terms"]
+            self._static_key = static_key
+        output_dict = self.call_function(
+            self._state_function,
+            dict(self._argument_dictionary, parametric_terms=self._parametric_terms),
+        )
+        return self.convert_outputs(output_dict)
 
 
 class CasadiFunctionWrapper_deserialized(CasadiFunctionWrapper):
@@ -132,4 +404,17 @@ class CasadiFunctionWrapper_deserialized(CasadiFunctionWrapper):
             self._argument_dictionary = cPickle.load(data)
             self._isload = True
 
+    @classmethod
+    def from_function(
+        cls, function: ca.Function, argument_dictionary: Optional[dict] = None
+    ) -> "CasadiFunctionWrapper_deserialized":
+        """
+        Wraps an already loaded function, e.g. from ca.Function.load.
+        """
+        wrapper = cls.__new__(cls)
+        wrapper._function = function
+        wrapper._argument_dictionary = dict(argument_dictionary or {})
+        wrapper._isload = True
+        return wrapper
+
 
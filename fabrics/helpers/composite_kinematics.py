@@ -0,0 +1,106 @@
+from typing import Dict, Tuple, Union
+
+import casadi as ca
+import numpy as np
+from forwardkinematics.fksCommon.fk import ForwardKinematics
+from forwardkinematics.urdfFks.urdfFk import LinkNotInURDFError
+
+
+def composite_link_name(robot_name: str, link_name: str) -> str:
+    """
+    Returns the name of a link of one robot in the composite kinematics.
+    """
+    return f"{robot_name}_{link_name}"
+
+
+def inverse_transformation(transformation: ca.SX) -> ca.SX:
+    """
+    Inverts a homogeneous transformation without a general matrix inverse.
+    """
+    rotation_transposed = ca.transpose(transformation[0:3, 0:3])
+    inverse = ca.SX.eye(4)
+    inverse[0:3, 0:3] = rotation_transposed
+    inverse[0:3, 3] = -ca.mtimes(rotation_transposed, transformation[0:3, 3])
+    return inverse
+
+
+class CompositeForwardKinematics(ForwardKinematics):
+    """
+    Forward kinematics of several robots with stacked joint positions.
+
+    The joint positions of the robots are stacked in the order in which
+    the robots are given, so that q[robot_indices(name)] are the joint
+    positions of robot name. Links are addressed as '<robot>_<link>', see
+    composite_link_name. Placing the robots in the cell is done through
+    the mount transformations of the individual forward kinematics.
+    If the parent link belongs to another robot than the child link, the
+    relative transformation between both links is returned.
+    """
+
+    def __init__(self, robots: Dict[str, ForwardKinematics]):
+        super().__init__()
+        self._robots = dict(robots)
+        self._indices = {}
+        offset = 0
+        for robot_name, forward_kinematics in self._robots.items():
+            self._indices[robot_name] = slice(offset, offset + forward_kinematics.n())
+            offset += forward_kinematics.n()
+        self._n = offset
+
+    def robot_names(self) -> list:
+        return list(self._robots.keys())
+
+    def robot_indices(self, robot_name: str) -> slice:
+        return self._indices[robot_name]
+
+    def split_link_name(self, link_name: str) -> Tuple[str, str]:
+        """
+        Returns the robot name and the link name of that robot.
+
+        If several robot names are prefixes of the link name, the longest
+        one is chosen.
+        """
+        matches = [
+            robot_name for robot_name in self._robots
+            if link_name.startswith(f"{robot_name}_")
+        ]
+        if not matches:
+            raise LinkNotInURDFError(
+                f"The link {link_name} does not start with one of the robot "
+                f"names {self.robot_names()}."
+            )
+        robot_name = max(matches, key=len)
+        return robot_name, link_name[len(robot_name) + 1:]
+
+    def casadi(
+        self,
+        q: ca.SX,
+        child_link: str,
+        parent_link: Union[str, None] = None,
+        link_transformation=np.eye(4),
+        position_only: bool = False,
+    ) -> ca.SX:
+        robot_name, link_name = self.split_link_name(child_link)
+        if parent_link is None:
+            parent_robot_name, parent_link_name = robot_name, None
+        else:
+            parent_robot_name, parent_link_name = self.split_link_name(parent_link)
+        q_robot = q[self._indices[robot_name]]
+        if parent_robot_name == robot_name:
+            return self._robots[robot_name].casadi(
+                q_robot,
+                link_name,
+                parent_link=parent_link_name,
+                link_transformation=link_transformation,
+                position_only=position_only,
+            )
+        fk_child = self._robots[robot_name].casadi(
+            q_robot, link_name, link_transformation=link_transformation
+        )
+        fk_parent = self._robots[parent_robot_name].casadi(
+            q[self._indices[parent_robot_name]], parent_link_name
+        )
+        fk = ca.mtimes(inverse_transformation(fk_parent), fk_child)
+        if position_only:
+            return fk[0:3, 3]
+        return fk
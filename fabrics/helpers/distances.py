@@ -1,5 +1,5 @@
 import casadi as ca
-from typing import List
+from typing import List, NamedTuple, Optional, Tuple
 
 def closest_point_to_line(
     point: ca.SX, line_start: ca.SX, line_end: ca.SX
@@ -73,22 +73,32 @@ def point_to_line(point: ca.SX, line_start: ca.SX, line_end: ca.SX) -> ca.SX:
 #
 #     return distance
 
-def line_to_line(
-    line_1_start: ca.SX,
-    line_1_end: ca.SX,
-    line_2_start: ca.SX,
-    line_2_end: ca.SX,
-) -> ca.SX:
+def segment_terms(line_start: ca.SX, line_end: ca.SX) -> Tuple[ca.SX, ca.SX, ca.SX]:
     """
-    Computes the distance between two lines according to
-    Real-Time Collision Detection by Christer Ericson, page 148
+    Returns the start, the direction and the squared length of a line.
+
+    The terms only depend on the line, they can be shared by all distance
+    computations involving it, see segment_to_segment.
+    """
+    direction = line_end - line_start
+    return line_start, direction, ca.dot(direction, direction)
+
+
+def segment_closest_parameters(
+    segment_1: Tuple[ca.SX, ca.SX, ca.SX],
+    segment_2: Tuple[ca.SX, ca.SX, ca.SX],
+) -> Tuple[ca.SX, ca.SX]:
+    """
+    Computes the parameters s and t of the closest points of two lines.
+
+    The closest points are start_1 + s * direction_1 and
+    start_2 + t * direction_2, see Real-Time Collision Detection by
+    Christer Ericson, page 148.
     """
     eps = 1e-5
-    d1 = line_1_end - line_1_start
-    d2 = line_2_end - line_2_start
+    line_1_start, d1, a = segment_1
+    line_2_start, d2, e = segment_2
     r = line_1_start - line_2_start
-    a = ca.dot(d1, d1)
-    e = ca.dot(d2, d2)
     f = ca.dot(d2, r)
     c = ca.dot(d1, r)
     b = ca.dot(d1, d2)
@@ -113,15 +123,37 @@ def line_to_line(
     s_1 = ca.if_else(t < 0.0, clamp(-c / a, 0.0, 1.0), s)
     s_2 = ca.if_else(t > f, clamp((b * f - c * e) / denom, 0.0, 1.0), s_1)
     t_1 = clamp(t, 0.0, 1.0)
-    c1 = line_1_start + d1 * s_2
-    c2 = line_2_start + d2 * t_1
-    distance = ca.if_else(
-        ca.logic_and(a <= eps, e <= eps),
-        ca.dot(line_1_start - line_2_start, line_1_start - line_2_start),
-        ca.dot(c1 - c2, c1 - c2),
+    both_points = ca.logic_and(a <= eps, e <= eps)
+    return ca.if_else(both_points, 0.0, s_2), ca.if_else(both_points, 0.0, t_1)
+
+
+def segment_to_segment(
+    segment_1: Tuple[ca.SX, ca.SX, ca.SX],
+    segment_2: Tuple[ca.SX, ca.SX, ca.SX],
+) -> ca.SX:
+    """
+    Computes the distance between two lines given by their segment_terms.
+    """
+    s, t = segment_closest_parameters(segment_1, segment_2)
+    c1 = segment_1[0] + segment_1[1] * s
+    c2 = segment_2[0] + segment_2[1] * t
+    return ca.sqrt(ca.dot(c1 - c2, c1 - c2))
+
+
+def line_to_line(
+    line_1_start: ca.SX,
+    line_1_end: ca.SX,
+    line_2_start: ca.SX,
+    line_2_end: ca.SX,
+) -> ca.SX:
+    """
+    Computes the distance between two lines according to
+    Real-Time Collision Detection by Christer Ericson, page 148
+    """
+    return segment_to_segment(
+        segment_terms(line_1_start, line_1_end),
+        segment_terms(line_2_start, line_2_end),
     )
-    return ca.sqrt(distance)
-    # ca.vertcat(ca.sqrt(distance), t_1, s_2, c1, c2)
 
 
 def point_to_plane(point: ca.SX, plane: ca.SX) -> ca.SX:
@@ -198,12 +230,15 @@ def cuboid_to_point_half_distances(
     cuboid_center: ca.SX,
     cuboid_size: ca.SX,
     point: ca.SX,
+    cuboid_half_size: Optional[ca.SX] = None,
 ) -> List[ca.SX]:
+    if cuboid_half_size is None:
+        cuboid_half_size = cuboid_size / 2
     half_distances = []
     for i in range(point.size()[0]):
         half_distances.append(
             ca.fmax(
-                ca.fabs(point[i] - cuboid_center[i]) - cuboid_size[i] / 2,
+                ca.fabs(point[i] - cuboid_center[i]) - cuboid_half_size[i],
                 0.0,
             )
         )
@@ -242,13 +277,59 @@ def rectangle_to_line(
     return min_distance
 
 
+CUBOID_EDGES = [
+    [[-1, -1, -1], [1, -1, -1]],
+    [[-1, -1, -1], [-1, 1, -1]],
+    [[-1, -1, -1], [-1, -1, 1]],
+    [[-1, -1, 1], [1, -1, 1]],
+    [[-1, -1, 1], [-1, 1, 1]],
+    [[-1, 1, -1], [1, 1, -1]],
+    [[-1, 1, -1], [-1, 1, 1]],
+    [[1, -1, -1], [1, 1, -1]],
+    [[1, -1, -1], [1, -1, 1]],
+    [[1, 1, 1], [-1, 1, 1]],
+    [[1, 1, 1], [1, -1, 1]],
+    [[1, 1, 1], [1, 1, -1]],
+]
+
+
+class CuboidTerms(NamedTuple):
+    """
+    Terms of a cuboid that are shared by all its distance computations.
+
+    The edges are given as segment_terms, see segment_to_segment.
+    """
+    center: ca.SX
+    half_size: ca.SX
+    edges: List[Tuple[ca.SX, ca.SX, ca.SX]]
+
+
+def cuboid_terms(cuboid_center: ca.SX, cuboid_size: ca.SX) -> CuboidTerms:
+    """
+    Computes the half size and the edges of a cuboid once.
+
+    Passing the result to the cuboid distance functions avoids that these
+    terms are rebuilt for every collision link.
+    """
+    cuboid_half_size = cuboid_size / 2
+    edges = []
+    for edge in CUBOID_EDGES:
+        edge_start = cuboid_center + cuboid_half_size * edge[0]
+        edge_end = cuboid_center + cuboid_half_size * edge[1]
+        edges.append(segment_terms(edge_start, edge_end))
+    return CuboidTerms(cuboid_center, cuboid_half_size, edges)
+
+
 def cuboid_to_point(
     cuboid_center: ca.SX,
     cuboid_size: ca.SX,
     point: ca.SX,
+    terms: Optional[CuboidTerms] = None,
 ) -> ca.SX:
+    if terms is None:
+        terms = CuboidTerms(cuboid_center, cuboid_size / 2, [])
     half_distances = cuboid_to_point_half_distances(
-        cuboid_center, cuboid_size, point
+        terms.center, cuboid_size, point, cuboid_half_size=terms.half_size
     )
     return ca.sqrt(
         half_distances[0] ** 2 + half_distances[1] ** 2 + half_distances[2] ** 2
@@ -258,22 +339,8 @@ def cuboid_to_point(
 def edge_of_cuboid(
     cuboid_center: ca.SX, cuboid_size: ca.SX, index: int
 ) -> ca.SX:
-    edges = [
-        [[-1, -1, -1], [1, -1, -1]],
-        [[-1, -1, -1], [-1, 1, -1]],
-        [[-1, -1, -1], [-1, -1, 1]],
-        [[-1, -1, 1], [1, -1, 1]],
-        [[-1, -1, 1], [-1, 1, 1]],
-        [[-1, 1, -1], [1, 1, -1]],
-        [[-1, 1, -1], [-1, 1, 1]],
-        [[1, -1, -1], [1, 1, -1]],
-        [[1, -1, -1], [1, -1, 1]],
-        [[1, 1, 1], [-1, 1, 1]],
-        [[1, 1, 1], [1, -1, 1]],
-        [[1, 1, 1], [1, 1, -1]],
-    ]
-    edge_start: ca.SX = cuboid_center + cuboid_size / 2 * edges[index][0]
-    edge_end: ca.SX = cuboid_center + cuboid_size / 2 * edges[index][1]
+    edge_start: ca.SX = cuboid_center + cuboid_size / 2 * CUBOID_EDGES[index][0]
+    edge_end: ca.SX = cuboid_center + cuboid_size / 2 * CUBOID_EDGES[index][1]
     return ca.vertcat(edge_start, edge_end)
 
 
@@ -282,19 +349,17 @@ def cuboid_to_line(
     cuboid_size: ca.SX,
     line_start: ca.SX,
     line_end: ca.SX,
+    terms: Optional[CuboidTerms] = None,
 ) -> ca.SX:
+    if terms is None:
+        terms = cuboid_terms(cuboid_center, cuboid_size)
     distance = ca.fmin(
-        cuboid_to_point(cuboid_center, cuboid_size, line_start),
-        cuboid_to_point(cuboid_center, cuboid_size, line_end),
+        cuboid_to_point(cuboid_center, cuboid_size, line_start, terms=terms),
+        cuboid_to_point(cuboid_center, cuboid_size, line_end, terms=terms),
     )
-    for i in range(12):
-        edge = edge_of_cuboid(cuboid_center, cuboid_size, i)
-        edge_start = edge[0:3]
-        edge_end = edge[3:6]
-        distance_line_edge = line_to_line(
-            edge_start, edge_end, line_start, line_end
-        )
-        distance = ca.fmin(distance, distance_line_edge)
+    line = segment_terms(line_start, line_end)
+    for edge in terms.edges:
+        distance = ca.fmin(distance, segment_to_segment(edge, line))
     return distance
 
 
@@ -303,10 +368,11 @@ def cuboid_to_sphere(
     sphere_center: ca.SX,
     cuboid_size: ca.SX,
     sphere_size: ca.SX,
+    terms: Optional[CuboidTerms] = None,
 ) -> ca.SX:
     return ca.fmax(
         0.0,
-        cuboid_to_point(cuboid_center, cuboid_size, sphere_center)
+        cuboid_to_point(cuboid_center, cuboid_size, sphere_center, terms=terms)
         - sphere_size,
     )
 
@@ -315,11 +381,126 @@ def cuboid_to_capsule(
     capsule_centers: List[ca.SX],
     cuboid_size: ca.SX,
     capsule_radius: ca.SX,
+    terms: Optional[CuboidTerms] = None,
 ) -> ca.SX:
     return ca.fmax(
         cuboid_to_line(
-            cuboid_center, cuboid_size, capsule_centers[0], capsule_centers[1]
+            cuboid_center,
+            cuboid_size,
+            capsule_centers[0],
+            capsule_centers[1],
+            terms=terms,
         )
         - capsule_radius,
         0.0,
     )
+
+
+class WitnessDistance(NamedTuple):
+    """
+    Distance expressed through its witness points.
+
+    The distance is written in terms of the symbols witness, i.e. the
+    parameters of the closest points on the two bodies. Holding them fixed
+    while differentiating gives the exact gradient of the distance, because
+    the distance is minimal with respect to the witness parameters. The
+    symbols are replaced by witness_value afterwards, see DifferentialMap.
+    """
+    distance: ca.SX
+    witness: ca.SX
+    witness_value: ca.SX
+
+
+def capsule_to_sphere_witness(
+    capsule_centers: List[ca.SX],
+    sphere_center: ca.SX,
+    capsule_radius: ca.SX,
+    sphere_radius: ca.SX,
+) -> WitnessDistance:
+    line_start, line_direction, line_squared_length = segment_terms(
+        capsule_centers[0], capsule_centers[1]
+    )
+    t_value = clamp(
+        ca.dot(sphere_center - line_start, line_direction) / line_squared_length,
+        0.0,
+        1.0,
+    )
+    t = ca.SX.sym("t_witness", 1)
+    distance = ca.fmax(
+        point_to_point(line_start + t * line_direction, sphere_center)
+        - capsule_radius
+        - sphere_radius,
+        0.0,
+    )
+    return WitnessDistance(distance, t, t_value)
+
+
+def capsule_to_capsule_witness(
+    capsule_1_centers: List[ca.SX],
+    capsule_2_centers: List[ca.SX],
+    capsule_1_radius: ca.SX,
+    capsule_2_radius: ca.SX,
+) -> WitnessDistance:
+    segment_1 = segment_terms(capsule_1_centers[0], capsule_1_centers[1])
+    segment_2 = segment_terms(capsule_2_centers[0], capsule_2_centers[1])
+    s_value, t_value = segment_closest_parameters(segment_1, segment_2)
+    witness = ca.SX.sym("st_witness", 2)
+    distance = (
+        point_to_point(
+            segment_1[0] + witness[0] * segment_1[1],
+            segment_2[0] + witness[1] * segment_2[1],
+        )
+        - capsule_1_radius
+        - capsule_2_radius
+    )
+    return WitnessDistance(distance, witness, ca.vertcat(s_value, t_value))
+
+
+def cuboid_to_capsule_witness(
+    cuboid_center: ca.SX,
+    capsule_centers: List[ca.SX],
+    cuboid_size: ca.SX,
+    capsule_radius: ca.SX,
+    terms: Optional[CuboidTerms] = None,
+) -> WitnessDistance:
+    """
+    Computes the distance of a cuboid and a capsule through witness points.
+
+    The witness points are the closest point on the cuboid and the
+    parameter of the closest point on the capsule's line, taken from the
+    closest of the candidates used in cuboid_to_line.
+    """
+    if terms is None:
+        terms = cuboid_terms(cuboid_center, cuboid_size)
+    line = segment_terms(capsule_centers[0], capsule_centers[1])
+    candidates = []
+    for t_candidate, point in [(0.0, capsule_centers[0]), (1.0, capsule_centers[1])]:
+        cuboid_point = ca.fmin(
+            ca.fmax(point, terms.center - terms.half_size),
+            terms.center + terms.half_size,
+        )
+        candidates.append((cuboid_point, ca.SX(t_candidate), point))
+    for edge in terms.edges:
+        s_edge, t_edge = segment_closest_parameters(edge, line)
+        candidates.append(
+            (edge[0] + s_edge * edge[1], t_edge, line[0] + t_edge * line[1])
+        )
+    cuboid_point_value, t_value, line_point = candidates[0]
+    closest_distance = point_to_point(cuboid_point_value, line_point)
+    for cuboid_point, t_candidate, line_point in candidates[1:]:
+        distance_candidate = point_to_point(cuboid_point, line_point)
+        closer = distance_candidate < closest_distance
+        cuboid_point_value = ca.if_else(closer, cuboid_point, cuboid_point_value)
+        t_value = ca.if_else(closer, t_candidate, t_value)
+        closest_distance = ca.fmin(distance_candidate, closest_distance)
+    cuboid_point = ca.SX.sym("cuboid_point_witness", cuboid_center.size()[0])
+    t = ca.SX.sym("t_witness", 1)
+    distance = ca.fmax(
+        point_to_point(line[0] + t * line[1], cuboid_point) - capsule_radius,
+        0.0,
+    )
+    return WitnessDistance(
+        distance,
+        ca.vertcat(cuboid_point, t),
+        ca.vertcat(cuboid_point_value, t_value),
+    )
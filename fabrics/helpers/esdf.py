@@ -0,0 +1,134 @@
+from typing import Dict, Optional
+
+import casadi as ca
+import numpy as np
+
+from fabrics.helpers.variables import Variables
+
+
+def grid_hessian(distance_map: np.ndarray, resolution: float) -> np.ndarray:
+    """
+    Computes the Hessian of a distance field stored on a regular grid.
+
+    The Hessian is obtained by central finite differences of the gradient
+    field, i.e. by applying numpy.gradient twice. The returned array has the
+    shape (n, n, *distance_map.shape) where n is the dimension of the grid,
+    so that the Hessian at a grid index idx is hessian[(..., *idx)].
+    Note that the axes are the grid axes, callers have to apply the same
+    axis permutation and sign changes they use for the gradient.
+    """
+    gradients = np.gradient(distance_map, resolution)
+    if distance_map.ndim == 1:
+        gradients = [gradients]
+    dimension = distance_map.ndim
+    hessian = np.zeros((dimension, dimension) + distance_map.shape)
+    for i, gradient_i in enumerate(gradients):
+        second_derivatives = np.gradient(gradient_i, resolution)
+        if dimension == 1:
+            second_derivatives = [second_derivatives]
+        for j, second_derivative in enumerate(second_derivatives):
+            hessian[i, j] = second_derivative
+    return 0.5 * (hessian + np.swapaxes(hessian, 0, 1))
+
+
+class ESDFJdotEstimator(object):
+    """
+    Estimates the runtime Jdot parameter of an ESDFGeometryLeaf.
+
+    The Jacobian of the leaf map is J = d phi / d x * J_fk, with the
+    Euclidean gradient d phi / d x supplied at runtime. Its time derivative is
+    Jdot = (d/dt d phi / d x) * J_fk + d phi / d x * Jdot_fk.
+    The forward kinematics part is compiled once, the derivative of the ESDF
+    gradient is either computed from the ESDF Hessian,
+    d/dt d phi / d x = H * J_fk * qdot, or estimated from the history of the
+    gradient using a first order low-pass filter.
+    The estimate is returned with the same sign convention as
+    DifferentialMap, see Jdot_sign.
+    """
+
+    def __init__(
+        self,
+        collision_link: str,
+        collision_fk: ca.SX,
+        variables: Variables,
+        filter_constant: float = 0.5,
+        Jdot_sign: int = -1,
+    ):
+        self._collision_link = collision_link
+        self._filter_constant = filter_constant
+        self._Jdot_sign = Jdot_sign
+        q = variables.position_variable()
+        qdot = variables.velocity_variable()
+        J_fk = ca.jacobian(collision_fk, q)
+        Jdot_fk = ca.jacobian(ca.mtimes(J_fk, qdot), q)
+        self._fk_function = ca.Function(
+            f"esdf_fk_{collision_link}", [q, qdot], [J_fk, Jdot_fk]
+        )
+        self.reset()
+
+    def reset(self) -> None:
+        self._previous_gradient = None
+        self._gradient_dot = None
+
+    def gradient_dot_from_history(
+        self, gradient: np.ndarray, time_step: float
+    ) -> np.ndarray:
+        gradient = np.array(gradient, dtype=float)
+        if self._previous_gradient is None:
+            gradient_dot = np.zeros_like(gradient)
+        else:
+            raw_gradient_dot = (gradient - self._previous_gradient) / time_step
+            gradient_dot = (
+                self._filter_constant * self._gradient_dot
+                + (1 - self._filter_constant) * raw_gradient_dot
+            )
+        self._previous_gradient = gradient
+        self._gradient_dot = gradient_dot
+        return gradient_dot
+
+    def Jdot(
+        self,
+        q: np.ndarray,
+        qdot: np.ndarray,
+        gradient: np.ndarray,
+        hessian: Optional[np.ndarray] = None,
+        time_step: Optional[float] = None,
+    ) -> np.ndarray:
+        """
+        Computes the value for esdf_Jdot_<collision_link>.
+
+        Either the ESDF Hessian at the current position or the time step
+        since the last call must be given.
+        """
+        J_fk, Jdot_fk = self._fk_function(q, qdot)
+        J_fk = np.array(J_fk)
+        Jdot_fk = np.array(Jdot_fk)
+        gradient = np.array(gradient, dtype=float)
+        if hessian is not None:
+            gradient_dot = np.dot(hessian, np.dot(J_fk, qdot))
+        elif time_step is not None:
+            gradient_dot = self.gradient_dot_from_history(gradient, time_step)
+        else:
+            raise ValueError("Either the hessian or the time step must be passed.")
+        Jdot = np.dot(gradient_dot, J_fk) + np.dot(gradient, Jdot_fk)
+        return self._Jdot_sign * Jdot
+
+    def inputs(
+        self,
+        q: np.ndarray,
+        qdot: np.ndarray,
+        phi: float,
+        gradient: np.ndarray,
+        hessian: Optional[np.ndarray] = None,
+        time_step: Optional[float] = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Returns all ESDF arguments for compute_action of this collision link.
+        """
+        return {
+            f"esdf_phi_{self._collision_link}": phi,
+            f"esdf_J_{self._collision_link}": gradient,
+            f"esdf_Jdot_{self._collision_link}": self.Jdot(
+                q, qdot, gradient, hessian=hessian, time_step=time_step
+            ),
+        }
@@ -1,4 +1,5 @@
 import casadi as ca
+import hashlib
 import re
 import numpy as np
 
@@ -21,6 +22,38 @@ def checkCompatability(a, b):
 def is_sparse(expression: ca.SX) -> bool:
     return not ca.symvar(expression)
 
+def sparsify(expression: ca.SX) -> ca.SX:
+    """
+    Removes structural nonzeros that are exactly zero.
+
+    Dense zeros, e.g. from ca.SX(np.zeros(n)), are otherwise propagated as
+    nonzeros through all sums and products.
+    """
+    return ca.sparsify(expression)
+
+def sparsity_statistics(expression: ca.SX) -> dict:
+    numel = expression.numel()
+    return {
+        'nnz': expression.nnz(),
+        'numel': numel,
+        'density': expression.nnz() / numel if numel > 0 else 0.0,
+    }
+
+def structural_hash(expressions: list, inputs: list) -> str:
+    """
+    Hashes the structure of expressions independently of the symbol names.
+
+    The inputs are replaced by symbols with generic names before the
+    expressions are serialized, so that expressions that only differ in the
+    names of the inputs have the same hash. Constants are hashed exactly.
+    """
+    generic_inputs = [
+        ca.SX.sym(f"i{i}", symbol.sparsity()) for i, symbol in enumerate(inputs)
+    ]
+    generic_expressions = ca.substitute(expressions, inputs, generic_inputs)
+    function = ca.Function("structure", generic_inputs, generic_expressions)
+    return hashlib.sha256(function.serialize().encode()).hexdigest()
+
 def symbolic(name: str):
     return ca.SX.sym(name, 1)
 
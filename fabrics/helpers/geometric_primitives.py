@@ -1,7 +1,7 @@
 from typing import List, Tuple, Dict, Union
 import casadi as ca
 import numpy as np
-from fabrics.helpers.distances import capsule_to_plane, capsule_to_sphere, cuboid_to_capsule, sphere_to_plane, sphere_to_sphere, cuboid_to_sphere
+from fabrics.helpers.distances import capsule_to_capsule, capsule_to_plane, capsule_to_sphere, cuboid_to_capsule, sphere_to_plane, sphere_to_sphere, cuboid_to_sphere, cuboid_terms, CuboidTerms, WitnessDistance, capsule_to_sphere_witness, capsule_to_capsule_witness, cuboid_to_capsule_witness
 
 class DistanceNotImplementedError(Exception):
     def __init__(self, primitive_1: "GeometricPrimitive", primitive_2: "GeometricPrimitive"):
@@ -68,6 +68,15 @@ class GeometricPrimitive:
     def distance(self, primitive: "GeometricPrimitive") -> ca.SX:
         pass
 
+    def witness_distance(self, primitive: "GeometricPrimitive") -> WitnessDistance:
+        """
+        Returns the distance expressed through its witness points.
+
+        Primitives without a witness formulation return the distance with
+        an empty witness.
+        """
+        return WitnessDistance(self.distance(primitive), ca.SX(0, 1), ca.SX(0, 1))
+
 class Capsule(GeometricPrimitive):
     _radius: float
     _length: float
@@ -129,12 +138,20 @@ class Capsule(GeometricPrimitive):
                     self.sym_radius,
                     primitive.sym_radius
             )
+        elif isinstance(primitive, Capsule):
+            return capsule_to_capsule(
+                    self.centers,
+                    primitive.centers,
+                    self.sym_radius,
+                    primitive.sym_radius
+            )
         elif isinstance(primitive, Cuboid):
             return cuboid_to_capsule(
                     primitive.position,
                     self.centers,
                     primitive.sym_sizes,
-                    self.sym_radius
+                    self.sym_radius,
+                    terms=primitive.terms,
             )
         elif isinstance(primitive, Plane):
             return capsule_to_plane(
@@ -144,6 +161,38 @@ class Capsule(GeometricPrimitive):
             )
         raise DistanceNotImplementedError(self, primitive)
 
+    def witness_distance(self, primitive: GeometricPrimitive) -> WitnessDistance:
+        """
+        Returns the distance through its witness points, see
+        FabricPlannerConfig.witness_point_jacobians.
+
+        Capsule-capsule distances are used by the inter-robot leaves of the
+        MultiRobotFabricPlanner.
+        """
+        if isinstance(primitive, Sphere):
+            return capsule_to_sphere_witness(
+                    self.centers,
+                    primitive.position,
+                    self.sym_radius,
+                    primitive.sym_radius
+            )
+        elif isinstance(primitive, Capsule):
+            return capsule_to_capsule_witness(
+                    self.centers,
+                    primitive.centers,
+                    self.sym_radius,
+                    primitive.sym_radius
+            )
+        elif isinstance(primitive, Cuboid):
+            return cuboid_to_capsule_witness(
+                    primitive.position,
+                    self.centers,
+                    primitive.sym_sizes,
+                    self.sym_radius,
+                    terms=primitive.terms,
+            )
+        return super().witness_distance(primitive)
+
 
 class Sphere(GeometricPrimitive):
     _radius: float
@@ -181,6 +230,8 @@ class Sphere(GeometricPrimitive):
                     self.sym_radius,
                     primitive.sym_radius
             )
+        elif isinstance(primitive, Capsule):
+            return primitive.distance(self)
         elif isinstance(primitive, Plane):
             return sphere_to_plane(
                     self.position,
@@ -193,6 +244,7 @@ class Sphere(GeometricPrimitive):
                     self.position,
                     primitive.sym_sizes,
                     self.sym_radius,
+                    terms=primitive.terms,
             )
         raise DistanceNotImplementedError(self, primitive)
 
@@ -205,6 +257,24 @@ class Cuboid(GeometricPrimitive):
         self._sizes = sizes
         self._sym_sizes = ca.SX.sym(f"sizes_{self.name}", 3)
         self._parameters[f'sizes_{self.name}'] = self._sizes
+        self._terms = None
+
+    def set_position(self, position: ca.SX, free: bool = False) -> None:
+        super().set_position(position, free=free)
+        self._terms = None
+
+    def set_origin(self, origin: ca.SX, free: bool = False) -> None:
+        super().set_origin(origin, free=free)
+        self._terms = None
+
+    @property
+    def terms(self) -> CuboidTerms:
+        """
+        Half size and edges of the cuboid, shared by all collision links.
+        """
+        if self._terms is None:
+            self._terms = cuboid_terms(self.position, self.sym_sizes)
+        return self._terms
 
     @property
     def size(self) -> List[float]:
@@ -0,0 +1,36 @@
+import ctypes
+import ctypes.util
+import gc
+import os
+from typing import Optional
+
+
+def resident_memory() -> Optional[int]:
+    """
+    Returns the resident set size of the process in bytes.
+
+    The value is read from /proc and is None where that is not available.
+    """
+    try:
+        with open("/proc/self/statm", "r") as statm:
+            resident_pages = int(statm.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def release_memory() -> None:
+    """
+    Collects garbage and returns freed heap memory to the operating system.
+
+    Without malloc_trim, glibc keeps freed memory of many small objects,
+    such as casadi expression nodes, in the heap of the process.
+    """
+    gc.collect()
+    libc_name = ctypes.util.find_library("c")
+    if libc_name is None:
+        return
+    try:
+        ctypes.CDLL(libc_name).malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
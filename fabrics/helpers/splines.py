@@ -0,0 +1,88 @@
+from typing import List, Tuple
+
+import casadi as ca
+import numpy as np
+
+
+def clamped_knot_vector(degree: int, number_control_points: int) -> List[float]:
+    """
+    Returns the clamped, uniform knot vector on [0, 1].
+
+    This is the knot vector geomdl generates with
+    utilities.generate_knot_vector.
+    """
+    number_inner_knots = number_control_points - degree - 1
+    inner_knots = [
+        (i + 1) / (number_inner_knots + 1) for i in range(number_inner_knots)
+    ]
+    return [0.0] * (degree + 1) + inner_knots + [1.0] * (degree + 1)
+
+
+def bspline_basis(u: ca.SX, knots: List[float], degree: int) -> List[ca.SX]:
+    """
+    Computes the B-spline basis functions symbolically.
+
+    The basis functions are built with the Cox-de Boor recursion. The knots
+    are constant, so that vanishing denominators are resolved when building
+    the expression. The last non-empty knot span is closed so that the curve
+    is also defined at u = 1.
+    """
+    last_span = max(i for i in range(len(knots) - 1) if knots[i] < knots[i + 1])
+    basis = []
+    for i in range(len(knots) - 1):
+        if knots[i] == knots[i + 1]:
+            basis.append(ca.SX(0))
+        elif i == last_span:
+            basis.append(ca.if_else(ca.logic_and(u >= knots[i], u <= knots[i + 1]), 1, 0))
+        else:
+            basis.append(ca.if_else(ca.logic_and(u >= knots[i], u < knots[i + 1]), 1, 0))
+    for p in range(1, degree + 1):
+        next_basis = []
+        for i in range(len(knots) - p - 1):
+            term = ca.SX(0)
+            if knots[i + p] != knots[i]:
+                term += (u - knots[i]) / (knots[i + p] - knots[i]) * basis[i]
+            if knots[i + p + 1] != knots[i + 1]:
+                term += (
+                    (knots[i + p + 1] - u)
+                    / (knots[i + p + 1] - knots[i + 1])
+                    * basis[i + 1]
+                )
+            next_basis.append(term)
+        basis = next_basis
+    return basis
+
+
+def bspline(control_points: ca.SX, u: ca.SX, degree: int) -> ca.SX:
+    """
+    Evaluates a clamped, uniform B-spline curve at u in [0, 1].
+
+    The control points are the rows of control_points.
+    """
+    number_control_points = control_points.size()[0]
+    knots = clamped_knot_vector(degree, number_control_points)
+    basis = bspline_basis(u, knots, degree)
+    curve = ca.SX(np.zeros(control_points.size()[1]))
+    for i in range(number_control_points):
+        curve += basis[i] * ca.transpose(control_points[i, :])
+    return curve
+
+
+def spline_reference(
+    control_points: ca.SX, duration: ca.SX, t: ca.SX, degree: int
+) -> Tuple[ca.SX, ca.SX, ca.SX]:
+    """
+    Computes position, velocity and acceleration along a spline trajectory.
+
+    The time is mapped to the curve parameter with the same cosine profile
+    as mpscenes' SplineTrajectory, u = 0.5 * (1 - cos(pi * t / duration)),
+    so that the trajectory starts and ends at rest. After the duration, the
+    reference stays at the last control point. Velocity and acceleration
+    are the exact time derivatives of the position.
+    """
+    t_clamped = ca.fmax(0, ca.fmin(t, duration))
+    u = 0.5 * (1 - ca.cos(np.pi * t_clamped / duration))
+    x_ref = bspline(control_points, u, degree)
+    xdot_ref = ca.jacobian(x_ref, t)
+    xddot_ref = ca.jacobian(xdot_ref, t)
+    return x_ref, xdot_ref, xddot_ref
@@ -0,0 +1,104 @@
+from typing import Callable, Dict, List, Tuple
+
+import casadi as ca
+
+from fabrics.helpers.functions import parse_symbolic_input
+
+
+class ExpressionTemplate(object):
+    """
+    Symbolic expressions of a leaf, derived once from a configuration string.
+
+    The expressions are stored as a casadi function of the leaf position, the
+    leaf velocity and the parameters of the string. Leaves that share the
+    string instantiate the template by calling the function with their own
+    variables, so that the string is neither evaluated nor differentiated
+    again.
+    """
+
+    def __init__(self, function: ca.Function, parameter_names: List[str]):
+        self._function = function
+        self._parameter_names = parameter_names
+
+    def function(self) -> ca.Function:
+        return self._function
+
+    def parameter_names(self) -> List[str]:
+        return self._parameter_names
+
+    def instantiate(
+        self, x: ca.SX, xdot: ca.SX, name: str = ""
+    ) -> Tuple[Dict[str, ca.SX], List[ca.SX]]:
+        """
+        Returns the new parameters and the expressions for x and xdot.
+
+        As for parse_symbolic_input, the parameter names are suffixed with
+        the name of the leaf.
+        """
+        suffix = f"_{name}" if len(name) > 0 else ""
+        new_parameters = {
+            f"{parameter_name}{suffix}": ca.SX.sym(f"{parameter_name}{suffix}", 1)
+            for parameter_name in self._parameter_names
+        }
+        expressions = self._function(x, xdot, *new_parameters.values())
+        if isinstance(expressions, ca.SX):
+            expressions = [expressions]
+        return new_parameters, list(expressions)
+
+
+_templates: Dict[Tuple[str, str, int], ExpressionTemplate] = {}
+
+
+def _create_template(
+    expression: str, dim: int, outputs: Callable
+) -> ExpressionTemplate:
+    x = ca.SX.sym("x", dim)
+    xdot = ca.SX.sym("xdot", dim)
+    parameters, symbolic_expression = parse_symbolic_input(expression, x, xdot)
+    parameter_names = sorted(parameters.keys())
+    function = ca.Function(
+        "template",
+        [x, xdot] + [parameters[name] for name in parameter_names],
+        outputs(ca.SX(symbolic_expression), x, xdot),
+    )
+    return ExpressionTemplate(function, parameter_names)
+
+
+def _geometry_outputs(h: ca.SX, x: ca.SX, xdot: ca.SX) -> List[ca.SX]:
+    return [h]
+
+
+def _finsler_outputs(l: ca.SX, x: ca.SX, xdot: ca.SX) -> List[ca.SX]:
+    dL_dxdot = ca.gradient(l, xdot)
+    dL_dx = ca.gradient(l, x)
+    M = ca.jacobian(dL_dxdot, xdot)
+    f = ca.mtimes(ca.transpose(ca.jacobian(dL_dx, xdot)), xdot) - dL_dx
+    H = ca.dot(dL_dxdot, xdot) - l
+    return [l, M, f, H]
+
+
+def geometry_template(expression: str, dim: int) -> ExpressionTemplate:
+    """
+    Returns the template for the geometry h(x, xdot).
+    """
+    key = ("geometry", expression, dim)
+    if key not in _templates:
+        _templates[key] = _create_template(expression, dim, _geometry_outputs)
+    return _templates[key]
+
+
+def finsler_template(expression: str, dim: int) -> ExpressionTemplate:
+    """
+    Returns the template for the Finsler structure.
+
+    The outputs are the Lagrangian l and the metric M, the force f and the
+    Hamiltonian H of its Euler-Lagrange equations.
+    """
+    key = ("finsler", expression, dim)
+    if key not in _templates:
+        _templates[key] = _create_template(expression, dim, _finsler_outputs)
+    return _templates[key]
+
+
+def clear_templates() -> None:
+    _templates.clear()
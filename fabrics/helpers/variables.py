@@ -43,6 +43,10 @@ class Variables(object):
             raise ParameterNotFoundError(f"Parameter {name} not in parameters")
         self._parameters_values[name] = value
 
+    def remove_parameter(self, name: str) -> None:
+        self._parameters.pop(name, None)
+        self._parameters_values.pop(name, None)
+
     def add_parameters(self, parameter_dict: dict) -> None:
         self._parameters.update(parameter_dict)
 
@@ -74,7 +78,7 @@ class Variables(object):
             assert isinstance(self._state_variables[key], ca.SX)
         for key in self._parameters:
             assert isinstance(key, str)
-            assert isinstance(self._parameters[key], ca.SX)
+            assert isinstance(self._parameters[key], (ca.SX, ca.MX))
 
     def asDict(self):
         joinedDict = {}
@@ -1,10 +1,49 @@
-import sys
+import hashlib
+import json
 from dataclasses import dataclass
 from typing import List
 from mpscenes.goals.goal_composition import GoalComposition
 
 from fabrics.components.robot_representation import RobotRepresentation
 from fabrics.components.environment import Environment
+from fabrics.helpers.geometric_primitives import Capsule, Cuboid, Sphere
+
+COLLISION_LINK_TYPES = {
+    'sphere': Sphere,
+    'capsule': Capsule,
+    'cuboid': Cuboid,
+}
+
+
+class ProblemConfigurationError(Exception):
+    pass
+
+
+def canonical_configuration(config):
+    """
+    Converts a configuration into a canonical form of builtin types.
+
+    Dictionary keys become strings, tuples and arrays become lists, so that
+    yaml and python configurations of the same problem are equal.
+    """
+    if isinstance(config, dict):
+        return {str(key): canonical_configuration(value) for key, value in config.items()}
+    if isinstance(config, (list, tuple)):
+        return [canonical_configuration(value) for value in config]
+    if hasattr(config, 'tolist'):
+        return canonical_configuration(config.tolist())
+    return config
+
+
+def configuration_hash(*configs) -> str:
+    """
+    Computes a stable sha256 hash of one or several configurations.
+    """
+    serialized_configs = json.dumps(
+        [canonical_configuration(config) for config in configs],
+        sort_keys=True,
+    )
+    return hashlib.sha256(serialized_configs.encode('utf-8')).hexdigest()
 
 @dataclass
 class FabricPlannerConfig:
@@ -48,6 +87,24 @@ class FabricPlannerConfig:
     damper_eta: str = (
         "0.5 * (ca.tanh(-0.9 * (1 - 1/2) * ca.dot(xdot, xdot) - 0.5) + 1)"
     )
+    closed_form_joint_limits: bool = True
+    """
+    Adds all joint limits as one closed-form leaf named 'joint_limits_leaf'.
+
+    If set to False, every limit is added as a separate LimitLeaf named
+    'limit_joint_<joint>_<0 or 1>_leaf', which can be looked up with
+    get_leaves, as before the closed-form leaf was introduced.
+    """
+    witness_point_jacobians: bool = False
+    """
+    Differentiates capsule distances with fixed closest (witness) points.
+
+    The Jacobian is exact, but Jdot neglects the motion of the closest
+    points along the bodies, it is the Jdot of the distance between two
+    points rigidly attached to the bodies. Applies to capsule-sphere and
+    capsule-cuboid obstacle leaves and to the capsule-capsule leaves
+    between robots of a MultiRobotFabricPlanner.
+    """
     """
     damper_beta: str = (
         "0.5 * (ca.tanh(-sym('alpha_b') * (ca.norm_2(x) - sym('radius_shift'))) + 1) * sym('beta_close') + sym('beta_distant') + ca.fmax(0, sym('a_ex') - sym('a_le'))"
@@ -77,6 +134,7 @@ class JointLimits:
 
 class ProblemConfiguration:
     def __init__(self, **config):
+        self.validate(config)
         self._config = config
         self._goal_composition=GoalComposition(name='goal', content_dict=self._config['goal']['goal_definition'])
         self._joint_limits=JointLimits(
@@ -90,11 +148,64 @@ class ProblemConfiguration:
             number_cuboids=self._config['environment']['number_cuboids'],
         )
 
+    @staticmethod
+    def validate(config: dict) -> None:
+        """
+        Checks the structure of a problem configuration before building.
+
+        Raises a ProblemConfigurationError listing all problems found.
+        """
+        errors = []
+        for section in ['goal', 'joint_limits', 'robot_representation', 'environment']:
+            if section not in config:
+                errors.append(f"Missing section '{section}'.")
+        if errors:
+            raise ProblemConfigurationError("\n".join(errors))
+        if 'goal_definition' not in config['goal']:
+            errors.append("Missing 'goal_definition' in section 'goal'.")
+        joint_limits = config['joint_limits']
+        if 'lower_limits' not in joint_limits or 'upper_limits' not in joint_limits:
+            errors.append("Joint limits need 'lower_limits' and 'upper_limits'.")
+        elif len(joint_limits['lower_limits']) != len(joint_limits['upper_limits']):
+            errors.append("Lower and upper joint limits differ in length.")
+        robot_representation = config['robot_representation']
+        collision_links = robot_representation.get('collision_links') or {}
+        for link, link_data in collision_links.items():
+            if not isinstance(link_data, dict) or len(link_data) != 1:
+                errors.append(f"Collision link {link} must have exactly one primitive.")
+                continue
+            collision_link_type = list(link_data.keys())[0]
+            if collision_link_type not in COLLISION_LINK_TYPES:
+                errors.append(
+                    f"Unknown primitive '{collision_link_type}' for collision link {link}, "
+                    f"possible primitives are {list(COLLISION_LINK_TYPES.keys())}."
+                )
+        self_collision_pairs = robot_representation.get('self_collision_pairs') or {}
+        for link, paired_links in self_collision_pairs.items():
+            for paired_link in [link] + list(paired_links):
+                if paired_link not in collision_links:
+                    errors.append(f"Self collision link {paired_link} is not a collision link.")
+        environment = config['environment']
+        for key in ['number_spheres', 'number_cuboids']:
+            numbers = environment.get(key)
+            if not isinstance(numbers, dict):
+                errors.append(f"Environment needs '{key}' with static and dynamic numbers.")
+            elif any(not isinstance(number, int) or number < 0 for number in numbers.values()):
+                errors.append(f"Environment '{key}' must be non-negative integers.")
+        number_planes = environment.get('number_planes')
+        if not isinstance(number_planes, int) or number_planes < 0:
+            errors.append("Environment 'number_planes' must be a non-negative integer.")
+        if errors:
+            raise ProblemConfigurationError("\n".join(errors))
+
+    def hash(self) -> str:
+        return configuration_hash(self._config)
+
     def construct_robot_representation(self):
         collision_links = {}
         for link, link_data in self._config['robot_representation']['collision_links'].items():
             collision_link_type = list(link_data.keys())[0]
-            collision_links[link] = getattr(sys.modules['fabrics.helpers.geometric_primitives'], collision_link_type.capitalize())(link, **link_data[collision_link_type])
+            collision_links[link] = COLLISION_LINK_TYPES[collision_link_type](link, **link_data[collision_link_type])
         self._robot_representation=RobotRepresentation(
             collision_links=collision_links,
             self_collision_pairs=self._config['robot_representation']['self_collision_pairs']
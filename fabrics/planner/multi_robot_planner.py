@@ -0,0 +1,107 @@
+from itertools import combinations
+from typing import Dict
+
+import numpy as np
+from forwardkinematics.fksCommon.fk import ForwardKinematics
+
+from fabrics.components.leaves.geometry import AvoidanceLeaf
+from fabrics.helpers.composite_kinematics import CompositeForwardKinematics
+from fabrics.helpers.functions import is_sparse
+from fabrics.helpers.geometric_primitives import Capsule, GeometricPrimitive
+from fabrics.planner.parameterized_planner import ParameterizedFabricPlanner
+
+
+class MultiRobotFabricPlanner(ParameterizedFabricPlanner):
+    """
+    Fabric planner for several robots that share one scene.
+
+    The configuration spaces of the robots are stacked, so that the action
+    of the whole cell is computed in one function call. Links are named
+    '<robot>_<link>', e.g. in the collision links and the sub goals of the
+    problem configuration, and the joint limits are given for the stacked
+    joints. Besides the collisions with the obstacles, the collisions
+    between the collision links of different robots are avoided with the
+    self collision geometry and Finsler structure.
+    """
+
+    def __init__(self, robots: Dict[str, ForwardKinematics], **kwargs):
+        forward_kinematics = CompositeForwardKinematics(robots)
+        super().__init__(forward_kinematics.n(), forward_kinematics, **kwargs)
+
+    def robot_names(self) -> list:
+        return self._forward_kinematics.robot_names()
+
+    def robot_indices(self, robot_name: str) -> slice:
+        return self._forward_kinematics.robot_indices(robot_name)
+
+    def split(self, stacked: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Splits a stacked joint vector, e.g. the action, per robot.
+        """
+        return {
+            robot_name: stacked[self.robot_indices(robot_name)]
+            for robot_name in self.robot_names()
+        }
+
+    def stack(self, **robot_values) -> np.ndarray:
+        """
+        Stacks joint vectors given per robot name in the robot order.
+        """
+        return np.concatenate(
+            [np.asarray(robot_values[robot_name]) for robot_name in self.robot_names()]
+        )
+
+    def add_inter_robot_collision_geometry(
+        self,
+        collision_link_1: GeometricPrimitive,
+        collision_link_2: GeometricPrimitive,
+    ) -> None:
+        """
+        Adds a leaf for the distance between links of two robots.
+
+        The origins of both primitives must be set to their forward
+        kinematics, as done in set_collision_avoidance.
+        """
+        self.check_not_frozen()
+        if isinstance(collision_link_2, Capsule) and not isinstance(collision_link_1, Capsule):
+            collision_link_1, collision_link_2 = collision_link_2, collision_link_1
+        leaf_name = f"{collision_link_1.name}_{collision_link_2.name}_leaf"
+        if self.config.witness_point_jacobians:
+            distance, *witness = collision_link_1.witness_distance(collision_link_2)
+            leaf = AvoidanceLeaf(self._variables, leaf_name, distance, witness=witness)
+        else:
+            distance = collision_link_1.distance(collision_link_2)
+            leaf = AvoidanceLeaf(self._variables, leaf_name, distance)
+        leaf.set_geometry(self.config.self_collision_geometry)
+        leaf.set_finsler_structure(self.config.self_collision_finsler)
+        self.add_leaf(leaf)
+
+    def set_inter_robot_collision_avoidance(self) -> None:
+        """
+        Adds leaves for all pairs of collision links of different robots.
+
+        Pairs of links that are both fixed in the cell are skipped.
+        """
+        self.check_not_frozen()
+        collision_links = self._problem_configuration.robot_representation.collision_links
+        if not collision_links:
+            return
+        for link_name, collision_link in collision_links.items():
+            collision_link.set_origin(self.collision_link_origin(link_name))
+            self._variables.add_parameters(collision_link.sym_parameters)
+            self._variables.add_parameters_values(collision_link.parameters)
+        for link_name_1, link_name_2 in combinations(collision_links, 2):
+            robot_name_1, _ = self._forward_kinematics.split_link_name(link_name_1)
+            robot_name_2, _ = self._forward_kinematics.split_link_name(link_name_2)
+            if robot_name_1 == robot_name_2:
+                continue
+            collision_link_1 = collision_links[link_name_1]
+            collision_link_2 = collision_links[link_name_2]
+            if is_sparse(collision_link_1.origin) and is_sparse(collision_link_2.origin):
+                continue
+            self.add_inter_robot_collision_geometry(collision_link_1, collision_link_2)
+
+    def set_collision_avoidance(self) -> None:
+        self.check_not_frozen()
+        super().set_collision_avoidance()
+        self.set_inter_robot_collision_avoidance()
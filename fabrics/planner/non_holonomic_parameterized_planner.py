@@ -9,6 +9,7 @@ from fabrics.planner.parameterized_planner import ParameterizedFabricPlanner, Fa
 from fabrics.diffGeometry.energy import Lagrangian
 from fabrics.diffGeometry.geometry import Geometry
 from fabrics.diffGeometry.energized_geometry import WeightedGeometry
+from fabrics.diffGeometry.casadi_helpers import choleskySolve
 from fabrics.helpers.casadiFunctionWrapper import CasadiFunctionWrapper
 from fabrics.helpers.functions import parse_symbolic_input
 
@@ -31,18 +32,18 @@ class NonHolonomicParameterizedFabricPlanner(ParameterizedFabricPlanner):
         facing_direction: str = '-y',
         **kwargs
     ):
-        self.leaves = {}
         self._dof = dof
         self._config = NonHolonomicFabricPlannerConfig(**kwargs)
         self._forward_kinematics  = forward_kinematics
         self.initialize_joint_variables()
         self.set_base_geometry()
-        self._target_velocity = np.zeros(self._geometry.x().size()[0])
-        self._ref_sign = 1
+        self.initialize_components()
+        self._extra_terms_function = None
         self.set_non_holonomic_constraints(facing_direction=facing_direction)
 
 
     def set_non_holonomic_constraints(self, facing_direction: str = '-y'):
+        self.check_not_frozen()
         q = self._variables.position_variable()
         qdot = self._variables.velocity_variable()
         qudot = ca.SX.sym("qudot", self._dof - 1)
@@ -88,18 +89,97 @@ class NonHolonomicParameterizedFabricPlanner(ParameterizedFabricPlanner):
         base_lagrangian = Lagrangian(base_energy, var=self._variables)
         self._geometry = WeightedGeometry(g=base_geometry, le=base_lagrangian)
 
-    def extra_terms_function(self):
-        extra_terms_functions = CasadiFunctionWrapper("extra_terms", self._variables, {"J_nh": self._J_nh, "f_extra": self._f_extra})
-        return extra_terms_functions
+    def extra_terms_function(self) -> CasadiFunctionWrapper:
+        """
+        Returns the function for the non-holonomic Jacobian and the extra force.
 
-    def concretize(self, mode='acc', time_step=None):
-        if mode == 'vel':
-            if not time_step:
-                raise Exception("No time step passed in velocity mode.")
+        The function is created once per concretization. With
+        concretize(extra_terms=True), both terms are also outputs of the
+        planner's function, see evaluate.
+        """
+        self.check_not_frozen()
+        if self._extra_terms_function is None:
+            self._extra_terms_function = CasadiFunctionWrapper(
+                "extra_terms", self._variables, {"J_nh": self._J_nh, "f_extra": self._f_extra}
+            )
+        return self._extra_terms_function
+
+    def integrate(
+        self,
+        time_step,
+        integrator: str = 'euler',
+        integration_steps: int = 1,
+    ) -> tuple:
+        """
+        Integrates the planner's dynamics symbolically over one time step.
+
+        Returns the symbolic position and the velocity qudot after
+        time_step. The joint velocities of the integration steps are given
+        by J_nh qudot. If the planner depends on the time 't', the time is
+        advanced with every integration step.
+        """
+        self.check_not_frozen()
+        q = self._variables.position_variable()
+        qdot = self._variables.velocity_variable()
+        qudot = self._qudot
+        h = time_step / integration_steps
+        if integrator == 'euler' and integration_steps == 1:
+            return q + h * qdot, qudot + h * self._xddot
+        parameters = self._variables.parameters()
+        symbols = [q, qdot, qudot] + ([parameters["t"]] if "t" in parameters else [])
+        t = parameters.get("t", 0)
+
+        def dynamics(q_k, qudot_k, t_k):
+            qdot_k = ca.mtimes(ca.substitute(self._J_nh, symbols[0], q_k), qudot_k)
+            values = [q_k, qdot_k, qudot_k, t_k][0:len(symbols)]
+            return qdot_k, ca.substitute([self._xddot], symbols, values)[0]
+
+        for _ in range(integration_steps):
+            if integrator == 'euler':
+                k1_q, k1_qudot = dynamics(q, qudot, t)
+                q, qudot = q + h * k1_q, qudot + h * k1_qudot
+            elif integrator == 'rk4':
+                k1_q, k1_qudot = dynamics(q, qudot, t)
+                k2_q, k2_qudot = dynamics(q + h / 2 * k1_q, qudot + h / 2 * k1_qudot, t + h / 2)
+                k3_q, k3_qudot = dynamics(q + h / 2 * k2_q, qudot + h / 2 * k2_qudot, t + h / 2)
+                k4_q, k4_qudot = dynamics(q + h * k3_q, qudot + h * k3_qudot, t + h)
+                q = q + h / 6 * (k1_q + 2 * k2_q + 2 * k3_q + k4_q)
+                qudot = qudot + h / 6 * (k1_qudot + 2 * k2_qudot + 2 * k3_qudot + k4_qudot)
+            else:
+                raise Exception(f"Unknown integrator {integrator}.")
+            t = t + h
+        return q, qudot
+
+    def concretize(
+        self,
+        mode='acc',
+        time_step=None,
+        extra_terms: bool = False,
+        diagnostics: bool = False,
+        integrator: str = 'euler',
+        integration_steps: int = 1,
+        cse: bool = False,
+    ):
+        """
+        Composes the planner's action and compiles it.
+
+        The arguments are the same as for
+        ParameterizedFabricPlanner.concretize. In velocity mode, the action
+        is the integrated velocity qudot and the acceleration is returned
+        as additional output 'xddot'. With extra_terms, the non-holonomic
+        Jacobian and the extra force are returned as well.
+        """
+        self.check_not_frozen()
+        if mode == 'vel' and not time_step:
+            if "time_step" not in self._variables.parameters():
+                self._variables.add_parameter("time_step", ca.SX.sym("time_step", 1))
+            time_step = self._variables.parameters()["time_step"]
+        else:
+            self._variables.remove_parameter("time_step")
+        self._extra_terms_function = None
         eps = 1e-6
         MJ = ca.mtimes(self._forced_geometry._M, self._J_nh)
         MJtMJ = ca.mtimes(ca.transpose(MJ), MJ) + ca.SX(np.identity(self._dof - 1)) * eps
-        MJ_pinv = ca.mtimes(ca.inv(MJtMJ), ca.transpose(MJ))
         try:
             eta = self._damper.substitute_eta()
             a_ex = (
@@ -113,13 +193,15 @@ class NonHolonomicParameterizedFabricPlanner(ParameterizedFabricPlanner):
                 - ca.mtimes(self._forced_geometry.Minv(), self._target_velocity)
             )
             """
-            xddot = ca.mtimes(
-                MJ_pinv,
-                - self._forced_geometry.f()
-                - ca.mtimes(self._forced_geometry._M, self._f_extra)
-                - ca.mtimes(self._forced_geometry._M, a_ex * self._forced_geometry.xdot())
+            xddot = choleskySolve(
+                MJtMJ,
+                ca.mtimes(
+                    ca.transpose(MJ),
+                    - self._forced_geometry.f()
+                    - ca.mtimes(self._forced_geometry._M, self._f_extra)
+                    - ca.mtimes(self._forced_geometry._M, a_ex * self._forced_geometry.xdot())
+                ),
             ) - beta_subst * self._qudot
-            #xddot = ca.mtimes(MJ_pinv, -self._forced_geometry.f())
             #xddot = self._forced_geometry._xddot
         except AttributeError as e:
             logging.info("No forcing term, using pure geoemtry")
@@ -127,12 +209,25 @@ class NonHolonomicParameterizedFabricPlanner(ParameterizedFabricPlanner):
             logging.error(e)
             self._geometry.concretize()
             xddot = self._geometry._xddot - self._geometry._alpha * self._geometry._vars.velocity_variable()
+        xddot = self.substitute_parameters(xddot)
+        if cse:
+            xddot = ca.cse(xddot)
+        self._mode = mode
+        self._xddot = xddot
         if mode == 'acc':
-            self._funs = CasadiFunctionWrapper(
-                "funs", self.variables, {"action": xddot}
-            )
+            outputs = {"action": xddot}
         elif mode == 'vel':
-            action = self._qudot + time_step * xddot
-            self._funs = CasadiFunctionWrapper(
-                "funs", self.variables, {"action": action}
+            _, qudot_next = self.integrate(
+                time_step, integrator=integrator, integration_steps=integration_steps
             )
+            outputs = {"action": qudot_next, "xddot": xddot}
+        else:
+            raise Exception(f"Unknown mode {mode}.")
+        if extra_terms:
+            outputs.update({"J_nh": self._J_nh, "f_extra": self._f_extra})
+        self._funs = CasadiFunctionWrapper("funs", self.variables, outputs)
+        if diagnostics:
+            self.concretize_diagnostics()
+        else:
+            self._diagnostics = None
+            self._diagnostics_layout = None
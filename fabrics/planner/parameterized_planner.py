@@ -1,5 +1,6 @@
 import logging
 from copy import deepcopy
+from dataclasses import asdict
 from typing import Dict, List, Optional
 import os
 
@@ -16,14 +17,16 @@ from pyquaternion import Quaternion
 from fabrics import __version__
 from fabrics.components.energies.execution_energies import ExecutionLagrangian
 from fabrics.components.leaves.attractor import GenericAttractor
-from fabrics.components.leaves.dynamic_attractor import GenericDynamicAttractor
+from fabrics.components.leaves.dynamic_attractor import (
+    GenericDynamicAttractor, SplineAttractor)
 from fabrics.components.leaves.dynamic_geometry import (
     DynamicObstacleLeaf, GenericDynamicGeometryLeaf)
 from fabrics.components.leaves.geometry import (AvoidanceLeaf,
                                                 CapsuleCuboidLeaf,
                                                 CapsuleSphereLeaf,
                                                 ESDFGeometryLeaf,
-                                                GenericGeometryLeaf, LimitLeaf,
+                                                GenericGeometryLeaf,
+                                                JointLimitsLeaf, LimitLeaf,
                                                 ObstacleLeaf,
                                                 PlaneConstraintGeometryLeaf,
                                                 SelfCollisionLeaf,
@@ -32,17 +35,24 @@ from fabrics.components.leaves.leaf import Leaf
 from fabrics.diffGeometry.diffMap import (DifferentialMap,
                                           DynamicDifferentialMap)
 from fabrics.diffGeometry.energized_geometry import WeightedGeometry
-from fabrics.diffGeometry.energy import Lagrangian
+from fabrics.diffGeometry.energy import Lagrangian, euler_lagrange_cache
 from fabrics.diffGeometry.geometry import Geometry
 from fabrics.diffGeometry.speedControl import Damper
-from fabrics.helpers.casadiFunctionWrapper import CasadiFunctionWrapper
-from fabrics.helpers.constants import eps
+from fabrics.helpers.casadiFunctionWrapper import (
+    CasadiFunctionWrapper, PackedInputs, ReleasedExpressionsError,
+    StagedCasadiFunctionWrapper)
+from fabrics.helpers.distances import CuboidTerms, cuboid_terms
+from fabrics.helpers.esdf import ESDFJdotEstimator
 from fabrics.helpers.exceptions import ExpressionSparseError
-from fabrics.helpers.functions import is_sparse, parse_symbolic_input
+from fabrics.helpers.functions import (is_sparse, parse_symbolic_input,
+                                     sparsity_statistics)
 from fabrics.helpers.geometric_primitives import Sphere
+from fabrics.helpers.memory import release_memory, resident_memory
 from fabrics.helpers.variables import Variables
 from fabrics.planner.configuration_classes import (FabricPlannerConfig,
-                                                   ProblemConfiguration)
+                                                   ProblemConfiguration,
+                                                   configuration_hash)
+from fabrics.runtime import nullify_action
 
 
 class InvalidRotationAnglesError(Exception):
@@ -51,6 +61,12 @@ class InvalidRotationAnglesError(Exception):
 class LeafNotFoundError(Exception):
     pass
 
+class FrozenPlannerError(ReleasedExpressionsError):
+    pass
+
+class DiagnosticsNotConcretizedError(Exception):
+    pass
+
 
 @deprecation.deprecated(deprecated_in="0.8.8", removed_in="0.9",
                         current_version=__version__,
@@ -83,15 +99,45 @@ class ParameterizedFabricPlanner(object):
         self._forward_kinematics = forward_kinematics
         self.initialize_joint_variables()
         self.set_base_geometry()
-        self._target_velocity = np.zeros(self._geometry.x().size()[0])
-        self._ref_sign = 1
-        self.leaves = {}
+        self.initialize_components()
 
     """ INITIALIZING """
 
+    def initialize_components(self):
+        """
+        Initializes the containers filled when components are added.
+
+        Called by the constructors of all planners after the base geometry
+        is set.
+        """
+        self.leaves = {}
+        self._target_velocity = ca.SX(self._geometry.x().size()[0], 1)
+        self._ref_sign = 1
+        self._cuboid_terms = {}
+        self._parameter_substitutions = {}
+        self._esdf_estimators = {}
+        self._frozen = False
+
     def load_fabrics_configuration(self, fabrics_configuration: dict):
         self._config = FabricPlannerConfig(**fabrics_configuration)
 
+    def configuration_hash(self, problem_configuration: dict, *identifiers) -> str:
+        """
+        Computes a stable hash of everything the compiled planner depends on.
+
+        This covers the fabrics version, the degrees of freedom, the fabric
+        configuration and the problem configuration. The forward kinematics
+        cannot be hashed, so a robot description, e.g. the urdf, should be
+        passed as additional identifier.
+        """
+        return configuration_hash(
+            __version__,
+            self._dof,
+            asdict(self._config),
+            problem_configuration,
+            *identifiers,
+        )
+
     def initialize_joint_variables(self):
         q = ca.SX.sym("q", self._dof)
         qdot = ca.SX.sym("qdot", self._dof)
@@ -102,12 +148,13 @@ class ParameterizedFabricPlanner(object):
         qdot = self._variables.velocity_variable()
         new_parameters, base_energy =  parse_symbolic_input(self._config.base_energy, q, qdot)
         self._variables.add_parameters(new_parameters)
-        base_geometry = Geometry(h=ca.SX(np.zeros(self._dof)), var=self.variables)
+        base_geometry = Geometry(h=ca.SX(self._dof, 1), var=self.variables)
         base_lagrangian = Lagrangian(base_energy, var=self._variables)
         self._geometry = WeightedGeometry(g=base_geometry, le=base_lagrangian)
 
     @property
     def variables(self) -> Variables:
+        self.check_not_frozen()
         return self._variables
 
     @property
@@ -119,6 +166,7 @@ class ParameterizedFabricPlanner(object):
     def add_geometry(
         self, forward_map: DifferentialMap, lagrangian: Lagrangian, geometry: Geometry
     ) -> None:
+        self.check_not_frozen()
         assert isinstance(forward_map, DifferentialMap)
         assert isinstance(lagrangian, Lagrangian)
         assert isinstance(geometry, Geometry)
@@ -133,6 +181,7 @@ class ParameterizedFabricPlanner(object):
         lagrangian: Lagrangian,
         geometry: Geometry,
     ) -> None:
+        self.check_not_frozen()
         assert isinstance(forward_map, DifferentialMap)
         assert isinstance(geometry_map, DifferentialMap)
         assert isinstance(dynamic_map, DynamicDifferentialMap)
@@ -147,6 +196,7 @@ class ParameterizedFabricPlanner(object):
     def add_weighted_geometry(
         self, forward_map: DifferentialMap, weighted_geometry: WeightedGeometry
     ) -> None:
+        self.check_not_frozen()
         assert isinstance(forward_map, DifferentialMap)
         assert isinstance(weighted_geometry, WeightedGeometry)
         pulled_geometry = weighted_geometry.pull(forward_map)
@@ -155,22 +205,97 @@ class ParameterizedFabricPlanner(object):
         self._variables = self._variables + pulled_geometry._vars
 
     def add_leaf(self, leaf: Leaf, prime_leaf: bool= False) -> None:
+        self.check_not_frozen()
         if isinstance(leaf, GenericAttractor):
             self.add_forcing_geometry(leaf.map(), leaf.lagrangian(), leaf.geometry(), prime_leaf)
         elif isinstance(leaf, GenericDynamicAttractor):
             self.add_dynamic_forcing_geometry(leaf.map(), leaf.dynamic_map(), leaf.lagrangian(), leaf.geometry(), leaf._xdot_ref, prime_leaf)
+            if isinstance(leaf, SplineAttractor):
+                self.add_parameter_substitutions(
+                    leaf.reference_substitutions(), leaf.spline_parameters()
+                )
+        elif isinstance(leaf, JointLimitsLeaf):
+            weighted_geometry = leaf.weighted_geometry()
+            self._geometry += weighted_geometry
+            self._variables = self._variables + weighted_geometry._vars
         elif isinstance(leaf, GenericGeometryLeaf):
             self.add_geometry(leaf.map(), leaf.lagrangian(), leaf.geometry())
         elif isinstance(leaf, GenericDynamicGeometryLeaf):
             self.add_dynamic_geometry(leaf.map(), leaf.dynamic_map(), leaf.geometry_map(), leaf.lagrangian(), leaf.geometry())
         self.leaves[leaf._leaf_name] = leaf
 
+    def add_parameter_substitutions(
+        self, substitutions: Dict[str, tuple], parameters: Dict[str, ca.SX]
+    ) -> None:
+        """
+        Replaces parameters by expressions of new parameters.
+
+        The substitutions map the name of a parameter to the tuple of its
+        symbol and the replacing expression. They are applied to the action
+        when the planner is concretized, the replaced parameters are then no
+        longer inputs to the planner, unless they appear in one of the
+        replacing expressions. The substitution is simultaneous, so that a
+        parameter can be replaced by an expression of itself.
+        """
+        self.check_not_frozen()
+        self._parameter_substitutions.update(substitutions)
+        self._variables.add_parameters(parameters)
+
+    def substitute_parameters(self, expression: ca.SX) -> ca.SX:
+        self.check_not_frozen()
+        if not self._parameter_substitutions:
+            return expression
+        symbols = [symbol for symbol, _ in self._parameter_substitutions.values()]
+        replacements = [replacement for _, replacement in self._parameter_substitutions.values()]
+        for name, (symbol, _) in self._parameter_substitutions.items():
+            if not any(ca.depends_on(replacement, symbol) for replacement in replacements):
+                self._variables.remove_parameter(name)
+        return ca.substitute([expression], symbols, replacements)[0]
+
+    def time_variable(self) -> ca.SX:
+        """
+        Returns the time parameter 't', shared by all time-dependent leaves.
+        """
+        self.check_not_frozen()
+        if "t" not in self._variables.parameters():
+            self._variables.add_parameter("t", ca.SX.sym("t", 1))
+        return self._variables.parameters()["t"]
+
+    def sparsity_statistics(self) -> dict:
+        """
+        Reports the structural sparsity of the root spec and the leaf maps.
+
+        For every leaf, the sparsity of the Jacobian of its map is given.
+        Leaves on early links only depend on the first joints, so that
+        their pulled metrics only contribute to a block of the root metric.
+        The joint limits leaf has no map, the Jacobian of its distances to
+        the limits is given instead.
+        """
+        self.check_not_frozen()
+        leaf_statistics = {}
+        for leaf_name, leaf in self.leaves.items():
+            leaf_map = leaf.map()
+            if isinstance(leaf, JointLimitsLeaf):
+                leaf_statistics[leaf_name] = sparsity_statistics(leaf.jacobian())
+            elif leaf_map is not None:
+                leaf_statistics[leaf_name] = sparsity_statistics(leaf_map._J)
+        return {
+            'root': self._geometry.sparsity_statistics(),
+            'leaves': leaf_statistics,
+        }
+
     def get_leaves(self, leaf_names:list) -> List[Leaf]:
+        self.check_not_frozen()
         leaves = []
         for leaf_name in leaf_names:
             if leaf_name not in self.leaves:
                 error_message = f"Leaf with name {leaf_name} not in leaves.\n"
-                error_message = f"Possible leaves are {list(self.leaves.keys())}."
+                error_message += f"Possible leaves are {list(self.leaves.keys())}."
+                if leaf_name.startswith("limit_joint_") and "joint_limits_leaf" in self.leaves:
+                    error_message += (
+                        "\nJoint limits are combined in 'joint_limits_leaf', set "
+                        "closed_form_joint_limits=False for one leaf per limit."
+                    )
                 raise LeafNotFoundError(error_message)
             leaves.append(self.leaves[leaf_name])
         return leaves
@@ -182,28 +307,40 @@ class ParameterizedFabricPlanner(object):
         geometry: Geometry,
         prime_forcing_leaf: bool,
     ) -> None:
+        self.check_not_frozen()
         assert isinstance(forward_map, DifferentialMap)
         assert isinstance(lagrangian, Lagrangian)
         assert isinstance(geometry, Geometry)
         if not hasattr(self, '_forced_geometry'):
             self._forced_geometry = deepcopy(self._geometry)
-        self._forcing_term = geometry.pull(forward_map)
+        self._forcing_geometry = (geometry, forward_map)
         self._attractor_geometry = WeightedGeometry(
             g=geometry, le=lagrangian
         ).pull(forward_map)
         self._attractor_geometry.concretize()
-        self._forced_geometry += WeightedGeometry(
-            g=geometry, le=lagrangian
-        ).pull(forward_map)
+        self._forced_geometry += self._attractor_geometry
 
         if prime_forcing_leaf:
             self._forced_variables = geometry._vars
             self._forced_forward_map = forward_map
         self._variables = self._variables + self._forced_geometry._vars
         self._geometry.concretize()
-        self._forcing_term.concretize()
         self._forced_geometry.concretize(ref_sign=self._ref_sign)
 
+    def forcing_term(self) -> Geometry:
+        """
+        Returns the geometry of the last forcing leaf in configuration space.
+
+        The forcing term is not part of the planner's action, which uses the
+        attractor geometry pulled through its metric. It is therefore only
+        pulled when it is requested.
+        """
+        self.check_not_frozen()
+        geometry, forward_map = self._forcing_geometry
+        forcing_term = geometry.pull(forward_map)
+        forcing_term.concretize()
+        return forcing_term
+
     def add_dynamic_forcing_geometry(
         self,
         forward_map: DifferentialMap,
@@ -213,6 +350,7 @@ class ParameterizedFabricPlanner(object):
         target_velocity: ca.SX,
         prime_forcing_leaf: bool,
     ) -> None:
+        self.check_not_frozen()
         assert isinstance(forward_map, DifferentialMap)
         assert isinstance(dynamic_map, DynamicDifferentialMap)
         assert isinstance(lagrangian, Lagrangian)
@@ -234,6 +372,7 @@ class ParameterizedFabricPlanner(object):
         self._forced_geometry.concretize(ref_sign=self._ref_sign)
 
     def set_execution_energy(self, execution_lagrangian: Lagrangian):
+        self.check_not_frozen()
         print(f"Setting exection energy")
         assert isinstance(execution_lagrangian, Lagrangian)
         composed_geometry = Geometry(s=self._geometry)
@@ -252,6 +391,7 @@ class ParameterizedFabricPlanner(object):
             logging.warning(f"Error setting the execution energy {exception}")
 
     def set_speed_control(self):
+        self.check_not_frozen()
         x_psi = self._forced_variables.position_variable()
         dm_psi = self._forced_forward_map
         exLag = self._execution_lagrangian
@@ -263,6 +403,7 @@ class ParameterizedFabricPlanner(object):
         self._variables.add_parameters(self._damper.symbolic_parameters())
 
     def get_forward_kinematics(self, link_name, position_only: bool = True) -> ca.SX:
+        self.check_not_frozen()
         if isinstance(link_name, ca.SX):
             return link_name
 
@@ -280,6 +421,7 @@ class ParameterizedFabricPlanner(object):
             tf_capsule_origin: ca.SX,
             capsule_length: float
             ) -> None:
+        self.check_not_frozen()
         tf_origin_center_0 = np.identity(4)
         tf_origin_center_0[2][3] = capsule_length / 2
         tf_center_0 = ca.mtimes(tf_capsule_origin, tf_origin_center_0)
@@ -292,11 +434,32 @@ class ParameterizedFabricPlanner(object):
             obstacle_name,
             tf_center_0[0:3,3],
             tf_center_1[0:3,3],
+            witness_point_jacobians=self.config.witness_point_jacobians,
         )
         capsule_sphere_leaf.set_geometry(self.config.collision_geometry)
         capsule_sphere_leaf.set_finsler_structure(self.config.collision_finsler)
         self.add_leaf(capsule_sphere_leaf)
 
+    def cuboid_terms(self, obstacle_name: str) -> CuboidTerms:
+        """
+        Returns the precomputed terms of a cuboid obstacle.
+
+        The terms are computed once per obstacle from its parameters
+        x_<obstacle_name> and size_<obstacle_name> and shared by the leaves
+        of all collision links.
+        """
+        self.check_not_frozen()
+        if obstacle_name not in self._cuboid_terms:
+            cuboid_parameters = {}
+            for parameter_name in [f"x_{obstacle_name}", f"size_{obstacle_name}"]:
+                if parameter_name in self._variables.parameters():
+                    cuboid_parameters[parameter_name] = self._variables.parameters()[parameter_name]
+                else:
+                    cuboid_parameters[parameter_name] = ca.SX.sym(parameter_name, 3)
+            self._variables.add_parameters(cuboid_parameters)
+            self._cuboid_terms[obstacle_name] = cuboid_terms(*cuboid_parameters.values())
+        return self._cuboid_terms[obstacle_name]
+
     def add_capsule_cuboid_geometry(
             self,
             obstacle_name: str,
@@ -304,6 +467,7 @@ class ParameterizedFabricPlanner(object):
             tf_capsule_origin: ca.SX,
             capsule_length: float
     ):
+        self.check_not_frozen()
         tf_origin_center_0 = np.identity(4)
         tf_origin_center_0[2][3] = capsule_length / 2
         tf_center_0 = ca.mtimes(tf_capsule_origin, tf_origin_center_0)
@@ -316,6 +480,8 @@ class ParameterizedFabricPlanner(object):
             obstacle_name,
             tf_center_0[0:3,3],
             tf_center_1[0:3,3],
+            cuboid_terms=self.cuboid_terms(obstacle_name),
+            witness_point_jacobians=self.config.witness_point_jacobians,
         )
         capsule_cuboid_leaf.set_geometry(self.config.collision_geometry)
         capsule_cuboid_leaf.set_finsler_structure(self.config.collision_finsler)
@@ -363,6 +529,7 @@ class ParameterizedFabricPlanner(object):
             forward_kinematics
         )
         """
+        self.check_not_frozen()
         geometry = ObstacleLeaf(
             self._variables,
             forward_kinematics,
@@ -381,6 +548,7 @@ class ParameterizedFabricPlanner(object):
             reference_parameters: dict,
             dynamic_obstacle_dimension: int = 3,
             ) -> None:
+        self.check_not_frozen()
         geometry = DynamicObstacleLeaf(
             self._variables,
             forward_kinematics[0:dynamic_obstacle_dimension],
@@ -392,6 +560,41 @@ class ParameterizedFabricPlanner(object):
         geometry.set_finsler_structure(self.config.collision_finsler)
         self.add_leaf(geometry)
 
+    def add_dynamic_obstacle_prediction(
+            self,
+            obstacle_name: str,
+            reference_parameters: dict,
+            prediction: str,
+            ) -> None:
+        """
+        Extrapolates a dynamic obstacle from its last observation in-graph.
+
+        The reference parameters then hold the last observed state of the
+        obstacle, observed at the time 't_<obstacle_name>'. The planner
+        predicts the state at the current time 't' with a constant velocity
+        ('constant_velocity') or constant acceleration
+        ('constant_acceleration') model.
+        """
+        self.check_not_frozen()
+        x_obst, xdot_obst, xddot_obst = reference_parameters.values()
+        x_name, xdot_name, xddot_name = reference_parameters.keys()
+        observation_time = ca.SX.sym(f"t_{obstacle_name}", 1)
+        dt = self.time_variable() - observation_time
+        if prediction == 'constant_velocity':
+            xddot_obst_predicted = ca.SX(np.zeros(xddot_obst.size()[0]))
+        elif prediction == 'constant_acceleration':
+            xddot_obst_predicted = xddot_obst
+        else:
+            raise Exception(f"Unknown obstacle prediction {prediction}.")
+        substitutions = {
+            x_name: (x_obst, x_obst + dt * xdot_obst + 0.5 * dt ** 2 * xddot_obst_predicted),
+            xdot_name: (xdot_obst, xdot_obst + dt * xddot_obst_predicted),
+            xddot_name: (xddot_obst, xddot_obst_predicted),
+        }
+        self.add_parameter_substitutions(
+            substitutions, {f"t_{obstacle_name}": observation_time}
+        )
+
     def add_plane_constraint(
             self,
             constraint_name: str,
@@ -399,6 +602,7 @@ class ParameterizedFabricPlanner(object):
             forward_kinematics: ca.SX,
             ) -> None:
 
+        self.check_not_frozen()
         geometry = PlaneConstraintGeometryLeaf(
             self._variables,
             constraint_name,
@@ -416,11 +620,13 @@ class ParameterizedFabricPlanner(object):
             forward_kinematics: ca.SX,
             ) -> None:
 
+        self.check_not_frozen()
         geometry = SphereCuboidLeaf(
             self._variables,
             forward_kinematics,
             obstacle_name,
             collision_link_name,
+            cuboid_terms=self.cuboid_terms(obstacle_name),
         )
         geometry.set_geometry(self.config.collision_geometry)
         geometry.set_finsler_structure(self.config.collision_finsler)
@@ -430,17 +636,65 @@ class ParameterizedFabricPlanner(object):
             self,
             collision_link_name: str,
             ) -> None:
+        self.check_not_frozen()
         fk = self.get_forward_kinematics(collision_link_name)
         geometry = ESDFGeometryLeaf(self._variables, collision_link_name, fk)
         geometry.set_geometry(self.config.collision_geometry)
         geometry.set_finsler_structure(self.config.collision_finsler)
         self.add_leaf(geometry)
 
+    def esdf_jdot_estimator(
+            self,
+            collision_link_name: str,
+            filter_constant: float = 0.5,
+            time_step: Optional[float] = None,
+            ) -> ESDFJdotEstimator:
+        """
+        Creates and registers an estimator for the esdf_Jdot parameter of an ESDF leaf.
+
+        Once registered, compute_action fills in esdf_Jdot_<link> from q,
+        qdot and esdf_J_<link> whenever it is not passed. The gradient
+        derivative is computed from the ESDF Hessian if it is passed as
+        esdf_H_<link>, otherwise it is estimated from the gradient history
+        with the argument time_step or, if the planner has no such input,
+        with the time step given here.
+        """
+        self.check_not_frozen()
+        leaf = self.get_leaves([f"esdf_leaf_{collision_link_name}"])[0]
+        estimator = ESDFJdotEstimator(
+            collision_link_name,
+            leaf._collision_fk,
+            self._variables,
+            filter_constant=filter_constant,
+        )
+        self._esdf_estimators[collision_link_name] = (estimator, time_step)
+        return estimator
+
+    def fill_esdf_inputs(self, arguments: dict) -> dict:
+        """
+        Adds the estimated esdf_Jdot_<link> for all registered estimators.
+        """
+        for collision_link_name, (estimator, time_step) in self._esdf_estimators.items():
+            hessian = arguments.pop(f"esdf_H_{collision_link_name}", None)
+            jdot_name = f"esdf_Jdot_{collision_link_name}"
+            gradient_name = f"esdf_J_{collision_link_name}"
+            if jdot_name in arguments or gradient_name not in arguments:
+                continue
+            arguments[jdot_name] = estimator.Jdot(
+                arguments['q'],
+                arguments['qdot'],
+                arguments[gradient_name],
+                hessian=hessian,
+                time_step=arguments.get('time_step', time_step),
+            )
+        return arguments
+
     def add_spherical_self_collision_geometry(
             self,
             collision_link_1: str,
             collision_link_2: str,
             ) -> None:
+        self.check_not_frozen()
         fk_1 = self.get_forward_kinematics(collision_link_1)
         fk_2 = self.get_forward_kinematics(collision_link_2)
         fk = fk_2 - fk_1
@@ -460,6 +714,7 @@ class ParameterizedFabricPlanner(object):
             joint_index: int,
             limits: list,
             ) -> None:
+        self.check_not_frozen()
         lower_limit_geometry = LimitLeaf(self._variables, joint_index, limits[0], 0)
         lower_limit_geometry.set_geometry(self.config.limit_geometry)
         lower_limit_geometry.set_finsler_structure(self.config.limit_finsler)
@@ -469,7 +724,31 @@ class ParameterizedFabricPlanner(object):
         self.add_leaf(lower_limit_geometry)
         self.add_leaf(upper_limit_geometry)
 
+    def add_joint_limits_geometry(self, limits: list) -> None:
+        """
+        Adds the geometry for all joint limits as one closed-form component.
+
+        Runtime symbols of the limit geometry and the limit Finsler structure
+        keep the per-limit names of add_limit_geometry. If the configuration
+        disables closed_form_joint_limits, the limits are added as separate
+        leaves with add_limit_geometry instead.
+        """
+        self.check_not_frozen()
+        if not self.config.closed_form_joint_limits:
+            for joint_index, joint_limits in enumerate(limits):
+                self.add_limit_geometry(joint_index, joint_limits)
+            return
+        joint_limits_geometry = JointLimitsLeaf(
+            self._variables,
+            [limit[0] for limit in limits],
+            [limit[1] for limit in limits],
+        )
+        joint_limits_geometry.set_geometry(self.config.limit_geometry)
+        joint_limits_geometry.set_finsler_structure(self.config.limit_finsler)
+        self.add_leaf(joint_limits_geometry)
+
     def load_problem_configuration(self, problem_configuration: ProblemConfiguration):
+        self.check_not_frozen()
         self._problem_configuration = ProblemConfiguration(**problem_configuration)
         for obstacle in self._problem_configuration.environment.obstacles:
             self._variables.add_parameters(obstacle.sym_parameters)
@@ -486,14 +765,14 @@ class ParameterizedFabricPlanner(object):
             self.set_speed_control()
 
     def set_joint_limits(self):
+        self.check_not_frozen()
         limits = np.zeros((self._dof, 2))
         limits[:, 0] = self._problem_configuration.joint_limits.lower_limits
         limits[:, 1] = self._problem_configuration.joint_limits.upper_limits
-        limits = limits.tolist()
-        for joint_index in range(len(limits)):
-            self.add_limit_geometry(joint_index, limits[joint_index])
+        self.add_joint_limits_geometry(limits.tolist())
 
     def set_self_collision_avoidance(self) -> None:
+        self.check_not_frozen()
         if not self._problem_configuration.robot_representation.self_collision_pairs:
             return
         for link_name,  paired_links_names in self._problem_configuration.robot_representation.self_collision_pairs.items():
@@ -507,16 +786,27 @@ class ParameterizedFabricPlanner(object):
                     )
 
 
+    def collision_link_origin(self, link_name: str) -> ca.SX:
+        """
+        Returns the transformation of a collision link.
+
+        Planar transformations are augmented to spatial ones.
+        """
+        self.check_not_frozen()
+        fk = self.get_forward_kinematics(link_name, position_only=False)
+        if fk.shape == (3, 3):
+            fk_augmented = ca.SX.eye(4)
+            fk_augmented[0:2, 0:2] = fk[0:2, 0:2]
+            fk_augmented[0:2, 3] = fk[0:2, 2]
+            fk = fk_augmented
+        return fk
+
     def set_collision_avoidance(self) -> None:
+        self.check_not_frozen()
         if not self._problem_configuration.robot_representation.collision_links:
             return
         for link_name, collision_link in self._problem_configuration.robot_representation.collision_links.items():
-            fk = self.get_forward_kinematics(link_name, position_only=False)
-            if fk.shape == (3, 3):
-                fk_augmented = ca.SX.eye(4)
-                fk_augmented[0:2, 0:2] = fk[0:2, 0:2]
-                fk_augmented[0:2, 3] = fk[0:2, 2]
-                fk = fk_augmented
+            fk = self.collision_link_origin(link_name)
             if fk.shape == (4, 4) and is_sparse(fk[0:3, 3]):
                 message = (
                         f"Expression {fk[0:3, 3]} for link {link_name} "
@@ -535,9 +825,13 @@ class ParameterizedFabricPlanner(object):
             self._variables.add_parameters(collision_link.sym_parameters)
             self._variables.add_parameters_values(collision_link.parameters)
             for obstacle in self._problem_configuration.environment.obstacles:
-                distance = collision_link.distance(obstacle)
                 leaf_name = f"{link_name}_{obstacle.name}_leaf"
-                leaf = AvoidanceLeaf(self._variables, leaf_name, distance)
+                if self.config.witness_point_jacobians:
+                    distance, *witness = collision_link.witness_distance(obstacle)
+                    leaf = AvoidanceLeaf(self._variables, leaf_name, distance, witness=witness)
+                else:
+                    distance = collision_link.distance(obstacle)
+                    leaf = AvoidanceLeaf(self._variables, leaf_name, distance)
                 leaf.set_geometry(self.config.collision_geometry)
                 leaf.set_finsler_structure(self.config.collision_finsler)
                 self.add_leaf(leaf)
@@ -578,7 +872,26 @@ class ParameterizedFabricPlanner(object):
         number_obstacles_cuboid: int = 0,
         number_plane_constraints: int = 0,
         dynamic_obstacle_dimension: int = 3,
+        spline_goals_in_graph: bool = False,
+        dynamic_obstacle_prediction: Optional[str] = None,
     ):
+        """
+        Adds all leaves for the given collision links, obstacles and goal.
+
+        If spline_goals_in_graph is set, spline sub goals are followed with
+        a SplineAttractor. Then, the references are computed inside the
+        planner from the inputs 'control_points_goal_<j>',
+        'duration_goal_<j>' and the time 't' instead of being passed as
+        'x_ref_goal_<j>_leaf', 'xdot_ref_goal_<j>_leaf' and
+        'xddot_ref_goal_<j>_leaf'.
+
+        If dynamic_obstacle_prediction is 'constant_velocity' or
+        'constant_acceleration', the dynamic obstacle inputs are the last
+        observed states, observed at 't_obst_dynamic_<i>', and the obstacles
+        are extrapolated to the current time 't' inside the planner, see
+        add_dynamic_obstacle_prediction.
+        """
+        self.check_not_frozen()
         collision_links = collision_links or []
         collision_links_esdf = collision_links_esdf or []
         self_collision_pairs = self_collision_pairs or {}
@@ -621,6 +934,14 @@ class ParameterizedFabricPlanner(object):
                 self.add_cuboid_obstacle_geometry(obstacle_name, collision_link, fk)
 
 
+        if dynamic_obstacle_prediction:
+            for i, reference_parameters in enumerate(reference_parameter_list):
+                self.add_dynamic_obstacle_prediction(
+                    f"obst_dynamic_{i}",
+                    reference_parameters,
+                    dynamic_obstacle_prediction,
+                )
+
         for collision_link in collision_links_esdf:
             self.add_esdf_geometry(collision_link)
 
@@ -632,11 +953,10 @@ class ParameterizedFabricPlanner(object):
                 )
 
         if limits:
-            for joint_index in range(len(limits)):
-                self.add_limit_geometry(joint_index, limits[joint_index])
+            self.add_joint_limits_geometry(limits)
 
         if goal:
-            self.set_goal_component(goal)
+            self.set_goal_component(goal, spline_goals_in_graph=spline_goals_in_graph)
             # Adds default execution energy
             execution_energy = ExecutionLagrangian(self._variables)
             self.set_execution_energy(execution_energy)
@@ -647,6 +967,7 @@ class ParameterizedFabricPlanner(object):
             self.set_execution_energy(execution_energy)
 
     def get_differential_map(self, sub_goal_index: int, sub_goal: SubGoal):
+        self.check_not_frozen()
         if sub_goal.type() == 'staticJointSpaceSubGoal':
             return self._variables.position_variable()[sub_goal.indices()]
         else:
@@ -684,13 +1005,25 @@ class ParameterizedFabricPlanner(object):
 
 
 
-    def set_goal_component(self, goal: GoalComposition):
+    def set_goal_component(self, goal: GoalComposition, spline_goals_in_graph: bool = False):
         # Adds default attractor
+        self.check_not_frozen()
         for j, sub_goal in enumerate(goal.sub_goals()):
             fk_sub_goal = self.get_differential_map(j, sub_goal)
             if is_sparse(fk_sub_goal):
                 raise ExpressionSparseError()
-            if sub_goal.type() in ["analyticSubGoal", "splineSubGoal"]:
+            if sub_goal.type() == "splineSubGoal" and spline_goals_in_graph:
+                trajectory = sub_goal.traj().trajectory_dictionary()
+                time_variable = self.time_variable()
+                attractor = SplineAttractor(
+                    self._variables,
+                    fk_sub_goal,
+                    f"goal_{j}",
+                    trajectory["degree"],
+                    len(trajectory["controlPoints"]),
+                    time_variable,
+                )
+            elif sub_goal.type() in ["analyticSubGoal", "splineSubGoal"]:
                 attractor = GenericDynamicAttractor(self._variables, fk_sub_goal, f"goal_{j}")
             else:
                 self._variables.add_parameter(f'x_goal_{j}', ca.SX.sym(f'x_goal_{j}', sub_goal.dimension()))
@@ -700,11 +1033,55 @@ class ParameterizedFabricPlanner(object):
             self.add_leaf(attractor, prime_leaf=sub_goal.is_primary_goal())
 
 
-    def concretize(self, mode='acc', time_step=None):
+    def concretize(
+        self,
+        mode='acc',
+        time_step=None,
+        static_parameters: Optional[List[str]] = None,
+        integrator: str = 'euler',
+        integration_steps: int = 1,
+        diagnostics: bool = False,
+        cse: bool = False,
+    ):
+        """
+        Composes the planner's action and compiles it.
+
+        Parameters
+        ----------
+        mode : str
+            'acc' returns the acceleration, 'vel' the integrated velocity.
+            In velocity mode, the acceleration is returned as additional
+            output 'xddot'.
+        time_step : float
+            Integration time step in velocity mode. If it is not given, the
+            time step becomes the runtime input 'time_step' so that one
+            compiled planner serves all control frequencies.
+        static_parameters : list of str
+            Names of inputs that change rarely, e.g. radii, sizes, weights or
+            plane constraints. If given, all terms that depend only on them
+            are evaluated in a separate stage whose result is cached until
+            one of these inputs changes.
+        integrator : str
+            'euler' or 'rk4', used in velocity mode.
+        integration_steps : int
+            Number of integration steps per time step in velocity mode.
+        diagnostics : bool
+            If set, the diagnostics of all leaves are compiled as well, see
+            concretize_diagnostics.
+        cse : bool
+            If set, common subexpressions of the acceleration are eliminated.
+            This reduces the instructions, in particular when the
+            Euler-Lagrange cache is enabled, but takes considerably longer
+            to build.
+        """
+        self.check_not_frozen()
         self._mode = mode
-        if mode == 'vel':
-            if not time_step:
-                raise Exception("No time step passed in velocity mode.")
+        if mode == 'vel' and not time_step:
+            if "time_step" not in self._variables.parameters():
+                self._variables.add_parameter("time_step", ca.SX.sym("time_step", 1))
+            time_step = self._variables.parameters()["time_step"]
+        else:
+            self._variables.remove_parameter("time_step")
         self._geometry.concretize()
         if self._config.forcing_type in ['speed-controlled']:
             eta = self._damper.substitute_eta()
@@ -744,16 +1121,232 @@ class ParameterizedFabricPlanner(object):
         else:
             raise Exception(f"Unknown forcing type {self._config.forcing_type}.")
 
+        xddot = self.substitute_parameters(xddot)
+        if cse:
+            xddot = ca.cse(xddot)
+        self._xddot = xddot
         if mode == 'acc':
-            self._funs = CasadiFunctionWrapper(
-                "funs", self.variables, {"action" : xddot}
-            )
+            outputs = {"action": xddot}
         elif mode == 'vel':
-            action = self._geometry.xdot() + time_step * xddot
+            _, qdot_next = self.integrate(
+                time_step, integrator=integrator, integration_steps=integration_steps
+            )
+            outputs = {"action": qdot_next, "xddot": xddot}
+        else:
+            raise Exception(f"Unknown mode {mode}.")
+        if static_parameters:
+            self._funs = StagedCasadiFunctionWrapper(
+                "funs", self.variables, outputs, static_parameters
+            )
+        else:
             self._funs = CasadiFunctionWrapper(
-                "funs", self.variables, {"action": action}
+                "funs", self.variables, outputs
+            )
+        if diagnostics:
+            self.concretize_diagnostics()
+        else:
+            self._diagnostics = None
+            self._diagnostics_layout = None
+
+    def concretize_diagnostics(self) -> None:
+        """
+        Compiles the task-space quantities of all leaves into one function.
+
+        The quantities of a leaf are given by Leaf.diagnostics. They are
+        evaluated by compute_diagnostics, so that they can be logged at the
+        control rate to analyze where the acceleration comes from. All
+        quantities are stacked into one output, which is split again in
+        compute_diagnostics. The joint limits leaf reports the quantities of
+        all limits stacked, with the lower limits first, and the total
+        energy. Dynamic leaves have no diagnostics, they are excluded with a
+        warning. Parameters that are folded or specialized
+        afterwards are folded into the diagnostics as well, so it must be
+        called before folding.
+        """
+        self.check_not_frozen()
+        expressions = []
+        self._diagnostics_layout = []
+        offset = 0
+        excluded_leaves = [
+            leaf_name for leaf_name, leaf in self.leaves.items()
+            if not isinstance(leaf, Leaf)
+        ]
+        if excluded_leaves:
+            logging.warning(
+                f"Dynamic leaves have no diagnostics, excluded: {', '.join(excluded_leaves)}."
             )
-            
+        for leaf_name, leaf in self.leaves.items():
+            if leaf_name in excluded_leaves:
+                continue
+            for quantity, expression in leaf.diagnostics().items():
+                expressions.append(ca.vec(self.substitute_parameters(expression)))
+                size = expression.numel()
+                self._diagnostics_layout.append(
+                    (leaf_name, quantity, slice(offset, offset + size), expression.shape)
+                )
+                offset += size
+        self._diagnostics = CasadiFunctionWrapper(
+            "diagnostics", self.variables, {"diagnostics": ca.vertcat(*expressions)}
+        )
+
+    def dynamics_function(self) -> ca.Function:
+        """
+        Returns the planner's acceleration as a function of all its inputs.
+
+        The first two inputs are the position and the velocity. The
+        runtime time step of the velocity mode is not an input, as the
+        acceleration does not depend on it. Must be called after
+        concretize.
+        """
+        self.check_not_frozen()
+        inputs = self._variables.asDict()
+        inputs.pop("time_step", None)
+        state_names = list(self._variables.state_variables().keys())[0:2]
+        input_names = state_names + [name for name in inputs if name not in state_names]
+        return ca.Function(
+            "dynamics",
+            [inputs[name] for name in input_names],
+            [self._xddot],
+            input_names,
+            ["xddot"],
+        )
+
+    def integrate(
+        self,
+        time_step,
+        integrator: str = 'euler',
+        integration_steps: int = 1,
+    ) -> tuple:
+        """
+        Integrates the planner's dynamics symbolically over one time step.
+
+        Returns the symbolic position and velocity after time_step, starting
+        from the planner's state variables. If the planner depends on the
+        time 't', see time_variable, the time is advanced with every
+        integration step.
+        """
+        self.check_not_frozen()
+        q = self._variables.position_variable()
+        qdot = self._variables.velocity_variable()
+        h = time_step / integration_steps
+        if integrator == 'euler' and integration_steps == 1:
+            return q + h * qdot, qdot + h * self._xddot
+        dynamics = self.dynamics_function()
+        inputs = self._variables.asDict()
+        parameter_names = dynamics.name_in()[2:]
+        t = inputs.get("t", 0)
+
+        def xddot(q_k, qdot_k, t_k):
+            parameters = [t_k if name == "t" else inputs[name] for name in parameter_names]
+            return dynamics(q_k, qdot_k, *parameters)
+
+        for _ in range(integration_steps):
+            if integrator == 'euler':
+                q, qdot = q + h * qdot, qdot + h * xddot(q, qdot, t)
+            elif integrator == 'rk4':
+                k1_q, k1_qdot = qdot, xddot(q, qdot, t)
+                k2_q = qdot + h / 2 * k1_qdot
+                k2_qdot = xddot(q + h / 2 * k1_q, k2_q, t + h / 2)
+                k3_q = qdot + h / 2 * k2_qdot
+                k3_qdot = xddot(q + h / 2 * k2_q, k3_q, t + h / 2)
+                k4_q = qdot + h * k3_qdot
+                k4_qdot = xddot(q + h * k3_q, k4_q, t + h)
+                q = q + h / 6 * (k1_q + 2 * k2_q + 2 * k3_q + k4_q)
+                qdot = qdot + h / 6 * (k1_qdot + 2 * k2_qdot + 2 * k3_qdot + k4_qdot)
+            else:
+                raise Exception(f"Unknown integrator {integrator}.")
+            t = t + h
+        return q, qdot
+
+    def rollout_function(
+        self,
+        horizon: int,
+        dt: float,
+        batch_size: int = 1,
+        integrator: str = 'euler',
+        integration_steps: int = 1,
+    ) -> CasadiFunctionWrapper:
+        """
+        Compiles a rollout of the planner's dynamics over a horizon.
+
+        The integration step is repeated with mapaccum, so the whole
+        trajectory is computed in one call without returning to Python.
+        If the planner depends on the time 't', it is part of the
+        accumulated state, so that 't' is the time of the initial state and
+        time-dependent references and predictions advance with the
+        rollout. Must be called after concretize.
+
+        Parameters
+        ----------
+        horizon : int
+            Number of time steps.
+        dt : float
+            Time step between two trajectory points.
+        batch_size : int
+            Number of initial states rolled out in parallel. The initial
+            states are passed as columns of 'q' and 'qdot', all other inputs
+            are shared by the batch.
+        integrator : str
+            'euler' or 'rk4'.
+        integration_steps : int
+            Number of integration steps per time step.
+
+        Returns
+        -------
+        CasadiFunctionWrapper
+            Evaluates to 'q_trajectory' and 'qdot_trajectory' of shape
+            (dof, horizon * batch_size),
+            where the column k + horizon * b is the state of batch element b
+            after k + 1 time steps.
+        """
+        self.check_not_frozen()
+        q, qdot = self._variables.position_variable(), self._variables.velocity_variable()
+        q_next, qdot_next = self.integrate(
+            dt, integrator=integrator, integration_steps=integration_steps
+        )
+        parameters = dict(self._variables.parameters())
+        parameters.pop("time_step", None)
+        t = parameters.pop("t", None)
+        state = ca.vertcat(q, qdot)
+        state_next = ca.vertcat(q_next, qdot_next)
+        if t is not None:
+            state = ca.vertcat(state, t)
+            state_next = ca.vertcat(state_next, t + dt)
+        step = ca.Function(
+            "step",
+            [state] + list(parameters.values()),
+            [state_next],
+        )
+        rollout = step.mapaccum("rollout", horizon)
+        if batch_size > 1:
+            rollout = rollout.map(batch_size)
+        q_0 = ca.MX.sym("q", self._dof, batch_size)
+        qdot_0 = ca.MX.sym("qdot", self._dof, batch_size)
+        rollout_parameters = {
+            name: ca.MX.sym(name, *parameter.shape)
+            for name, parameter in parameters.items()
+        }
+        state_0 = ca.vertcat(q_0, qdot_0)
+        if t is not None:
+            t_0 = ca.MX.sym("t", 1)
+            state_0 = ca.vertcat(state_0, ca.repmat(t_0, 1, batch_size))
+        trajectory = rollout(state_0, *rollout_parameters.values())
+        if t is not None:
+            rollout_parameters["t"] = t_0
+        variables = Variables(
+            state_variables={"q": q_0, "qdot": qdot_0},
+            parameters=rollout_parameters,
+            parameters_values=dict(self._variables.parameters_values()),
+        )
+        return CasadiFunctionWrapper(
+            "rollout",
+            variables,
+            {
+                "q_trajectory": trajectory[0:self._dof, :],
+                "qdot_trajectory": trajectory[self._dof:2 * self._dof, :],
+            },
+        )
+
 
     def serialize(self, file_name: str):
         """
@@ -798,20 +1391,172 @@ class ParameterizedFabricPlanner(object):
 
         The variables passed are the joint states, and the goal position.
         The action is nullified if its magnitude is very large or very small.
+        The esdf_Jdot inputs of registered estimators are filled in, see
+        esdf_jdot_estimator.
         """
+        if self._esdf_estimators:
+            kwargs = self.fill_esdf_inputs(kwargs)
         evaluations = self._funs.evaluate(**kwargs)
         action = evaluations["action"]
         # Debugging
         #logging.debug(f"alhpa_forced_geometry: {evaluations['alpha_forced_geometry']}")
         #logging.debug(f"alpha_geometry: {evaluations['alpha_geometry']}")
         #logging.debug(f"beta : {evaluations['beta']}")
-        action_magnitude = np.linalg.norm(action)
-        if action_magnitude < eps:
-            logging.warning(f"Fabrics: Avoiding small action with magnitude {action_magnitude}")
-            action *= 0.0
-        elif action_magnitude > 1/eps:
-            logging.warning(f"Fabrics: Avoiding large action with magnitude {action_magnitude}")
-            action *= 0.0
-        return action
+        return self.nullify_action(action)
+
+    def compute_diagnostics(self, **kwargs) -> Dict[str, Dict[str, np.ndarray]]:
+        """
+        Evaluates the diagnostics of all leaves in one call.
+
+        The arguments are the same as for compute_action. The quantities are
+        returned per leaf, e.g. diagnostics['goal_0_leaf']['x']. Requires
+        that the planner was concretized with diagnostics.
+        """
+        if getattr(self, '_diagnostics', None) is None:
+            raise DiagnosticsNotConcretizedError(
+                "The diagnostics were not compiled, call concretize with diagnostics=True."
+            )
+        values = self._diagnostics.evaluate(**kwargs)["diagnostics"]
+        diagnostics = {}
+        for leaf_name, quantity, indices, shape in self._diagnostics_layout:
+            value = values[indices]
+            if shape[1] > 1:
+                value = np.reshape(value, shape, order='F')
+            diagnostics.setdefault(leaf_name, {})[quantity] = value
+        return diagnostics
+
+    def bind(self, fold: bool = False, **kwargs) -> None:
+        """
+        Binds constant parameters once, e.g. body radii, limits or weights.
+
+        The arguments accept the same convenience names as compute_action,
+        e.g. radius_body_links={...}. By default, the values are stored and
+        used for all following calls, so they can be omitted. With fold,
+        the values are instead inserted into the graph as constants and
+        the function is regenerated without these inputs. Folding is only
+        possible before the planner is serialized.
+        """
+        if fold:
+            self.check_not_frozen()
+        values = self._funs.translate_inputs(**kwargs)
+        if not fold:
+            self._funs.process_inputs(**values)
+            return
+        instructions_before = self._funs.function().n_instructions()
+        self._funs.fold(**values)
+        self.fold_parameters(values)
+        logging.info(
+            f"Folded {list(values.keys())}, instructions reduced from "
+            f"{instructions_before} to {self._funs.function().n_instructions()}"
+        )
+
+    def specialize(self, **constants) -> "ParameterizedFabricPlanner":
+        """
+        Returns a copy of the planner specialized to constant parameters.
+
+        Parameters that are fixed for a robot cell, e.g. body radii, capsule
+        lengths, plane equations or limits, are substituted into the graph,
+        which is then simplified by common subexpression elimination and
+        regenerated. The arguments accept the same convenience names as
+        compute_action. The original planner is not changed, the
+        specialized one can be serialized as a separate artifact.
+        """
+        self.check_not_frozen()
+        values = self._funs.translate_inputs(**constants)
+        # The compiled functions are replaced and the forward kinematics
+        # are not changed by the planner, so they need not be copied.
+        shared_attributes = [self._funs, self._forward_kinematics, getattr(self, '_diagnostics', None)]
+        specialized_planner = deepcopy(
+            self, {id(attribute): attribute for attribute in shared_attributes}
+        )
+        specialized_planner._funs = self._funs.specialize(**values)
+        specialized_planner.fold_parameters(values)
+        instructions_before = self._funs.function().n_instructions()
+        instructions_after = specialized_planner._funs.function().n_instructions()
+        logging.info(
+            f"Specialized planner to {list(values.keys())}, instructions reduced from "
+            f"{instructions_before} to {instructions_after} "
+            f"({100 * (1 - instructions_after / instructions_before):.1f} %)"
+        )
+        return specialized_planner
+
+    def fold_parameters(self, values: dict) -> None:
+        self.check_not_frozen()
+        symbols = [self._variables.parameter_by_name(name) for name in values]
+        constants = [
+            ca.DM(np.reshape(np.asarray(value, dtype=float), symbol.shape, order='F'))
+            for symbol, value in zip(symbols, values.values())
+        ]
+        self._xddot = ca.substitute([self._xddot], symbols, constants)[0]
+        if getattr(self, '_diagnostics', None) is not None:
+            self._diagnostics = self._diagnostics.specialize(**values)
+        for name in values:
+            self._variables.remove_parameter(name)
+
+    def check_not_frozen(self) -> None:
+        if getattr(self, '_frozen', False):
+            raise FrozenPlannerError(
+                "The planner is frozen, only the runtime methods are available."
+            )
+
+    def freeze(self) -> Optional[int]:
+        """
+        Releases all symbolic components of a concretized planner.
+
+        Only the compiled function with the names of its inputs and the
+        bound parameter values are kept, the leaves, maps, geometries and
+        their expression graphs are dropped. The runtime methods keep
+        working, building, folding, specializing and all methods that read
+        the symbolic components, e.g. variables or sparsity_statistics,
+        raise a FrozenPlannerError. The Euler-Lagrange cache is cleared as
+        well.
+        Returns the resident memory reclaimed in bytes, or None if it
+        cannot be measured on this platform.
+        """
+        memory_before = resident_memory()
+        self._funs.release_expressions()
+        if getattr(self, '_diagnostics', None) is not None:
+            self._diagnostics.release_expressions()
+        for attribute in list(vars(self)):
+            if attribute not in ['_funs', '_dof', '_config', '_mode', '_diagnostics', '_diagnostics_layout', '_esdf_estimators']:
+                delattr(self, attribute)
+        self._frozen = True
+        euler_lagrange_cache.clear()
+        release_memory()
+        memory_after = resident_memory()
+        if memory_before is None or memory_after is None:
+            return None
+        reclaimed_memory = memory_before - memory_after
+        logging.info(f"Frozen planner, reclaimed {reclaimed_memory / 1e6:.1f} MB")
+        return reclaimed_memory
+
+    def input_struct(self) -> PackedInputs:
+        """
+        Returns a typed input struct for compute_action_packed.
+
+        The struct has one attribute per planner input, e.g. inputs.q or
+        inputs.x_obst_0, backed by one contiguous buffer that is passed to
+        the planner without building a dictionary. Values can be assigned
+        or written into the attributes in place.
+        """
+        return self._funs.input_struct()
+
+    def compute_action_packed(self, inputs: PackedInputs) -> np.ndarray:
+        """
+        Computes the action for the inputs held by an input struct.
+        """
+        return self.nullify_action(self._funs.evaluate_packed(inputs)["action"])
+
+    def nullify_action(self, action: np.ndarray) -> np.ndarray:
+        return nullify_action(action)
+
+    def evaluate(self, **kwargs) -> Dict[str, np.ndarray]:
+        """
+        Evaluates all outputs of the compiled planner.
+
+        In velocity mode, this contains the velocity as 'action' and the
+        acceleration as 'xddot'.
+        """
+        return self._funs.evaluate(**kwargs)
 
 
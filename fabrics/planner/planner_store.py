@@ -0,0 +1,70 @@
+import logging
+import os
+import tempfile
+
+from fabrics.planner.parameterized_planner import ParameterizedFabricPlanner
+from fabrics.planner.serialized_planner import SerializedFabricPlanner
+
+
+class PlannerStore(object):
+    """
+    On-disk store of compiled planners, keyed by their configuration hash.
+
+    Planners built from the same problem configuration, fabric
+    configuration and robot are only built once and loaded from the store
+    afterwards, also by other processes sharing the directory.
+    """
+
+    def __init__(self, directory: str):
+        self._directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self._directory, f"{key}.pbz2")
+
+    def contains(self, key: str) -> bool:
+        return os.path.isfile(self.path(key))
+
+    def load(self, key: str) -> SerializedFabricPlanner:
+        return SerializedFabricPlanner(self.path(key))
+
+    def store(self, key: str, planner: ParameterizedFabricPlanner) -> None:
+        # Write to a temporary file first so that concurrent readers never
+        # see a partially written planner.
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self._directory)
+        os.close(file_descriptor)
+        try:
+            planner.serialize(temporary_path)
+            os.replace(temporary_path, self.path(key))
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+
+    def load_or_build(
+        self,
+        planner: ParameterizedFabricPlanner,
+        problem_configuration: dict,
+        robot_description: str,
+        **concretize_kwargs,
+    ) -> SerializedFabricPlanner:
+        """
+        Returns the compiled planner for the problem configuration.
+
+        If the store does not contain it yet, the problem configuration is
+        loaded into the planner, the planner is concretized with
+        concretize_kwargs and stored. The forward kinematics of the planner
+        cannot be hashed, so the robot_description, e.g. the urdf, must
+        identify the robot. Otherwise, planners of different robots with the
+        same problem configuration would share an entry.
+        """
+        if not robot_description:
+            raise ValueError("A robot description, e.g. the urdf, is required.")
+        key = planner.configuration_hash(
+            problem_configuration, robot_description, concretize_kwargs
+        )
+        if not self.contains(key):
+            logging.info(f"Building planner {key}")
+            planner.load_problem_configuration(problem_configuration)
+            planner.concretize(**concretize_kwargs)
+            self.store(key, planner)
+        return self.load(key)
@@ -4,9 +4,16 @@ from fabrics.helpers.casadiFunctionWrapper import CasadiFunctionWrapper_deserial
 
 
 class SerializedFabricPlanner(ParameterizedFabricPlanner):
+    """
+    Serialized planner with the interface of ParameterizedFabricPlanner.
+
+    Loading it imports the complete build stack, controllers that only
+    evaluate the planner should use fabrics.runtime.RuntimePlanner.
+    """
     def __init__(self, file_name: str):
         self._funs = CasadiFunctionWrapper_deserialized(file_name)
         self._isload = True
+        self._esdf_estimators = {}
 
     #Disable all functions to compose the tree of fabrics.
 
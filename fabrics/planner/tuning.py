@@ -0,0 +1,205 @@
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional
+
+import casadi as ca
+import numpy as np
+
+from fabrics.components.leaves.attractor import GenericAttractor
+from fabrics.components.leaves.geometry import (GenericGeometryLeaf,
+                                                JointLimitsLeaf)
+from fabrics.helpers.casadiFunctionWrapper import InputMissmatchError
+from fabrics.planner.configuration_classes import FabricPlannerConfig
+from fabrics.planner.parameterized_planner import ParameterizedFabricPlanner
+
+
+def parameterize(
+    config: FabricPlannerConfig, **replacements: Dict[str, str]
+) -> FabricPlannerConfig:
+    """
+    Replaces numeric constants in the configuration by runtime symbols.
+
+    For every configuration field, a dictionary maps the literal constant to
+    the name of the runtime symbol, e.g.
+    parameterize(config, collision_geometry={'5': 'collision_exponent'}).
+    Only complete literals are replaced, '5' does not match '0.5'.
+    The symbols get the usual leaf suffixes when the planner is built, so
+    that collision_exponent becomes collision_exponent_<leaf_name>.
+    """
+    new_expressions = {}
+    for field_name, constants in replacements.items():
+        expression = getattr(config, field_name)
+        for constant, symbol_name in constants.items():
+            pattern = rf"(?<![\w.]){re.escape(constant)}(?![\w.])"
+            expression, count = re.subn(pattern, f"sym('{symbol_name}')", expression)
+            if count == 0:
+                raise ValueError(
+                    f"Constant {constant} not found in {field_name}: {expression}"
+                )
+        new_expressions[field_name] = expression
+    return replace(config, **new_expressions)
+
+
+def expand_parameters(
+    input_names: List[str], parameters: Dict[str, float]
+) -> Dict[str, float]:
+    """
+    Maps tuning parameters to all function inputs they were expanded to.
+
+    A parameter applies to the input with the same name and to all inputs
+    starting with the parameter name followed by an underscore.
+    """
+    expanded_parameters = {}
+    for name, value in parameters.items():
+        matches = [
+            input_name for input_name in input_names
+            if input_name == name or input_name.startswith(name + "_")
+        ]
+        if not matches:
+            raise InputMissmatchError(f"No input found for tuning parameter {name}")
+        for input_name in matches:
+            expanded_parameters[input_name] = value
+    return expanded_parameters
+
+
+@dataclass
+class TuningResult:
+    parameters: Dict[str, float]
+    time_to_goal: float
+    minimum_clearance: float
+
+    def rank_key(self) -> tuple:
+        return (self.minimum_clearance < 0, self.time_to_goal, -self.minimum_clearance)
+
+
+_worker_functions = {}
+
+
+def _initialize_worker(serialized_rollout: str, serialized_metrics: str) -> None:
+    _worker_functions["rollout"] = ca.Function.deserialize(serialized_rollout)
+    _worker_functions["metrics"] = ca.Function.deserialize(serialized_metrics)
+
+
+def _evaluate_trial(
+    arguments: Dict[str, np.ndarray],
+    parameters: Dict[str, float],
+    time_step: float,
+    goal_tolerance: float,
+) -> TuningResult:
+    rollout = _worker_functions["rollout"]
+    metrics = _worker_functions["metrics"]
+    trial_arguments = dict(arguments)
+    trial_arguments.update(expand_parameters(rollout.name_in(), parameters))
+    trajectory = rollout(**trial_arguments)
+    metric_arguments = {
+        key: value for key, value in trial_arguments.items()
+        if key in metrics.name_in()
+    }
+    metric_arguments["q"] = trajectory["q_trajectory"]
+    evaluations = metrics(**metric_arguments)
+    goal_distances = np.array(evaluations["goal_distance"]).flatten()
+    clearances = np.array(evaluations["clearance"]).flatten()
+    reached = np.nonzero(goal_distances < goal_tolerance)[0]
+    if reached.size > 0:
+        time_to_goal = (reached[0] + 1) * time_step
+    else:
+        time_to_goal = np.inf
+    return TuningResult(
+        parameters=parameters,
+        time_to_goal=time_to_goal,
+        minimum_clearance=float(np.min(clearances)) if clearances.size > 0 else np.inf,
+    )
+
+
+class TuningHarness(object):
+    """
+    Runs closed-loop rollouts of a concretized planner for many parameter sets.
+
+    Tuning parameters are runtime symbols of the planner, see parameterize,
+    so that no trial requires rebuilding the planner. The rollout is compiled
+    once with rollout_function and the trials are evaluated in parallel
+    processes. Every trial is rated by the time until the distance of all
+    attractors falls below goal_tolerance and by the minimum value of the
+    collision avoidance maps along the trajectory.
+    """
+
+    def __init__(
+        self,
+        planner: ParameterizedFabricPlanner,
+        time_step: float = 0.01,
+        horizon: int = 500,
+        goal_tolerance: float = 0.05,
+        integrator: str = 'euler',
+        max_workers: Optional[int] = None,
+    ):
+        self._time_step = time_step
+        self._goal_tolerance = goal_tolerance
+        self._max_workers = max_workers
+        rollout = planner.rollout_function(horizon, time_step, integrator=integrator)
+        self._rollout = rollout.function()
+        self._metrics = self.metrics_function(planner).map(horizon)
+
+    @staticmethod
+    def metrics_function(planner: ParameterizedFabricPlanner) -> ca.Function:
+        goal_distances = []
+        clearances = []
+        for leaf in planner.leaves.values():
+            if isinstance(leaf, GenericAttractor):
+                goal_distances.append(ca.norm_2(leaf.map()._phi))
+            elif isinstance(leaf, JointLimitsLeaf):
+                clearances.append(leaf.distances())
+            elif isinstance(leaf, GenericGeometryLeaf) and leaf.map() is not None:
+                clearances.append(leaf.map()._phi)
+        goal_distance = ca.mmax(ca.vertcat(*goal_distances)) if goal_distances else ca.SX(0)
+        clearance = ca.mmin(ca.vertcat(*clearances)) if clearances else ca.SX(np.inf)
+        inputs = planner.variables.parameters()
+        q = planner.variables.position_variable()
+        return ca.Function(
+            "metrics",
+            [q] + list(inputs.values()),
+            [goal_distance, clearance],
+            ["q"] + list(inputs.keys()),
+            ["goal_distance", "clearance"],
+        )
+
+    def run(
+        self,
+        trials: List[Dict[str, float]],
+        q: np.ndarray,
+        qdot: np.ndarray,
+        **kwargs,
+    ) -> List[TuningResult]:
+        """
+        Evaluates all trials from the initial state (q, qdot).
+
+        kwargs are passed to every rollout, they must contain all inputs
+        that are not set by the trials. Returns the results ranked from best
+        to worst, collision-free trials first, then by time to goal and
+        clearance.
+        """
+        arguments = dict(kwargs, q=q, qdot=qdot)
+        for trial in trials:
+            trial_inputs = set(arguments) | set(
+                expand_parameters(self._rollout.name_in(), trial)
+            )
+            missing_inputs = set(self._rollout.name_in()) - trial_inputs
+            if missing_inputs:
+                raise InputMissmatchError(f"Found missing inputs: {sorted(missing_inputs)}")
+        with ProcessPoolExecutor(
+            max_workers=self._max_workers,
+            initializer=_initialize_worker,
+            initargs=(self._rollout.serialize(), self._metrics.serialize()),
+        ) as executor:
+            futures = [
+                executor.submit(
+                    _evaluate_trial,
+                    arguments,
+                    trial,
+                    self._time_step,
+                    self._goal_tolerance,
+                )
+                for trial in trials
+            ]
+            results = [future.result() for future in futures]
+        return sorted(results, key=TuningResult.rank_key)
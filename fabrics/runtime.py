@@ -0,0 +1,77 @@
+"""
+Runtime-only loading and evaluation of prebuilt planners.
+
+This module only depends on casadi and numpy. It does not import the
+symbolic components, the forward kinematics or the scene descriptions that
+are needed to build a planner, so that controllers that only evaluate a
+serialized or exported planner start fast and stay small.
+"""
+import logging
+from typing import Dict, Optional
+
+import casadi as ca
+import numpy as np
+
+from fabrics.helpers.casadiFunctionWrapper import (
+    CasadiFunctionWrapper_deserialized, PackedInputs)
+from fabrics.helpers.constants import eps
+
+
+def nullify_action(action: np.ndarray) -> np.ndarray:
+    """
+    Sets actions with very small or very large magnitude to zero.
+    """
+    action_magnitude = np.linalg.norm(action)
+    if action_magnitude < eps:
+        logging.warning(f"Fabrics: Avoiding small action with magnitude {action_magnitude}")
+        action *= 0.0
+    elif action_magnitude > 1/eps:
+        logging.warning(f"Fabrics: Avoiding large action with magnitude {action_magnitude}")
+        action *= 0.0
+    return action
+
+
+class RuntimePlanner(object):
+    """
+    Evaluates a prebuilt planner function.
+
+    The planner is either loaded from a file written by
+    ParameterizedFabricPlanner.serialize, see from_file, or created from a
+    casadi function, e.g. loaded with ca.Function.load from an exported xml
+    file or with ca.external from a compiled library, see from_function.
+    The runtime methods behave like the ones of ParameterizedFabricPlanner.
+    """
+
+    def __init__(self, funs: CasadiFunctionWrapper_deserialized):
+        self._funs = funs
+
+    @classmethod
+    def from_file(cls, file_name: str) -> "RuntimePlanner":
+        return cls(CasadiFunctionWrapper_deserialized(file_name))
+
+    @classmethod
+    def from_function(
+        cls, function: ca.Function, parameters: Optional[Dict[str, np.ndarray]] = None
+    ) -> "RuntimePlanner":
+        return cls(CasadiFunctionWrapper_deserialized.from_function(function, parameters))
+
+    def function(self) -> ca.Function:
+        return self._funs.function()
+
+    def bind(self, **kwargs) -> None:
+        """
+        Stores constant parameters for all following calls.
+        """
+        self._funs.process_inputs(**kwargs)
+
+    def compute_action(self, **kwargs) -> np.ndarray:
+        return nullify_action(self._funs.evaluate(**kwargs)["action"])
+
+    def input_struct(self) -> PackedInputs:
+        return self._funs.input_struct()
+
+    def compute_action_packed(self, inputs: PackedInputs) -> np.ndarray:
+        return nullify_action(self._funs.evaluate_packed(inputs)["action"])
+
+    def evaluate(self, **kwargs) -> Dict[str, np.ndarray]:
+        return self._funs.evaluate(**kwargs)
@@ -142,3 +142,39 @@ def test_variable_map_NonZero(variable_differentialMap):
         * ((q[0] - q_p[0]) * qdot_p[0] + (q[1] - q_p[1]) * qdot_p[1])
     )
     assert xdot_var[0] == pytest.approx(xdot_p_test1 + xdot_p_test2, rel=1e-5)
+
+
+@pytest.mark.parametrize("witness_distance", ["capsule_sphere", "capsule_capsule", "cuboid_capsule"])
+def test_dm_witness(witness_distance: str):
+    from fabrics.helpers.distances import (
+        capsule_to_capsule, capsule_to_capsule_witness, capsule_to_sphere,
+        capsule_to_sphere_witness, cuboid_to_capsule, cuboid_to_capsule_witness)
+    q = ca.SX.sym("q", 3)
+    qdot = ca.SX.sym("qdot", 3)
+    variables = Variables(state_variables={'q': q, 'qdot': qdot})
+    capsule = [
+        ca.vertcat(q[0], q[1], 0.3),
+        ca.vertcat(q[0] + ca.cos(q[2]), q[1] + ca.sin(q[2]), 0.3),
+    ]
+    if witness_distance == "capsule_sphere":
+        arguments = (capsule, ca.DM([1.2, 2.1, 0.0]), 0.1, 0.2)
+        phi = capsule_to_sphere(*arguments)
+        phi_witness, *witness = capsule_to_sphere_witness(*arguments)
+    elif witness_distance == "capsule_capsule":
+        arguments = (capsule, [ca.DM([-1.0, 2.0, 0.0]), ca.DM([2.0, 2.5, 1.0])], 0.1, 0.2)
+        phi = capsule_to_capsule(*arguments)
+        phi_witness, *witness = capsule_to_capsule_witness(*arguments)
+    else:
+        arguments = (ca.DM([0.5, 2.5, 0.0]), capsule, ca.DM([1.0, 1.0, 1.0]), 0.1)
+        phi = cuboid_to_capsule(*arguments)
+        phi_witness, *witness = cuboid_to_capsule_witness(*arguments)
+    dm = DifferentialMap(phi, variables)
+    dm_witness = DifferentialMap(phi_witness, variables, witness=witness)
+    function = ca.Function("f", [q, qdot], [dm._phi, dm._J])
+    function_witness = ca.Function("f", [q, qdot], [dm_witness._phi, dm_witness._J])
+    for q_value in [np.array([0.2, 0.4, 0.7]), np.array([-0.5, 0.1, 1.8])]:
+        qdot_value = np.array([0.3, -0.2, 0.5])
+        phi_value, J_value = function(q_value, qdot_value)
+        phi_witness_value, J_witness_value = function_witness(q_value, qdot_value)
+        assert float(phi_witness_value) == pytest.approx(float(phi_value))
+        assert np.array(J_witness_value) == pytest.approx(np.array(J_value))
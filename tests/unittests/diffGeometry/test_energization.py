@@ -270,3 +270,21 @@ def test_two_spaces_energization(two_different_spaces):
     # only the latter is what we need
     assert qddot_we_alpha[0] != pytest.approx(qddot_en[0])
     assert qddot_we_alpha[1] != pytest.approx(qddot_en[1])
+
+
+def test_shared_quadratic_forms(two_energizations):
+    geo, le, _ = two_energizations
+    geo_2 = Geometry(h=2.0 * geo._h, var=geo._vars)
+    we_1 = WeightedGeometry(g=geo, le=le)
+    we_2 = WeightedGeometry(g=geo_2, le=le)
+    we_1.concretize()
+    we_2.concretize()
+    assert le.quadratic_forms() is le.quadratic_forms()
+    x = np.array([0.2, -0.8])
+    xdot = np.array([-1.1, 0.6])
+    le.concretize()
+    M_le, f_le, _ = le.evaluate(x=x, xdot=xdot)
+    for we in [we_1, we_2]:
+        M, f, _, alpha = we.evaluate(x=x, xdot=xdot)
+        alpha_test = -np.dot(xdot, f - f_le) / (eps + np.dot(xdot, np.dot(M_le, xdot)))
+        assert alpha == pytest.approx(alpha_test)
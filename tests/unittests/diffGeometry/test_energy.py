@@ -2,7 +2,7 @@ import pytest
 import casadi as ca
 import numpy as np
 from fabrics.diffGeometry.spec import Spec
-from fabrics.diffGeometry.energy import Lagrangian, FinslerStructure
+from fabrics.diffGeometry.energy import Lagrangian, FinslerStructure, euler_lagrange_cache
 from fabrics.diffGeometry.diffMap import DifferentialMap
 
 from fabrics.helpers.variables import Variables
@@ -100,3 +100,41 @@ def test_pull_lagrangian(two_dimensional_lagrangian):
     assert f_p_test[0] == pytest.approx(f_p[0])
     assert f_p_test[1] == pytest.approx(f_p[1])
 
+
+
+def test_euler_lagrange_cache():
+    def scaled_lagrangian(name: str, scale: float) -> Lagrangian:
+        x = ca.SX.sym(f"x_{name}", 2)
+        xdot = ca.SX.sym(f"xdot_{name}", 2)
+        k = ca.SX.sym(f"k_{name}", 1)
+        l = scale * k / ca.norm_2(x) * ca.dot(xdot, xdot)
+        variables = Variables(
+            state_variables={f"x_{name}": x, f"xdot_{name}": xdot},
+            parameters={f"k_{name}": k},
+        )
+        return Lagrangian(l, var=variables)
+
+    maxsize = euler_lagrange_cache.maxsize()
+    euler_lagrange_cache.clear()
+    euler_lagrange_cache.resize(2)
+    try:
+        scaled_lagrangian("a", 0.5)
+        assert len(euler_lagrange_cache) == 1
+        lagrangian = scaled_lagrangian("b", 0.5)
+        assert len(euler_lagrange_cache) == 1
+        scaled_lagrangian("c", 0.5000001)
+        scaled_lagrangian("d", 0.25)
+        assert len(euler_lagrange_cache) == 2
+        euler_lagrange_cache.resize(0)
+        reference = scaled_lagrangian("e", 0.5)
+    finally:
+        euler_lagrange_cache.resize(maxsize)
+    lagrangian.concretize()
+    reference.concretize()
+    x = np.array([0.3, -1.2])
+    xdot = np.array([0.5, 0.7])
+    M, f, H = lagrangian.evaluate(x_b=x, xdot_b=xdot, k_b=2.0)
+    M_ref, f_ref, H_ref = reference.evaluate(x_e=x, xdot_e=xdot, k_e=2.0)
+    assert M == pytest.approx(M_ref)
+    assert f == pytest.approx(f_ref)
+    assert H == pytest.approx(H_ref)
@@ -1,7 +1,7 @@
 import pytest
 import casadi as ca
 import numpy as np
-from fabrics.diffGeometry.casadi_helpers import outerProduct
+from fabrics.diffGeometry.casadi_helpers import choleskySolve, outerProduct, regularizedLeastSquares
 
 
 def test_outer_product():
@@ -16,3 +16,29 @@ def test_outer_product():
     assert res[0, 1] == 0.6
     assert res[1, 0] == -0.2
     assert res[1, 1] == 1.2
+
+
+@pytest.mark.parametrize("shape", [(2, 3), (3, 3), (3, 2)])
+def test_regularized_least_squares(shape):
+    A = ca.SX.sym("A", *shape)
+    b = ca.SX.sym("b", shape[0])
+    x = regularizedLeastSquares(A, b, 1e-9)
+    x_fun = ca.Function("x", [A, b], [x])
+    np.random.seed(0)
+    A_c = np.random.randn(*shape)
+    b_c = np.random.randn(shape[0])
+    res = np.array(x_fun(A_c, b_c))[:, 0]
+    assert res == pytest.approx(np.dot(np.linalg.pinv(A_c), b_c), abs=1e-6)
+
+
+def test_cholesky_solve():
+    B = ca.SX.sym("B", 4, 3)
+    b = ca.SX.sym("b", 3)
+    A = ca.mtimes(ca.transpose(B), B) + 1e-6 * ca.SX.eye(3)
+    x_fun = ca.Function("x", [B, b], [choleskySolve(A, b)])
+    np.random.seed(1)
+    B_c = np.random.randn(4, 3)
+    b_c = np.random.randn(3)
+    res = np.array(x_fun(B_c, b_c))[:, 0]
+    A_c = np.dot(B_c.T, B_c) + 1e-6 * np.identity(3)
+    assert res == pytest.approx(np.linalg.solve(A_c, b_c))
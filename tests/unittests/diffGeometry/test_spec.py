@@ -1,6 +1,7 @@
 import pytest
 import casadi as ca
 import numpy as np
+from fabrics.diffGeometry.diffMap import DifferentialMap
 from fabrics.diffGeometry.spec import Spec
 from fabrics.helpers.exceptions import SpecException
 from fabrics.helpers.variables import Variables
@@ -122,3 +123,21 @@ def test_join_variables(var_spec):
     s_joint = s1 + s2
     var = s_joint._vars
     assert var.len() == 6
+
+def test_sparse_assembly():
+    q = ca.SX.sym("q", 3)
+    qdot = ca.SX.sym("qdot", 3)
+    x = ca.SX.sym("x", 1)
+    xdot = ca.SX.sym("xdot", 1)
+    s = Spec(ca.SX(np.identity(1)), f=-0.5 / (x ** 2), x=x, xdot=xdot)
+    dm_early = DifferentialMap(ca.sin(q[0]) + q[1], Variables(state_variables={"q": q, "qdot": qdot}))
+    dm_last = DifferentialMap(q[2] ** 2, Variables(state_variables={"q": q, "qdot": qdot}))
+    root = Spec(ca.SX(np.zeros((3, 3))), f=ca.SX(np.zeros(3)), var=Variables(state_variables={"q": q, "qdot": qdot}))
+    root += s.pull(dm_early)
+    statistics = root.sparsity_statistics()
+    assert statistics['M']['nnz'] == 4
+    assert statistics['f']['nnz'] == 2
+    root += s.pull(dm_last)
+    statistics = root.sparsity_statistics()
+    assert statistics['M']['nnz'] == 5
+    assert statistics['M']['density'] == pytest.approx(5 / 9)
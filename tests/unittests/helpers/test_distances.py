@@ -538,3 +538,40 @@ def test_distance_cuboid_capsule():
         )
     )
     assert distance_numpy == pytest.approx(0.70710678-0.2)
+
+def test_distance_cuboid_shared_terms():
+    """
+    Test that precomputed cuboid terms give the same distances and are
+    shared between several capsules.
+    """
+    cuboid_center = ca.SX.sym("cuboid_center", 3)
+    cuboid_size = ca.SX.sym("cuboid_size", 3)
+    capsules = [
+        [ca.SX.sym(f"capsule_{i}_center1", 3), ca.SX.sym(f"capsule_{i}_center2", 3)]
+        for i in range(2)
+    ]
+    terms = cuboid_terms(cuboid_center, cuboid_size)
+    assert len(terms.edges) == 12
+    shared_distances = ca.vertcat(*[
+        cuboid_to_capsule(cuboid_center, capsule, cuboid_size, 0.2, terms=terms)
+        for capsule in capsules
+    ])
+    distances = ca.vertcat(*[
+        cuboid_to_capsule(cuboid_center, capsule, cuboid_size, 0.2)
+        for capsule in capsules
+    ])
+    function_arguments = capsules[0] + capsules[1] + [cuboid_center, cuboid_size]
+    shared_function = ca.Function("shared", function_arguments, [shared_distances])
+    function = ca.Function("function", function_arguments, [distances])
+    arguments = [
+        np.array([-2.0, 3.0, 0.5]),
+        np.array([2.0, 3.0, 0.5]),
+        np.array([1.5, 0.2, -0.3]),
+        np.array([1.2, 0.8, 1.9]),
+        np.array([0.5, 0.5, 0.5]),
+        np.array([1.0, 1.0, 1.0]),
+    ]
+    assert np.array(shared_function(*arguments)) == pytest.approx(
+        np.array(function(*arguments))
+    )
+    assert shared_function.n_instructions() < function.n_instructions()
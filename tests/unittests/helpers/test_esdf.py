@@ -0,0 +1,72 @@
+import casadi as ca
+import numpy as np
+import pytest
+
+from fabrics.helpers.esdf import ESDFJdotEstimator, grid_hessian
+from fabrics.helpers.variables import Variables
+
+
+@pytest.fixture
+def estimator():
+    q = ca.SX.sym("q", 2)
+    qdot = ca.SX.sym("qdot", 2)
+    variables = Variables(state_variables={"q": q, "qdot": qdot})
+    fk = ca.vcat([ca.cos(q[0]) + ca.cos(q[0] + q[1]), ca.sin(q[0]) + ca.sin(q[0] + q[1]), 0])
+    fk_function = ca.Function("fk", [q], [fk])
+    return ESDFJdotEstimator("link", fk, variables, filter_constant=0.0), fk_function
+
+
+def distance_gradient(x: np.ndarray, center: np.ndarray) -> np.ndarray:
+    return (x - center) / np.linalg.norm(x - center)
+
+
+def distance_hessian(x: np.ndarray, center: np.ndarray) -> np.ndarray:
+    n = distance_gradient(x, center)
+    return (np.identity(3) - np.outer(n, n)) / np.linalg.norm(x - center)
+
+
+def test_grid_hessian():
+    resolution = 0.01
+    x, y = np.meshgrid(
+        np.arange(-1, 1, resolution), np.arange(-1, 1, resolution), indexing="ij"
+    )
+    distance_map = x ** 2 + 3 * x * y
+    hessian = grid_hessian(distance_map, resolution)
+    assert hessian.shape == (2, 2) + distance_map.shape
+    assert hessian[:, :, 100, 100] == pytest.approx(np.array([[2.0, 3.0], [3.0, 0.0]]), abs=1e-6)
+
+
+def test_jdot_from_hessian(estimator):
+    estimator, fk_function = estimator
+    center = np.array([3.0, 0.5, 0.0])
+    q = np.array([0.3, 0.6])
+    qdot = np.array([0.4, -0.8])
+    dt = 1e-6
+    x = np.array(fk_function(q))[:, 0]
+    gradient = distance_gradient(x, center)
+    inputs = estimator.inputs(
+        q, qdot, np.linalg.norm(x - center), gradient, hessian=distance_hessian(x, center)
+    )
+    q_sym = ca.SX.sym("q_sym", 2)
+    fk_sym = fk_function(q_sym)
+    J_function = ca.Function("J", [q_sym], [ca.jacobian(fk_sym, q_sym)])
+
+    def J_esdf(q_eval):
+        x_eval = np.array(fk_function(q_eval))[:, 0]
+        return np.dot(distance_gradient(x_eval, center), np.array(J_function(q_eval)))
+
+    Jdot_numeric = (J_esdf(q + dt * qdot) - J_esdf(q - dt * qdot)) / (2 * dt)
+    assert inputs["esdf_Jdot_link"] == pytest.approx(-Jdot_numeric, rel=1e-4)
+    assert inputs["esdf_J_link"] == pytest.approx(gradient)
+
+
+def test_jdot_from_gradient_history(estimator):
+    estimator, _ = estimator
+    q = np.array([0.3, 0.6])
+    qdot = np.zeros(2)
+    gradient_0 = np.array([1.0, 0.0, 0.0])
+    gradient_1 = np.array([0.0, 1.0, 0.0])
+    Jdot_0 = estimator.Jdot(q, qdot, gradient_0, time_step=0.1)
+    assert Jdot_0 == pytest.approx(np.zeros(2))
+    Jdot_1 = estimator.Jdot(q, qdot, gradient_1, time_step=0.1)
+    assert np.linalg.norm(Jdot_1) > 0
@@ -1,3 +1,4 @@
+import pytest
 import casadi as ca
 import numpy as np
 from fabrics.helpers.geometric_primitives import (
@@ -33,6 +34,29 @@ def test_capsule():
     assert capsule.size == [0.2, 0.5]
 
 
+def test_capsule_capsule_distance():
+    capsule_1 = Capsule('capsule_1', radius=0.1, length=1.0)
+    capsule_2 = Capsule('capsule_2', radius=0.2, length=1.0)
+    origin = ca.SX(np.identity(4))
+    origin[0:3, 3] = np.array([0.5, 0.0, 0.0])
+    capsule_2.set_origin(origin)
+    sphere = Sphere('sphere', radius=0.1)
+    sphere.set_position(ca.SX(np.array([0.0, 0.0, 0.8])))
+    parameters = [
+        capsule_1.sym_radius, capsule_1.sym_length,
+        capsule_2.sym_radius, capsule_2.sym_length,
+        sphere.sym_radius,
+    ]
+    fun = ca.Function(
+        'fun',
+        parameters,
+        [capsule_1.distance(capsule_2), sphere.distance(capsule_1)],
+    )
+    capsule_distance, sphere_distance = fun(0.1, 1.0, 0.2, 1.0, 0.1)
+    assert float(capsule_distance) == pytest.approx(0.2)
+    assert float(sphere_distance) == pytest.approx(0.1)
+
+
 def test_cuboid():
     cuboid = Cuboid('cuboid', sizes=[0.3, 0.4, 0.1])
     assert cuboid.size[0] == 0.3
@@ -68,3 +92,12 @@ def test_plane():
 
 
 
+
+def test_cuboid_terms():
+    cuboid = Cuboid('cuboid', sizes=[0.3, 0.4, 0.1])
+    cuboid.set_position(ca.SX.sym("x_cuboid", 3), free=True)
+    terms = cuboid.terms
+    assert cuboid.terms is terms
+    assert len(terms.edges) == 12
+    cuboid.set_position(ca.SX.sym("x_cuboid_moved", 3), free=True)
+    assert cuboid.terms is not terms
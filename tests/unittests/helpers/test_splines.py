@@ -0,0 +1,57 @@
+import casadi as ca
+import numpy as np
+import pytest
+from geomdl import BSpline, utilities
+
+from fabrics.helpers.splines import bspline, clamped_knot_vector, spline_reference
+
+
+@pytest.fixture
+def control_points():
+    return np.array([
+        [0.0, 0.0, 0.0],
+        [1.0, 0.5, 0.0],
+        [1.0, 1.0, 0.3],
+        [2.0, 1.0, 0.2],
+        [2.5, 0.1, 0.0],
+    ])
+
+
+def test_knot_vector():
+    assert clamped_knot_vector(3, 6) == pytest.approx(utilities.generate_knot_vector(3, 6))
+    assert clamped_knot_vector(2, 3) == pytest.approx(utilities.generate_knot_vector(2, 3))
+
+
+def test_bspline(control_points):
+    curve = BSpline.Curve()
+    curve.degree = 3
+    curve.ctrlpts = control_points.tolist()
+    curve.knotvector = utilities.generate_knot_vector(3, 5)
+    control_points_symbol = ca.SX.sym("control_points", 5, 3)
+    u = ca.SX.sym("u", 1)
+    spline_function = ca.Function(
+        "spline", [control_points_symbol, u], [bspline(control_points_symbol, u, 3)]
+    )
+    for u_value in [0.0, 0.2, 0.5, 0.77, 1.0]:
+        position = np.array(spline_function(control_points, u_value))[:, 0]
+        assert position == pytest.approx(curve.evaluate_single(u_value))
+
+
+def test_spline_reference(control_points):
+    control_points_symbol = ca.SX.sym("control_points", 5, 3)
+    duration = ca.SX.sym("duration", 1)
+    t = ca.SX.sym("t", 1)
+    reference_function = ca.Function(
+        "reference",
+        [control_points_symbol, duration, t],
+        list(spline_reference(control_points_symbol, duration, t, 3)),
+    )
+    dt = 1e-5
+    x_0, xdot_0, xddot_0 = reference_function(control_points, 2.0, 0.7)
+    x_1, xdot_1, _ = reference_function(control_points, 2.0, 0.7 + dt)
+    assert np.array(xdot_0) == pytest.approx(np.array(x_1 - x_0) / dt, abs=1e-4)
+    assert np.array(xddot_0) == pytest.approx(np.array(xdot_1 - xdot_0) / dt, abs=1e-3)
+    x_end, xdot_end, xddot_end = reference_function(control_points, 2.0, 3.0)
+    assert np.array(x_end)[:, 0] == pytest.approx(control_points[-1])
+    assert np.array(xdot_end) == pytest.approx(np.zeros((3, 1)))
+    assert np.array(xddot_end) == pytest.approx(np.zeros((3, 1)))
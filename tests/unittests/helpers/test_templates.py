@@ -0,0 +1,40 @@
+import casadi as ca
+import numpy as np
+
+from fabrics.diffGeometry.energy import Lagrangian
+from fabrics.helpers.functions import parse_symbolic_input
+from fabrics.helpers.templates import finsler_template, geometry_template
+
+
+def test_template_shared():
+    expression = "sym('k') * ca.norm_2(xdot)**2 / ca.norm_2(x)"
+    template = finsler_template(expression, 1)
+    assert finsler_template(expression, 1) is template
+    assert finsler_template(expression, 2) is not template
+    assert geometry_template(expression, 1) is not template
+    assert template.parameter_names() == ['k']
+
+
+def test_template_instantiation():
+    x = ca.SX.sym("x_leaf", 2)
+    xdot = ca.SX.sym("xdot_leaf", 2)
+    expression = "sym('k') * ca.norm_2(xdot)**2 / ca.norm_2(x) ** sym('exp')"
+    new_parameters, (l, M, f, H) = finsler_template(expression, 2).instantiate(
+        x, xdot, name="leaf"
+    )
+    assert sorted(new_parameters.keys()) == ['exp_leaf', 'k_leaf']
+    reference_parameters, l_reference = parse_symbolic_input(
+        expression, x, xdot, name="leaf"
+    )
+    lagrangian = Lagrangian(l_reference, x=x, xdot=xdot)
+    parameters = [new_parameters['k_leaf'], new_parameters['exp_leaf']]
+    reference = [reference_parameters['k_leaf'], reference_parameters['exp_leaf']]
+    function = ca.Function("f", [x, xdot] + parameters, [l, M, f, H])
+    function_reference = ca.Function(
+        "f",
+        [x, xdot] + reference,
+        [l_reference, lagrangian._S.M(), lagrangian._S.f(), lagrangian._H],
+    )
+    arguments = [np.array([0.3, -0.4]), np.array([0.2, 0.5]), 2.0, 1.5]
+    for value, value_reference in zip(function(*arguments), function_reference(*arguments)):
+        np.testing.assert_allclose(np.array(value), np.array(value_reference))
@@ -0,0 +1,46 @@
+import os
+from copy import deepcopy
+
+import pytest
+import yaml
+
+from fabrics.planner.configuration_classes import (
+    ProblemConfiguration,
+    ProblemConfigurationError,
+    configuration_hash,
+)
+
+
+@pytest.fixture
+def problem_configuration():
+    config_file = os.path.join(os.path.dirname(__file__), "planner_config.yaml")
+    with open(config_file, 'r') as config_file:
+        return yaml.safe_load(config_file)['problem']
+
+
+def test_validate(problem_configuration: dict):
+    ProblemConfiguration(**problem_configuration)
+    config = deepcopy(problem_configuration)
+    config['robot_representation']['collision_links'][1] = {'cylinder': {'radius': 0.1}}
+    config['robot_representation']['self_collision_pairs'] = {1: [2]}
+    config['environment']['number_planes'] = -1
+    with pytest.raises(ProblemConfigurationError) as error:
+        ProblemConfiguration(**config)
+    message = str(error.value)
+    assert "Unknown primitive 'cylinder'" in message
+    assert "Self collision link 2" in message
+    assert "number_planes" in message
+    config = deepcopy(problem_configuration)
+    del config['joint_limits']
+    with pytest.raises(ProblemConfigurationError):
+        ProblemConfiguration(**config)
+
+
+def test_configuration_hash(problem_configuration: dict):
+    config = deepcopy(problem_configuration)
+    assert configuration_hash(config) == ProblemConfiguration(**problem_configuration).hash()
+    config['robot_representation']['collision_links'] = {'1': {'sphere': {'radius': 0.1}}}
+    config['joint_limits']['lower_limits'] = tuple(config['joint_limits']['lower_limits'])
+    assert configuration_hash(config) == configuration_hash(problem_configuration)
+    config['joint_limits']['lower_limits'] = [-2.0, -1.5]
+    assert configuration_hash(config) != configuration_hash(problem_configuration)
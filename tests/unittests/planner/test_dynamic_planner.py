@@ -1,4 +1,5 @@
 import pytest
+import casadi as ca
 import numpy as np
 
 from mpscenes.goals.goal_composition import GoalComposition
@@ -56,3 +57,157 @@ def test_compute_action(planner: ParameterizedFabricPlanner, goal):
     assert qddot.size == 2
     assert qddot.shape == (2,)
     assert qddot[0] == pytest.approx(0.836409, rel=1e-3)
+
+def test_compute_action_spline_in_graph():
+    goal_dict = {
+        "subgoal0": {
+            "weight": 1.0,
+            "is_primary_goal": True,
+            "indices": [0, 1],
+            "parent_link": 0,
+            "child_link": 2,
+            "trajectory": {
+                "degree": 2,
+                "controlPoints": [[0.0, 0.0], [1.0, 2.0], [2.0, -1.0], [3.0, 0.5]],
+                "duration": 10.0,
+            },
+            "epsilon": 0.15,
+            "type": "splineSubGoal",
+        }
+    }
+    goal = GoalComposition(name="goal", content_dict=goal_dict)
+    control_points = np.array(goal_dict["subgoal0"]["trajectory"]["controlPoints"])
+    arguments = dict(
+        q=np.array([0.5, 0.1]), qdot=np.array([0.1, -0.2]),
+        weight_goal_0=np.array([1.0]),
+        x_obst_0=np.array([1.0, 0.2]),
+        radius_body_1=np.array([0.5]),
+        radius_obst_0=np.array([0.5])
+    )
+    spline_planner = ParameterizedFabricPlanner(2, PointFk())
+    spline_planner.set_components(collision_links=[1], goal=goal, spline_goals_in_graph=True)
+    spline_planner.concretize()
+    assert 'x_ref_goal_0_leaf' not in spline_planner.variables.parameters()
+    qddot = spline_planner.compute_action(
+        control_points_goal_0=control_points,
+        duration_goal_0=np.array([10.0]),
+        t=np.array([4.0]),
+        **arguments,
+    )
+    reference_planner = ParameterizedFabricPlanner(2, PointFk())
+    reference_planner.set_components(collision_links=[1], goal=goal)
+    reference_planner.concretize()
+    leaf = spline_planner.leaves['goal_0_leaf']
+    reference_function = ca.Function(
+        "references",
+        list(leaf.spline_parameters().values()),
+        [reference for _, reference in leaf.reference_substitutions().values()],
+    )
+    x_ref, xdot_ref, xddot_ref = reference_function(control_points, 10.0, 4.0)
+    qddot_reference = reference_planner.compute_action(
+        x_ref_goal_0_leaf=np.array(x_ref)[:, 0],
+        xdot_ref_goal_0_leaf=np.array(xdot_ref)[:, 0],
+        xddot_ref_goal_0_leaf=np.array(xddot_ref)[:, 0],
+        **arguments,
+    )
+    assert qddot == pytest.approx(qddot_reference)
+    assert np.array(x_ref)[:, 0] == pytest.approx(goal.sub_goals()[0].position(t=4.0))
+
+def test_rollout_spline_in_graph():
+    goal_dict = {
+        "subgoal0": {
+            "weight": 1.0,
+            "is_primary_goal": True,
+            "indices": [0, 1],
+            "parent_link": 0,
+            "child_link": 2,
+            "trajectory": {
+                "degree": 2,
+                "controlPoints": [[0.0, 0.0], [1.0, 2.0], [2.0, -1.0], [3.0, 0.5]],
+                "duration": 10.0,
+            },
+            "epsilon": 0.15,
+            "type": "splineSubGoal",
+        }
+    }
+    goal = GoalComposition(name="goal", content_dict=goal_dict)
+    arguments = dict(
+        control_points_goal_0=np.array(goal_dict["subgoal0"]["trajectory"]["controlPoints"]),
+        duration_goal_0=np.array([10.0]),
+        weight_goal_0=np.array([1.0]),
+        x_obst_0=np.array([1.0, 0.2]),
+        radius_body_1=np.array([0.5]),
+        radius_obst_0=np.array([0.5])
+    )
+    planner = ParameterizedFabricPlanner(2, PointFk())
+    planner.set_components(collision_links=[1], goal=goal, spline_goals_in_graph=True)
+    planner.concretize()
+    dt = 0.05
+    rollout = planner.rollout_function(4, dt, batch_size=2)
+    q_0 = np.array([[0.5, -0.2], [0.1, 0.3]])
+    qdot_0 = np.array([[0.1, 0.0], [-0.2, 0.0]])
+    trajectory = rollout.evaluate(q=q_0, qdot=qdot_0, t=np.array([2.0]), **arguments)
+    for b in range(2):
+        q = q_0[:, b]
+        qdot = qdot_0[:, b]
+        for k in range(4):
+            qddot = planner.compute_action(q=q, qdot=qdot, t=np.array([2.0 + k * dt]), **arguments)
+            q, qdot = q + dt * qdot, qdot + dt * qddot
+            assert trajectory['q_trajectory'][:, k + 4 * b] == pytest.approx(q)
+            assert trajectory['qdot_trajectory'][:, k + 4 * b] == pytest.approx(qdot)
+
+@pytest.mark.parametrize("prediction", ["constant_velocity", "constant_acceleration"])
+def test_dynamic_obstacle_prediction(prediction: str):
+    goal_dict = {
+        "subgoal0": {
+            "weight": 1.0,
+            "is_primary_goal": True,
+            "indices": [0, 1],
+            "parent_link": 0,
+            "child_link": 2,
+            "desired_position": [-4.0, 1.0],
+            "epsilon": 0.15,
+            "type": "staticSubGoal",
+        }
+    }
+    goal = GoalComposition(name="goal", content_dict=goal_dict)
+    components = dict(
+        collision_links=[1], goal=goal, number_obstacles=0,
+        number_dynamic_obstacles=1, dynamic_obstacle_dimension=2,
+    )
+    predicting_planner = ParameterizedFabricPlanner(2, PointFk())
+    predicting_planner.set_components(dynamic_obstacle_prediction=prediction, **components)
+    predicting_planner.concretize()
+    reference_planner = ParameterizedFabricPlanner(2, PointFk())
+    reference_planner.set_components(**components)
+    reference_planner.concretize()
+    arguments = dict(
+        q=np.array([0.5, 0.1]), qdot=np.array([0.1, -0.2]),
+        x_goal_0=np.array([-4.0, 1.0]), weight_goal_0=np.array([1.0]),
+        radius_body_1=np.array([0.5]), radius_obst_dynamic_0=np.array([0.5]),
+    )
+    x_obst = np.array([1.5, 0.4])
+    xdot_obst = np.array([-0.3, 0.1])
+    xddot_obst = np.array([0.2, -0.5])
+    dt = 0.4
+    if prediction == "constant_velocity":
+        xddot_obst_predicted = np.zeros(2)
+        observed_acceleration = {}
+    else:
+        xddot_obst_predicted = xddot_obst
+        observed_acceleration = {'xddot_obst_dynamic_0': xddot_obst}
+    qddot = predicting_planner.compute_action(
+        x_obst_dynamic_0=x_obst,
+        xdot_obst_dynamic_0=xdot_obst,
+        t_obst_dynamic=[np.array([1.0])],
+        t=np.array([1.0 + dt]),
+        **observed_acceleration,
+        **arguments,
+    )
+    qddot_reference = reference_planner.compute_action(
+        x_obst_dynamic_0=x_obst + dt * xdot_obst + 0.5 * dt ** 2 * xddot_obst_predicted,
+        xdot_obst_dynamic_0=xdot_obst + dt * xddot_obst_predicted,
+        xddot_obst_dynamic_0=xddot_obst_predicted,
+        **arguments,
+    )
+    assert qddot == pytest.approx(qddot_reference)
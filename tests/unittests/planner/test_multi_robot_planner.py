@@ -0,0 +1,182 @@
+import casadi as ca
+import numpy as np
+import pytest
+from forwardkinematics.urdfFks.generic_urdf_fk import GenericURDFFk
+from forwardkinematics.urdfFks.urdfFk import LinkNotInURDFError
+
+from fabrics.helpers.composite_kinematics import CompositeForwardKinematics
+from fabrics.planner.multi_robot_planner import MultiRobotFabricPlanner
+
+URDF = """<?xml version="1.0"?>
+<robot name="arm">
+  <link name="base_link"/>
+  <link name="link_1"/>
+  <link name="link_2"/>
+  <link name="tool"/>
+  <joint name="joint_1" type="revolute">
+    <parent link="base_link"/>
+    <child link="link_1"/>
+    <origin xyz="0 0 0.1" rpy="0 0 0"/>
+    <axis xyz="0 0 1"/>
+    <limit lower="-3" upper="3" effort="1" velocity="1"/>
+  </joint>
+  <joint name="joint_2" type="revolute">
+    <parent link="link_1"/>
+    <child link="link_2"/>
+    <origin xyz="0 0 0.2" rpy="0 0 0"/>
+    <axis xyz="0 1 0"/>
+    <limit lower="-2" upper="2" effort="1" velocity="1"/>
+  </joint>
+  <joint name="joint_tool" type="fixed">
+    <parent link="link_2"/>
+    <child link="tool"/>
+    <origin xyz="0.3 0 0" rpy="0 0 0"/>
+  </joint>
+</robot>
+"""
+
+
+def arm_kinematics(x_position: float) -> GenericURDFFk:
+    forward_kinematics = GenericURDFFk(URDF, root_link="base_link", end_links=["tool"])
+    mount_transformation = np.identity(4)
+    mount_transformation[0, 3] = x_position
+    forward_kinematics.set_mount_transformation(mount_transformation)
+    return forward_kinematics
+
+
+@pytest.fixture
+def robots():
+    return {"left": arm_kinematics(0.0), "right": arm_kinematics(0.5)}
+
+
+@pytest.fixture
+def problem_configuration():
+    sub_goal = {
+        "desired_position": [0.2, 0.2, 0.3],
+        "epsilon": 0.05,
+        "indices": [0, 1, 2],
+        "type": "staticSubGoal",
+        "weight": 1.0,
+    }
+    return {
+        "environment": {
+            "number_spheres": {"static": 1, "dynamic": 0},
+            "number_cuboids": {"static": 0, "dynamic": 0},
+            "number_planes": 0,
+        },
+        "goal": {
+            "goal_definition": {
+                "subgoal0": dict(
+                    sub_goal,
+                    child_link="left_tool",
+                    parent_link="left_base_link",
+                    is_primary_goal=True,
+                ),
+                "subgoal1": dict(
+                    sub_goal,
+                    child_link="right_tool",
+                    parent_link="right_base_link",
+                    is_primary_goal=False,
+                ),
+            }
+        },
+        "joint_limits": {
+            "lower_limits": [-3, -2, -3, -2],
+            "upper_limits": [3, 2, 3, 2],
+        },
+        "robot_representation": {
+            "collision_links": {
+                "left_link_2": {"capsule": {"radius": 0.05, "length": 0.2}},
+                "left_tool": {"sphere": {"radius": 0.05}},
+                "right_link_2": {"capsule": {"radius": 0.05, "length": 0.2}},
+                "right_tool": {"sphere": {"radius": 0.05}},
+            },
+            "self_collision_pairs": {},
+        },
+    }
+
+
+def test_composite_kinematics(robots):
+    forward_kinematics = CompositeForwardKinematics(robots)
+    assert forward_kinematics.n() == 4
+    assert forward_kinematics.robot_indices("right") == slice(2, 4)
+    q = ca.SX.sym("q", 4)
+    q_value = np.array([0.1, 0.2, -0.3, 0.4])
+    fk_right = ca.Function("fk", [q], [forward_kinematics.casadi(q, "right_tool")])
+    fk_right_robot = ca.Function("fk", [q], [robots["right"].casadi(q[2:4], "tool")])
+    fk_left = ca.Function("fk", [q], [forward_kinematics.casadi(q, "left_tool")])
+    fk_relative = ca.Function(
+        "fk", [q], [forward_kinematics.casadi(q, "right_tool", parent_link="left_tool")]
+    )
+    assert np.array(fk_right(q_value)) == pytest.approx(np.array(fk_right_robot(q_value)))
+    q_same = np.array([0.1, 0.2, 0.1, 0.2])
+    assert np.array(fk_right(q_same))[0, 3] == pytest.approx(0.5 + np.array(fk_left(q_same))[0, 3])
+    relative = np.dot(np.linalg.inv(np.array(fk_left(q_value))), np.array(fk_right(q_value)))
+    assert np.array(fk_relative(q_value)) == pytest.approx(relative)
+    with pytest.raises(LinkNotInURDFError):
+        forward_kinematics.casadi(q, "tool")
+
+
+def test_multi_robot_planner(robots, problem_configuration):
+    planner = MultiRobotFabricPlanner(robots)
+    planner.load_problem_configuration(problem_configuration)
+    planner.concretize()
+    inter_robot_leaves = [
+        "left_link_2_right_link_2_leaf",
+        "left_link_2_right_tool_leaf",
+        "left_tool_right_tool_leaf",
+        "right_link_2_left_tool_leaf",
+    ]
+    for leaf_name in inter_robot_leaves:
+        assert leaf_name in planner.leaves
+    assert "left_link_2_left_tool_leaf" not in planner.leaves
+    q = planner.stack(left=np.array([0.1, 0.2]), right=np.array([-0.3, 0.4]))
+    action = planner.compute_action(
+        q=q,
+        qdot=np.zeros(4),
+        x_goal_0=np.array([0.2, 0.2, 0.3]),
+        weight_goal_0=1.0,
+        x_goal_1=np.array([0.2, -0.2, 0.3]),
+        weight_goal_1=1.0,
+        x_obst_0=np.array([5.0, 5.0, 5.0]),
+        radius_obst_0=0.1,
+    )
+    assert action.shape == (4,)
+    assert np.all(np.isfinite(action))
+    actions = planner.split(action)
+    assert actions["right"] == pytest.approx(action[2:4])
+
+
+def test_inter_robot_collision_avoidance(robots, problem_configuration):
+    planner = MultiRobotFabricPlanner(robots)
+    planner.load_problem_configuration(problem_configuration)
+    planner.concretize(diagnostics=True)
+
+    q_sym = ca.SX.sym("q", 4)
+    fk_left = robots["left"].casadi(q_sym[0:2], "tool", position_only=True)
+    fk_right = robots["right"].casadi(q_sym[2:4], "tool", position_only=True)
+    tool_distance = ca.Function("tool_distance", [q_sym], [ca.norm_2(fk_left - fk_right) - 0.1])
+
+    # the right tool swings towards the left tool, 1 cm between the spheres
+    q = planner.stack(left=np.array([0.05, 0.2]), right=np.array([2.8, 0.2]))
+    qdot = planner.stack(left=np.zeros(2), right=np.array([0.5, 0.0]))
+    arguments = dict(
+        q=q,
+        qdot=qdot,
+        x_goal_0=np.array([0.2, 0.2, 0.3]),
+        weight_goal_0=1.0,
+        x_goal_1=np.array([0.2, -0.2, 0.3]),
+        weight_goal_1=1.0,
+        x_obst_0=np.array([5.0, 5.0, 5.0]),
+        radius_obst_0=0.1,
+    )
+    diagnostics = planner.compute_diagnostics(**arguments)["left_tool_right_tool_leaf"]
+    time_step = 1e-6
+    assert diagnostics["x"][0] == pytest.approx(float(tool_distance(q)))
+    assert 0.0 < diagnostics["x"][0] < 0.02
+    assert diagnostics["xdot"][0] == pytest.approx(
+        float(tool_distance(q + time_step * qdot) - tool_distance(q)) / time_step, rel=1e-4
+    )
+    assert diagnostics["xdot"][0] < 0.0
+    # the leaf accelerates the tools apart
+    assert diagnostics["h"][0] < 0.0
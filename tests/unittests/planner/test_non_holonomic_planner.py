@@ -0,0 +1,179 @@
+import numpy as np
+import pytest
+from forwardkinematics.urdfFks.generic_urdf_fk import GenericURDFFk
+from mpscenes.goals.goal_composition import GoalComposition
+
+from fabrics.planner.non_holonomic_parameterized_planner import NonHolonomicParameterizedFabricPlanner
+from fabrics.planner.parameterized_planner import DiagnosticsNotConcretizedError, FrozenPlannerError
+
+URDF = """<?xml version="1.0"?>
+<robot name="diff_drive">
+  <link name="base_link"/>
+  <link name="ee_link"/>
+  <joint name="ee_joint" type="fixed">
+    <parent link="base_link"/>
+    <child link="ee_link"/>
+    <origin xyz="0.2 0 0.1" rpy="0 0 0"/>
+  </joint>
+</robot>
+"""
+
+
+@pytest.fixture
+def forward_kinematics():
+    return GenericURDFFk(
+        URDF, root_link="base_link", end_links=["ee_link"], base_type="diffdrive"
+    )
+
+
+@pytest.fixture
+def goal():
+    goal_dict = {
+        "subgoal0": {
+            "weight": 1.0,
+            "is_primary_goal": True,
+            "indices": [0, 1],
+            "parent_link": "base_link",
+            "child_link": "ee_link",
+            "desired_position": [4.0, -0.2],
+            "epsilon": 0.1,
+            "type": "staticSubGoal",
+        }
+    }
+    return GoalComposition(name="goal", content_dict=goal_dict)
+
+
+@pytest.fixture
+def planner(forward_kinematics, goal: GoalComposition):
+    planner = NonHolonomicParameterizedFabricPlanner(
+        3, forward_kinematics, l_offset="0.1/ca.norm_2(xdot)"
+    )
+    planner.set_components(collision_links=["ee_link"], goal=goal, number_obstacles=1)
+    return planner
+
+
+@pytest.fixture
+def arguments():
+    return dict(
+        q=np.array([0.1, 0.2, 0.3]),
+        qdot=np.array([0.1, 0.2, 0.3]),
+        qudot=np.array([0.3, 0.1]),
+        x_goal_0=np.array([4.0, -0.2]),
+        weight_goal_0=0.5,
+        x_obst_0=np.array([2.0, 0.0, 0.0]),
+        radius_obst_0=0.5,
+        radius_body_ee_link=0.3,
+        m_base_x=1.0,
+        m_base_y=1.0,
+        m_rot=1.0,
+    )
+
+
+def test_extra_terms(planner: NonHolonomicParameterizedFabricPlanner, arguments: dict):
+    planner.concretize(extra_terms=True)
+    extra_terms_function = planner.extra_terms_function()
+    assert planner.extra_terms_function() is extra_terms_function
+    extra_terms = extra_terms_function.evaluate(**arguments)
+    evaluations = planner.evaluate(**arguments)
+    assert evaluations["J_nh"] == pytest.approx(extra_terms["J_nh"])
+    assert evaluations["f_extra"] == pytest.approx(extra_terms["f_extra"])
+    assert evaluations["action"] == pytest.approx(planner.compute_action(**arguments))
+    assert evaluations["J_nh"][2, 1] == 1.0
+    assert evaluations["J_nh"][0, 0] == pytest.approx(np.sin(0.3))
+
+
+
+
+def test_velocity_mode_runtime_time_step(planner: NonHolonomicParameterizedFabricPlanner, arguments: dict):
+    planner.concretize()
+    xddot = planner.compute_action(**arguments)
+    planner.concretize(mode="vel")
+    planner.concretize(mode="vel")
+    assert planner._funs.function().name_in().count("time_step") == 1
+    evaluations = planner.evaluate(time_step=np.array([0.01]), **arguments)
+    assert evaluations["xddot"] == pytest.approx(xddot)
+    assert evaluations["action"] == pytest.approx(arguments["qudot"] + 0.01 * xddot)
+    planner.concretize(mode="vel", time_step=0.01, integrator="rk4", integration_steps=2)
+    assert "time_step" not in planner._funs.function().name_in()
+    action = planner.compute_action(**arguments)
+    assert action == pytest.approx(arguments["qudot"] + 0.01 * xddot, abs=1e-2)
+    assert action != pytest.approx(evaluations["action"], abs=1e-9)
+    with pytest.raises(Exception, match="Unknown mode"):
+        planner.concretize(mode="position")
+
+
+def test_compute_diagnostics(planner: NonHolonomicParameterizedFabricPlanner, arguments: dict):
+    planner.concretize(diagnostics=True)
+    diagnostics = planner.compute_diagnostics(**arguments)
+    assert set(diagnostics.keys()) == set(planner.leaves.keys())
+    assert diagnostics["goal_0_leaf"]["x"].shape == (2,)
+    planner.concretize()
+    with pytest.raises(DiagnosticsNotConcretizedError):
+        planner.compute_diagnostics(**arguments)
+
+
+
+def test_freeze(planner: NonHolonomicParameterizedFabricPlanner, arguments: dict):
+    planner.concretize()
+    action = planner.compute_action(**arguments)
+    planner.freeze()
+    assert planner.compute_action(**arguments) == pytest.approx(action)
+    with pytest.raises(FrozenPlannerError):
+        planner.extra_terms_function()
+    with pytest.raises(FrozenPlannerError):
+        planner.sparsity_statistics()
+
+
+def test_cuboid_obstacle(forward_kinematics, goal: GoalComposition, arguments: dict):
+    planner = NonHolonomicParameterizedFabricPlanner(
+        3, forward_kinematics, l_offset="0.1/ca.norm_2(xdot)"
+    )
+    planner.set_components(
+        collision_links=["ee_link"], goal=goal, number_obstacles=0, number_obstacles_cuboid=1
+    )
+    planner.concretize()
+    del arguments["x_obst_0"], arguments["radius_obst_0"]
+    action = planner.compute_action(
+        x_obst_cuboid_0=np.array([1.0, 0.0, 0.0]),
+        size_obst_cuboid_0=np.array([0.5, 0.5, 0.5]),
+        **arguments,
+    )
+    assert action.shape == (2,)
+    assert "obst_cuboid_0_ee_link_leaf" in planner.leaves
+
+
+def test_spline_goal_in_graph(forward_kinematics, arguments: dict):
+    goal_dict = {
+        "subgoal0": {
+            "weight": 1.0,
+            "is_primary_goal": True,
+            "indices": [0, 1],
+            "parent_link": "base_link",
+            "child_link": "ee_link",
+            "trajectory": {
+                "degree": 2,
+                "controlPoints": [[0.0, 0.0], [1.0, 2.0], [2.0, -1.0], [3.0, 0.5]],
+                "duration": 10.0,
+            },
+            "epsilon": 0.15,
+            "type": "splineSubGoal",
+        }
+    }
+    goal = GoalComposition(name="goal", content_dict=goal_dict)
+    planner = NonHolonomicParameterizedFabricPlanner(
+        3, forward_kinematics, l_offset="0.1/ca.norm_2(xdot)"
+    )
+    planner.set_components(
+        collision_links=["ee_link"], goal=goal, number_obstacles=1, spline_goals_in_graph=True
+    )
+    planner.concretize()
+    assert "x_ref_goal_0_leaf" not in planner.variables.parameters()
+    del arguments["x_goal_0"]
+    arguments.update(
+        control_points_goal_0=np.array(goal_dict["subgoal0"]["trajectory"]["controlPoints"]),
+        duration_goal_0=np.array([10.0]),
+    )
+    action = planner.compute_action(t=np.array([4.0]), **arguments)
+    assert action.shape == (2,)
+    assert np.all(np.isfinite(action))
+    assert planner.compute_action(t=np.array([8.0]), **arguments) != pytest.approx(action)
@@ -1,3 +1,4 @@
+import logging
 import pytest
 import numpy as np
 import os
@@ -5,8 +6,36 @@ import yaml
 
 from mpscenes.goals.goal_composition import GoalComposition
 
-from fabrics.planner.parameterized_planner import ParameterizedFabricPlanner
+from fabrics.diffGeometry.energy import euler_lagrange_cache
+from fabrics.planner.parameterized_planner import (
+    DiagnosticsNotConcretizedError, FrozenPlannerError, LeafNotFoundError,
+    ParameterizedFabricPlanner
+)
+from fabrics.planner.serialized_planner import SerializedFabricPlanner
 from forwardkinematics.planarFks.point_fk import PointFk
+from forwardkinematics.urdfFks.generic_urdf_fk import GenericURDFFk
+
+POINT_URDF = """<?xml version="1.0"?>
+<robot name="point">
+  <link name="base_link"/>
+  <link name="link_x"/>
+  <link name="body"/>
+  <joint name="joint_x" type="prismatic">
+    <parent link="base_link"/>
+    <child link="link_x"/>
+    <origin xyz="0 0 0" rpy="0 0 0"/>
+    <axis xyz="1 0 0"/>
+    <limit lower="-5" upper="5" effort="1" velocity="1"/>
+  </joint>
+  <joint name="joint_y" type="prismatic">
+    <parent link="link_x"/>
+    <child link="body"/>
+    <origin xyz="0 0 0" rpy="0 0 0"/>
+    <axis xyz="0 1 0"/>
+    <limit lower="-5" upper="5" effort="1" velocity="1"/>
+  </joint>
+</robot>
+"""
 
 def test_creation():
     fk = PointFk()
@@ -62,3 +91,439 @@ def test_compute_action(planner: ParameterizedFabricPlanner, goal: GoalCompositi
     assert qddot.size == 2
     assert qddot.shape == (2,)
     assert qddot[0] == pytest.approx(1.116237)
+
+def test_compute_action_static_parameters(planner: ParameterizedFabricPlanner, goal: GoalComposition):
+    planner.set_components(collision_links=[1], goal=goal)
+    planner.concretize(static_parameters=['radius_body_1', 'radius_obst_0', 'weight_goal_0'])
+    arguments = dict(
+        qdot=np.zeros(2), x_goal_0=np.array([1.0, -1.0]), weight_goal_0=np.array([1.0]),
+        x_obst_0=np.array([1.0, 0.2]), radius_body_1=np.array([0.5]), radius_obst_0=np.array([0.5])
+    )
+    qddot = planner.compute_action(q=np.zeros(2), **arguments)
+    assert qddot[0] == pytest.approx(1.116237)
+    parametric_terms = planner._funs._parametric_terms
+    qddot = planner.compute_action(q=np.array([0.1, 0.0]), **arguments)
+    assert planner._funs._parametric_terms is parametric_terms
+    arguments['radius_obst_0'] = np.array([0.6])
+    planner.compute_action(q=np.zeros(2), **arguments)
+    assert planner._funs._parametric_terms is not parametric_terms
+
+def test_velocity_mode_runtime_time_step(planner: ParameterizedFabricPlanner, goal: GoalComposition):
+    planner.set_components(collision_links=[1], goal=goal)
+    planner.concretize(mode='vel')
+    arguments = dict(
+        q=np.zeros(2), qdot=np.zeros(2), x_goal_0=np.array([1.0, -1.0]), weight_goal_0=np.array([1.0]),
+        x_obst_0=np.array([1.0, 0.2]), radius_body_1=np.array([0.5]), radius_obst_0=np.array([0.5])
+    )
+    evaluations = planner.evaluate(time_step=np.array([0.01]), **arguments)
+    assert evaluations['xddot'][0] == pytest.approx(1.116237)
+    assert evaluations['action'][0] == pytest.approx(0.01116237)
+    action = planner.compute_action(time_step=np.array([0.02]), **arguments)
+    assert action[0] == pytest.approx(0.02232474)
+
+def test_velocity_mode_concretized_twice(planner: ParameterizedFabricPlanner, goal: GoalComposition):
+    planner.set_components(collision_links=[1], goal=goal)
+    planner.concretize(mode='vel')
+    planner.concretize(mode='vel')
+    assert planner._funs.function().name_in().count('time_step') == 1
+    assert 'time_step' not in planner.dynamics_function().name_in()
+    planner.concretize(mode='acc')
+    assert 'time_step' not in planner._funs.function().name_in()
+
+def test_velocity_mode_rk4(planner: ParameterizedFabricPlanner, goal: GoalComposition):
+    planner.set_components(collision_links=[1], goal=goal)
+    planner.concretize(mode='vel', time_step=0.01, integrator='rk4')
+    arguments = dict(
+        x_goal_0=np.array([1.0, -1.0]), weight_goal_0=np.array([1.0]),
+        x_obst_0=np.array([1.0, 0.2]), radius_body_1=np.array([0.5]), radius_obst_0=np.array([0.5])
+    )
+    q = np.array([-0.5, 0.0])
+    qdot = np.array([0.3, -0.1])
+    dynamics = planner.dynamics_function()
+    parameters = [arguments[name] for name in dynamics.name_in()[2:]]
+
+    def xddot(q, qdot):
+        return np.array(dynamics(q, qdot, *parameters)).flatten()
+
+    h = 0.01
+    k1 = xddot(q, qdot)
+    k2 = xddot(q + h / 2 * qdot, qdot + h / 2 * k1)
+    k3 = xddot(q + h / 2 * (qdot + h / 2 * k1), qdot + h / 2 * k2)
+    k4 = xddot(q + h * (qdot + h / 2 * k2), qdot + h * k3)
+    qdot_next = qdot + h / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+    action = planner.evaluate(q=q, qdot=qdot, **arguments)['action']
+    assert action == pytest.approx(qdot_next)
+
+def test_rollout_function(planner: ParameterizedFabricPlanner, goal: GoalComposition):
+    planner.set_components(collision_links=[1], goal=goal)
+    planner.concretize(mode='vel', time_step=0.01)
+    arguments = dict(
+        x_goal_0=np.array([1.0, -1.0]), weight_goal_0=np.array([1.0]),
+        x_obst_0=np.array([1.0, 0.2]), radius_body_1=np.array([0.5]), radius_obst_0=np.array([0.5])
+    )
+    rollout = planner.rollout_function(5, 0.01, batch_size=2)
+    q_0 = np.array([[-0.5, -0.2], [0.0, 0.1]])
+    qdot_0 = np.array([[0.3, 0.0], [-0.1, 0.0]])
+    trajectory = rollout.evaluate(q=q_0, qdot=qdot_0, **arguments)
+    assert trajectory['q_trajectory'].shape == (2, 10)
+    for b in range(2):
+        q = q_0[:, b]
+        qdot = qdot_0[:, b]
+        for k in range(5):
+            q, qdot = q + 0.01 * qdot, planner.compute_action(q=q, qdot=qdot, **arguments)
+            assert trajectory['q_trajectory'][:, k + 5 * b] == pytest.approx(q)
+            assert trajectory['qdot_trajectory'][:, k + 5 * b] == pytest.approx(qdot)
+
+def test_compute_action_packed(planner: ParameterizedFabricPlanner, goal: GoalComposition):
+    planner.set_components(collision_links=[1], goal=goal)
+    planner.concretize()
+    inputs = planner.input_struct()
+    assert inputs.q.shape == (2,)
+    assert inputs.buffer.size == sum(getattr(inputs, name).size for name in inputs.names())
+    inputs.update(
+        qdot=np.zeros(2), x_goal_0=np.array([1.0, -1.0]), weight_goal_0=1.0,
+        x_obst_0=np.array([1.0, 0.2]), radius_body_1=np.array([0.5]), radius_obst_0=np.array([0.5])
+    )
+    q_view = inputs.q
+    q_view[:] = [0.0, 0.0]
+    qddot = planner.compute_action_packed(inputs)
+    assert qddot[0] == pytest.approx(1.116237)
+    inputs.q = np.array([0.1, 0.0])
+    assert inputs.q is q_view
+    assert inputs.buffer[0] == 0.1
+    with pytest.raises(AttributeError):
+        inputs.x_unknown = np.zeros(2)
+
+@pytest.mark.parametrize("fold", [False, True])
+def test_bind(planner: ParameterizedFabricPlanner, goal: GoalComposition, fold: bool):
+    planner.set_components(collision_links=[1], goal=goal)
+    planner.concretize()
+    instructions = planner._funs.function().n_instructions()
+    planner.bind(fold=fold, radius_body_links={1: np.array([0.5])}, radius_obst=[np.array([0.5])], weight_goal_0=1.0)
+    qddot = planner.compute_action(
+        q=np.zeros(2), qdot=np.zeros(2), x_goal_0=np.array([1.0, -1.0]), x_obst_0=np.array([1.0, 0.2]),
+    )
+    assert qddot[0] == pytest.approx(1.116237)
+    if fold:
+        assert 'radius_obst_0' not in planner._funs.function().name_in()
+        assert 'weight_goal_0' not in planner.variables.parameters()
+        assert planner._funs.function().n_instructions() < instructions
+
+def test_specialize(planner: ParameterizedFabricPlanner, goal: GoalComposition, tmp_path):
+    planner.set_components(collision_links=[1], goal=goal)
+    planner.concretize()
+    specialized_planner = planner.specialize(radius_body_links={1: np.array([0.5])}, radius_obst_0=0.5)
+    instructions = planner._funs.function().n_instructions()
+    assert specialized_planner._funs.function().n_instructions() < instructions
+    assert 'radius_obst_0' in planner._funs.function().name_in()
+    assert 'radius_obst_0' in planner.variables.parameters()
+    assert 'radius_obst_0' not in specialized_planner.variables.parameters()
+    arguments = dict(
+        q=np.zeros(2), qdot=np.zeros(2), x_goal_0=np.array([1.0, -1.0]), weight_goal_0=np.array([1.0]),
+        x_obst_0=np.array([1.0, 0.2]),
+    )
+    qddot = specialized_planner.compute_action(**arguments)
+    assert qddot[0] == pytest.approx(1.116237)
+    qddot = planner.compute_action(radius_body_1=np.array([0.5]), radius_obst_0=np.array([0.5]), **arguments)
+    assert qddot[0] == pytest.approx(1.116237)
+    file_name = str(tmp_path / "specialized_planner.pbz2")
+    specialized_planner.serialize(file_name)
+    serialized_planner = SerializedFabricPlanner(file_name)
+    assert serialized_planner.compute_action(**arguments)[0] == pytest.approx(1.116237)
+
+def test_specialize_copy_is_independent(planner: ParameterizedFabricPlanner, goal: GoalComposition):
+    planner.set_components(collision_links=[1], goal=goal)
+    planner.concretize()
+    specialized_planner = planner.specialize(radius_obst_0=0.5)
+    leaves = list(specialized_planner.leaves.keys())
+    parameters = list(specialized_planner.variables.parameters().keys())
+    planner.add_spherical_obstacle_geometry('obst_1', '1', planner.get_forward_kinematics(1))
+    planner.concretize()
+    planner.bind(fold=True, radius_body_links={1: np.array([0.5])})
+    assert len(planner.leaves) == len(leaves) + 1
+    assert 'x_obst_1' in planner.variables.parameters()
+    assert list(specialized_planner.leaves.keys()) == leaves
+    assert list(specialized_planner.variables.parameters().keys()) == parameters
+    arguments = dict(
+        q=np.zeros(2), qdot=np.zeros(2), x_goal_0=np.array([1.0, -1.0]), weight_goal_0=np.array([1.0]),
+        x_obst_0=np.array([1.0, 0.2]), radius_body_1=np.array([0.5]),
+    )
+    assert specialized_planner.compute_action(**arguments)[0] == pytest.approx(1.116237)
+    specialized_planner.bind(fold=True, radius_body_links={1: np.array([0.5])})
+    del arguments['radius_body_1']
+    assert specialized_planner.compute_action(**arguments)[0] == pytest.approx(1.116237)
+
+def test_euler_lagrange_cache_instructions(goal: GoalComposition):
+    def build(cse: bool = False) -> ParameterizedFabricPlanner:
+        planner = ParameterizedFabricPlanner(2, PointFk())
+        planner.set_components(collision_links=[1], goal=goal)
+        planner.concretize(cse=cse)
+        return planner
+
+    arguments = dict(
+        q=np.array([0.3, -0.2]), qdot=np.array([0.5, 0.1]),
+        x_goal_0=np.array([1.0, -1.0]), weight_goal_0=np.array([1.0]),
+        x_obst_0=np.array([1.0, 0.2]), radius_body_1=np.array([0.5]),
+        radius_obst_0=np.array([0.5])
+    )
+    assert not euler_lagrange_cache.enabled()
+    maxsize = euler_lagrange_cache.maxsize()
+    euler_lagrange_cache.clear()
+    try:
+        reference = build()
+        assert len(euler_lagrange_cache) == 0
+        euler_lagrange_cache.resize(128)
+        build()
+        cache_size = len(euler_lagrange_cache)
+        planner = build(cse=True)
+        assert len(euler_lagrange_cache) == cache_size
+    finally:
+        euler_lagrange_cache.resize(maxsize)
+    n_instructions = planner._funs.function().n_instructions()
+    assert n_instructions <= reference._funs.function().n_instructions()
+    assert planner.compute_action(**arguments) == pytest.approx(
+        reference.compute_action(**arguments)
+    )
+
+def test_sparsity_statistics(planner: ParameterizedFabricPlanner, goal: GoalComposition):
+    planner.set_components(collision_links=[1], goal=goal)
+    statistics = planner.sparsity_statistics()
+    assert statistics['root']['M']['numel'] == 4
+    assert 'goal_0_leaf' in statistics['leaves']
+    assert statistics['leaves']['obst_0_1_leaf']['nnz'] <= 2
+
+def test_compute_diagnostics(planner: ParameterizedFabricPlanner, goal: GoalComposition):
+    planner.set_components(collision_links=[1], goal=goal)
+    planner.concretize(diagnostics=True)
+    arguments = dict(
+        q=np.array([0.3, -0.2]), qdot=np.array([0.5, 0.1]),
+        x_goal_0=np.array([1.0, -1.0]), weight_goal_0=np.array([1.0]),
+        x_obst_0=np.array([1.0, 0.2]), radius_body_1=np.array([0.5]),
+        radius_obst_0=np.array([0.5])
+    )
+    diagnostics = planner.compute_diagnostics(**arguments)
+    assert set(diagnostics.keys()) == set(planner.leaves.keys())
+    goal_diagnostics = diagnostics['goal_0_leaf']
+    assert goal_diagnostics['x'] == pytest.approx(arguments['q'] - arguments['x_goal_0'])
+    assert goal_diagnostics['xdot'] == pytest.approx(arguments['qdot'])
+    assert goal_diagnostics['M'].shape == (2, 2)
+    obstacle_leaf = planner.leaves['obst_0_1_leaf']
+    obstacle_leaf.concretize()
+    leaf_arguments = {
+        name: arguments[name] for name in ['q', 'qdot', 'x_obst_0', 'radius_obst_0', 'radius_body_1']
+    }
+    leaf_evaluation = obstacle_leaf.evaluate(**leaf_arguments)
+    obstacle_diagnostics = diagnostics['obst_0_1_leaf']
+    assert obstacle_diagnostics['x'] == pytest.approx(leaf_evaluation['x'])
+    assert obstacle_diagnostics['xdot'] == pytest.approx(leaf_evaluation['xdot'])
+    assert sorted(obstacle_diagnostics.keys()) == ['M', 'energy', 'f', 'h', 'x', 'xdot']
+
+@pytest.mark.parametrize("method", ["bind", "fold", "specialize"])
+def test_compute_diagnostics_constant_parameters(planner: ParameterizedFabricPlanner, goal: GoalComposition, method: str):
+    reference_planner = ParameterizedFabricPlanner(2, PointFk())
+    for fabric_planner in [planner, reference_planner]:
+        fabric_planner.set_components(collision_links=[1], goal=goal)
+        fabric_planner.concretize(diagnostics=True)
+    constants = dict(radius_body_1=np.array([0.5]), radius_obst_0=np.array([0.5]))
+    arguments = dict(
+        q=np.array([0.3, -0.2]), qdot=np.array([0.5, 0.1]),
+        x_goal_0=np.array([1.0, -1.0]), weight_goal_0=np.array([1.0]),
+        x_obst_0=np.array([1.0, 0.2]),
+    )
+    reference = reference_planner.compute_diagnostics(**arguments, **constants)
+    if method == "specialize":
+        diagnostics_planner = planner.specialize(**constants)
+        assert diagnostics_planner._diagnostics is not planner._diagnostics
+        assert planner.compute_diagnostics(**arguments, **constants)['obst_0_1_leaf']['x'] == pytest.approx(
+            reference['obst_0_1_leaf']['x']
+        )
+    else:
+        planner.bind(fold=method == "fold", **constants)
+        diagnostics_planner = planner
+    diagnostics = diagnostics_planner.compute_diagnostics(**arguments)
+    for leaf_name, leaf_diagnostics in reference.items():
+        for quantity, value in leaf_diagnostics.items():
+            assert diagnostics[leaf_name][quantity] == pytest.approx(value)
+
+def test_compute_diagnostics_not_concretized(planner: ParameterizedFabricPlanner, goal: GoalComposition):
+    planner.set_components(collision_links=[1], goal=goal)
+    with pytest.raises(DiagnosticsNotConcretizedError):
+        planner.compute_diagnostics(q=np.zeros(2), qdot=np.zeros(2))
+    planner.concretize(diagnostics=True)
+    planner.concretize()
+    with pytest.raises(DiagnosticsNotConcretizedError):
+        planner.compute_diagnostics(q=np.zeros(2), qdot=np.zeros(2))
+
+def test_esdf_jdot_estimator():
+    goal_dict = {
+        "subgoal0": {
+            "weight": 1.0,
+            "is_primary_goal": True,
+            "indices": [0, 1],
+            "parent_link": "base_link",
+            "child_link": "body",
+            "desired_position": [-4.0, 1.0],
+            "epsilon": 0.15,
+            "type": "staticSubGoal",
+        }
+    }
+    goal = GoalComposition(name="goal", content_dict=goal_dict)
+    fk = GenericURDFFk(POINT_URDF, root_link="base_link", end_links=["body"])
+    planner = ParameterizedFabricPlanner(2, fk)
+    planner.set_components(collision_links_esdf=['body'], goal=goal)
+    planner.concretize()
+    arguments = dict(
+        q=np.array([0.2, 0.1]), qdot=np.array([0.3, -0.2]),
+        x_goal_0=np.array([1.0, -1.0]), weight_goal_0=np.array([1.0]),
+        radius_body_body=np.array([0.5]), esdf_phi_body=0.8,
+        esdf_J_body=np.array([0.6, 0.8, 0.0]),
+    )
+    hessian = np.diag([0.5, 1.0, 0.0])
+    estimator = planner.esdf_jdot_estimator('body', time_step=0.1)
+    Jdot = estimator.Jdot(
+        arguments['q'], arguments['qdot'], arguments['esdf_J_body'], hessian=hessian
+    )
+    assert np.linalg.norm(Jdot) > 0
+    action_explicit = planner.compute_action(esdf_Jdot_body=Jdot, **arguments)
+    action_estimated = planner.compute_action(esdf_H_body=hessian, **arguments)
+    assert action_estimated == pytest.approx(action_explicit)
+    action_zero = planner.compute_action(esdf_Jdot_body=np.zeros(2), **arguments)
+    assert action_zero != pytest.approx(action_explicit)
+    planner.compute_action(**arguments)
+
+def test_joint_limits_geometry(goal: GoalComposition):
+    limits = [[-1.0, 1.0], [-2.0, 0.5]]
+    arguments = dict(
+        q=np.array([0.8, -1.8]), qdot=np.array([0.5, -0.3]),
+        x_goal_0=np.array([1.0, -1.0]), weight_goal_0=np.array([1.0]),
+    )
+    planner = ParameterizedFabricPlanner(2, PointFk())
+    planner.set_components(goal=goal, limits=limits)
+    assert 'joint_limits_leaf' in planner.leaves
+    planner.concretize()
+    per_limit_planner = ParameterizedFabricPlanner(2, PointFk())
+    for joint_index, joint_limits in enumerate(limits):
+        per_limit_planner.add_limit_geometry(joint_index, joint_limits)
+    per_limit_planner.set_components(goal=goal)
+    per_limit_planner.concretize()
+    assert planner.compute_action(**arguments) == pytest.approx(
+        per_limit_planner.compute_action(**arguments)
+    )
+    assert planner.sparsity_statistics()['leaves']['joint_limits_leaf']['nnz'] == 4
+    planner.concretize_diagnostics()
+    limits_diagnostics = planner.compute_diagnostics(**arguments)['joint_limits_leaf']
+    assert limits_diagnostics['x'] == pytest.approx([1.8, 0.2, 0.2, 2.3])
+
+def test_joint_limits_diagnostics(goal: GoalComposition):
+    limits = [[-1.0, 1.0], [-2.0, 0.5]]
+    arguments = dict(
+        q=np.array([0.8, -1.8]), qdot=np.array([0.5, -0.3]),
+        x_goal_0=np.array([1.0, -1.0]), weight_goal_0=np.array([1.0]),
+    )
+    planner = ParameterizedFabricPlanner(2, PointFk())
+    planner.set_components(goal=goal, limits=limits)
+    planner.concretize(diagnostics=True)
+    limits_diagnostics = planner.compute_diagnostics(**arguments)['joint_limits_leaf']
+    per_limit_planner = ParameterizedFabricPlanner(2, PointFk(), closed_form_joint_limits=False)
+    per_limit_planner.set_components(goal=goal, limits=limits)
+    per_limit_planner.concretize(diagnostics=True)
+    per_limit_diagnostics = per_limit_planner.compute_diagnostics(**arguments)
+    limit_names = [f"limit_joint_{i}_{j}_leaf" for j in range(2) for i in range(2)]
+    def per_limit(quantity):
+        return np.concatenate(
+            [np.ravel(per_limit_diagnostics[name][quantity]) for name in limit_names]
+        )
+    for quantity in ['x', 'xdot', 'h', 'f']:
+        assert limits_diagnostics[quantity] == pytest.approx(per_limit(quantity))
+    assert limits_diagnostics['M'].shape == (4, 4)
+    assert np.diag(limits_diagnostics['M']) == pytest.approx(per_limit('M'))
+    assert np.sum(limits_diagnostics['energy']) == pytest.approx(np.sum(per_limit('energy')))
+
+def test_compute_diagnostics_dynamic_leaves(caplog):
+    planner = ParameterizedFabricPlanner(2, PointFk())
+    dynamic_goal = GoalComposition(name="goal", content_dict={
+        "subgoal0": {
+            "weight": 1.0, "is_primary_goal": True, "indices": [0, 1],
+            "parent_link": 0, "child_link": 1, "type": "analyticSubGoal",
+            "trajectory": ["0.1 * t", "0.0"], "epsilon": 0.15,
+        }
+    })
+    planner.set_components(goal=dynamic_goal)
+    with caplog.at_level(logging.WARNING):
+        planner.concretize(diagnostics=True)
+    assert "goal_0_leaf" in caplog.text
+
+def test_joint_limits_per_limit_leaves(goal: GoalComposition):
+    limits = [[-1.0, 1.0], [-2.0, 0.5]]
+    planner = ParameterizedFabricPlanner(2, PointFk(), closed_form_joint_limits=False)
+    planner.set_components(goal=goal, limits=limits)
+    lower_limit_leaf, upper_limit_leaf = planner.get_leaves(
+        ['limit_joint_1_0_leaf', 'limit_joint_1_1_leaf']
+    )
+    assert 'joint_limits_leaf' not in planner.leaves
+    closed_form_planner = ParameterizedFabricPlanner(2, PointFk())
+    closed_form_planner.set_components(goal=goal, limits=limits)
+    with pytest.raises(LeafNotFoundError, match="closed_form_joint_limits"):
+        closed_form_planner.get_leaves(['limit_joint_1_0_leaf'])
+
+def test_joint_limits_geometry_runtime_parameters(goal: GoalComposition):
+    limits = [[-1.0, 1.0], [-2.0, 0.5]]
+    limit_geometry = "-sym('limit_gain') / (x ** 1) * xdot ** 2"
+    arguments = dict(
+        q=np.array([0.8, -1.8]), qdot=np.array([0.5, -0.3]),
+        x_goal_0=np.array([1.0, -1.0]), weight_goal_0=np.array([1.0]),
+        limit_gain_limit_joint_0_0_leaf=0.1, limit_gain_limit_joint_0_1_leaf=0.3,
+        limit_gain_limit_joint_1_0_leaf=0.2, limit_gain_limit_joint_1_1_leaf=0.4,
+    )
+    planner = ParameterizedFabricPlanner(2, PointFk(), limit_geometry=limit_geometry)
+    planner.set_components(goal=goal, limits=limits)
+    assert planner.leaves['joint_limits_leaf'].map() is None
+    planner.concretize()
+    per_limit_planner = ParameterizedFabricPlanner(2, PointFk(), limit_geometry=limit_geometry)
+    for joint_index, joint_limits in enumerate(limits):
+        per_limit_planner.add_limit_geometry(joint_index, joint_limits)
+    per_limit_planner.set_components(goal=goal)
+    per_limit_planner.concretize()
+    assert sorted(planner._funs.function().name_in()) == sorted(
+        per_limit_planner._funs.function().name_in()
+    )
+    assert planner.compute_action(**arguments) == pytest.approx(
+        per_limit_planner.compute_action(**arguments)
+    )
+
+def test_freeze(planner: ParameterizedFabricPlanner, goal: GoalComposition):
+    from fabrics.helpers.casadiFunctionWrapper import ReleasedExpressionsError
+    planner.set_components(collision_links=[1], goal=goal)
+    planner.concretize()
+    arguments = dict(
+        q=np.zeros(2), qdot=np.zeros(2), x_goal_0=np.array([1.0, -1.0]),
+        weight_goal_0=np.array([1.0]), x_obst_0=np.array([1.0, 0.2]),
+        radius_body_1=np.array([0.5]), radius_obst_0=np.array([0.5])
+    )
+    reclaimed_memory = planner.freeze()
+    assert reclaimed_memory is None or isinstance(reclaimed_memory, int)
+    assert len(euler_lagrange_cache) == 0
+    assert not hasattr(planner, 'leaves')
+    assert not hasattr(planner, '_geometry')
+    assert planner.compute_action(**arguments)[0] == pytest.approx(1.116237)
+    inputs = planner.input_struct()
+    inputs.update(**arguments)
+    assert planner.compute_action_packed(inputs)[0] == pytest.approx(1.116237)
+    with pytest.raises(ReleasedExpressionsError):
+        planner.bind(fold=True, radius_body_1=0.5)
+    with pytest.raises(FrozenPlannerError):
+        planner.concretize()
+    with pytest.raises(FrozenPlannerError):
+        planner.specialize(radius_body_1=0.5)
+    with pytest.raises(FrozenPlannerError):
+        planner.sparsity_statistics()
+    with pytest.raises(FrozenPlannerError):
+        planner.variables
+    with pytest.raises(FrozenPlannerError):
+        planner.get_leaves(['goal_0_leaf'])
+    with pytest.raises(FrozenPlannerError):
+        planner.get_forward_kinematics(1)
+    with pytest.raises(FrozenPlannerError):
+        planner.set_components(goal=goal)
+    with pytest.raises(FrozenPlannerError):
+        planner.rollout_function(5, 0.01)
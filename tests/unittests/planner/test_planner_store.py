@@ -0,0 +1,111 @@
+import os
+
+import numpy as np
+import pytest
+import yaml
+from forwardkinematics.planarFks.point_fk import PointFk
+from forwardkinematics.urdfFks.generic_urdf_fk import GenericURDFFk
+
+from fabrics.planner.parameterized_planner import ParameterizedFabricPlanner
+from fabrics.planner.planner_store import PlannerStore
+from fabrics.planner.serialized_planner import SerializedFabricPlanner
+
+
+@pytest.fixture
+def problem_configuration():
+    config_file = os.path.join(os.path.dirname(__file__), "planner_config.yaml")
+    with open(config_file, 'r') as config_file:
+        return yaml.safe_load(config_file)['problem']
+
+
+def test_load_or_build(problem_configuration: dict, tmp_path):
+    store = PlannerStore(str(tmp_path))
+    planner = ParameterizedFabricPlanner(2, PointFk())
+    key = planner.configuration_hash(problem_configuration, "point_robot", {})
+    assert not store.contains(key)
+    built_planner = store.load_or_build(planner, problem_configuration, "point_robot")
+    assert isinstance(built_planner, SerializedFabricPlanner)
+    assert store.contains(key)
+    assert os.listdir(tmp_path) == [f"{key}.pbz2"]
+    modification_time = os.path.getmtime(store.path(key))
+    other_planner = ParameterizedFabricPlanner(2, PointFk())
+    loaded_planner = store.load_or_build(other_planner, problem_configuration, "point_robot")
+    assert os.path.getmtime(store.path(key)) == modification_time
+    assert not hasattr(other_planner, '_funs')
+    assert loaded_planner._funs.function().name_in() == built_planner._funs.function().name_in()
+    other_key = planner.configuration_hash(problem_configuration, "point_robot", {'mode': 'vel'})
+    assert other_key != key
+
+
+def test_store_failure_removes_temporary_file(tmp_path):
+    store = PlannerStore(str(tmp_path))
+    planner = ParameterizedFabricPlanner(2, PointFk())
+    with pytest.raises(AttributeError):
+        store.store("key", planner)
+    assert os.listdir(tmp_path) == []
+
+
+URDF = """<?xml version="1.0"?>
+<robot name="point">
+  <link name="base_link"/>
+  <link name="link_x"/>
+  <link name="body"/>
+  <link name="tool"/>
+  <joint name="joint_x" type="prismatic">
+    <parent link="base_link"/>
+    <child link="link_x"/>
+    <origin xyz="0 0 0" rpy="0 0 0"/>
+    <axis xyz="1 0 0"/>
+    <limit lower="-5" upper="5" effort="1" velocity="1"/>
+  </joint>
+  <joint name="joint_y" type="prismatic">
+    <parent link="link_x"/>
+    <child link="body"/>
+    <origin xyz="0 0 0" rpy="0 0 0"/>
+    <axis xyz="0 1 0"/>
+    <limit lower="-5" upper="5" effort="1" velocity="1"/>
+  </joint>
+  <joint name="tool_joint" type="fixed">
+    <parent link="body"/>
+    <child link="tool"/>
+    <origin xyz="{tool_offset} 0 0" rpy="0 0 0"/>
+  </joint>
+</robot>
+"""
+
+
+def test_load_or_build_different_robots(tmp_path):
+    problem_configuration = {
+        'environment': {
+            'number_cuboids': {'dynamic': 0, 'static': 0},
+            'number_planes': 0,
+            'number_spheres': {'dynamic': 0, 'static': 0},
+        },
+        'goal': {
+            'goal_definition': {
+                'subgoal0': {
+                    'child_link': 'tool', 'parent_link': 'base_link',
+                    'desired_position': [1.0, 0.0], 'epsilon': 0.05,
+                    'indices': [0, 1], 'is_primary_goal': True,
+                    'type': 'staticSubGoal', 'weight': 1.0,
+                },
+            },
+        },
+        'joint_limits': {'lower_limits': [-5.0, -5.0], 'upper_limits': [5.0, 5.0]},
+        'robot_representation': {'collision_links': {}, 'self_collision_pairs': {}},
+    }
+    store = PlannerStore(str(tmp_path))
+    actions = []
+    for tool_offset in [0.0, 0.5]:
+        urdf = URDF.format(tool_offset=tool_offset)
+        planner = ParameterizedFabricPlanner(
+            2, GenericURDFFk(urdf, root_link="base_link", end_links=["tool"])
+        )
+        built_planner = store.load_or_build(planner, problem_configuration, urdf)
+        actions.append(built_planner.compute_action(
+            q=np.zeros(2), qdot=np.zeros(2), x_goal_0=np.array([1.0, 0.0]), weight_goal_0=1.0
+        ))
+    assert len(os.listdir(tmp_path)) == 2
+    assert actions[0] != pytest.approx(actions[1])
+    with pytest.raises(ValueError):
+        store.load_or_build(planner, problem_configuration, "")
@@ -0,0 +1,94 @@
+import subprocess
+import sys
+
+import casadi as ca
+import numpy as np
+import pytest
+from forwardkinematics.planarFks.point_fk import PointFk
+from mpscenes.goals.goal_composition import GoalComposition
+
+from fabrics.planner.parameterized_planner import ParameterizedFabricPlanner
+from fabrics.runtime import RuntimePlanner
+
+BUILD_MODULES = ['forwardkinematics', 'mpscenes', 'pyquaternion', 'deprecation', 'fabrics.diffGeometry', 'fabrics.components', 'fabrics.planner']
+
+
+@pytest.fixture
+def planner():
+    goal_dict = {
+        "subgoal0": {
+            "weight": 1.0,
+            "is_primary_goal": True,
+            "indices": [0, 1],
+            "parent_link": 0,
+            "child_link": 2,
+            "desired_position": [-4.0, 1.0],
+            "epsilon": 0.15,
+            "type": "staticSubGoal",
+        }
+    }
+    goal = GoalComposition(name="goal", content_dict=goal_dict)
+    planner = ParameterizedFabricPlanner(2, PointFk())
+    planner.set_components(collision_links=[1], goal=goal)
+    planner.concretize()
+    return planner
+
+
+@pytest.fixture
+def arguments():
+    return dict(
+        q=np.zeros(2), qdot=np.zeros(2), x_goal_0=np.array([1.0, -1.0]),
+        weight_goal_0=np.array([1.0]), x_obst_0=np.array([1.0, 0.2]),
+        radius_body_1=np.array([0.5]), radius_obst_0=np.array([0.5]),
+    )
+
+
+def imported_modules(module: str) -> str:
+    return subprocess.run(
+        [sys.executable, "-c", f"import sys, {module}; print(' '.join(sys.modules))"],
+        capture_output=True, text=True, check=True,
+    ).stdout.split()
+
+
+def cumulative_import_time(module: str) -> int:
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    ).stderr
+    for line in output.splitlines():
+        if line.rstrip().endswith(f"| {module}"):
+            return int(line.split("|")[1])
+    raise ValueError(f"Module {module} not found in the import time report.")
+
+
+def test_runtime_imports():
+    modules = imported_modules("fabrics.runtime")
+    assert not [
+        module for module in modules
+        if any(module == build_module or module.startswith(build_module + ".")
+               for build_module in BUILD_MODULES)
+    ]
+
+
+@pytest.mark.benchmark
+def test_runtime_import_time():
+    runtime_time = cumulative_import_time("fabrics.runtime")
+    serialized_planner_time = cumulative_import_time("fabrics.planner.serialized_planner")
+    assert runtime_time < serialized_planner_time
+
+
+def test_runtime_planner(planner: ParameterizedFabricPlanner, arguments: dict, tmp_path):
+    file_name = str(tmp_path / "planner.pbz2")
+    planner.serialize(file_name)
+    runtime_planner = RuntimePlanner.from_file(file_name)
+    action = planner.compute_action(**arguments)
+    assert runtime_planner.compute_action(**arguments) == pytest.approx(action)
+    inputs = runtime_planner.input_struct()
+    inputs.update(**arguments)
+    assert runtime_planner.compute_action_packed(inputs) == pytest.approx(action)
+    xml_file_name = str(tmp_path / "planner.casadi")
+    planner.export_as_xml(xml_file_name)
+    exported_planner = RuntimePlanner.from_function(ca.Function.load(xml_file_name))
+    exported_planner.bind(radius_body_1=0.5, radius_obst_0=0.5)
+    arguments.pop("radius_body_1")
+    assert exported_planner.compute_action(**arguments) == pytest.approx(action)
@@ -0,0 +1,83 @@
+from dataclasses import asdict
+
+import numpy as np
+import pytest
+from forwardkinematics.planarFks.point_fk import PointFk
+from mpscenes.goals.goal_composition import GoalComposition
+
+from fabrics.helpers.casadiFunctionWrapper import InputMissmatchError
+from fabrics.planner.configuration_classes import FabricPlannerConfig
+from fabrics.planner.parameterized_planner import ParameterizedFabricPlanner
+from fabrics.planner.tuning import TuningHarness, expand_parameters, parameterize
+
+
+@pytest.fixture
+def goal():
+    goal_dict = {
+        "subgoal0": {
+            "weight": 1.0,
+            "is_primary_goal": True,
+            "indices": [0, 1],
+            "parent_link": 0,
+            "child_link": 2,
+            "desired_position": [1.0, 0.0],
+            "epsilon": 0.15,
+            "type": "staticSubGoal",
+        }
+    }
+    return GoalComposition(name="goal", content_dict=goal_dict)
+
+
+def test_parameterize():
+    config = parameterize(
+        FabricPlannerConfig(), collision_geometry={'5': 'collision_exponent'}
+    )
+    assert config.collision_geometry == (
+        "-0.5 / (x ** sym('collision_exponent')) * (-0.5 * (ca.sign(xdot) - 1)) * xdot ** 2"
+    )
+    with pytest.raises(ValueError):
+        parameterize(FabricPlannerConfig(), collision_geometry={'7': 'k'})
+
+
+def test_expand_parameters():
+    input_names = ['q', 'k_obst_0_body_1_leaf', 'k_obst_1_body_1_leaf', 'kappa']
+    expanded = expand_parameters(input_names, {'k': 1.0})
+    assert expanded == {'k_obst_0_body_1_leaf': 1.0, 'k_obst_1_body_1_leaf': 1.0}
+    with pytest.raises(InputMissmatchError):
+        expand_parameters(input_names, {'alpha': 1.0})
+
+
+def test_tuning_harness(goal: GoalComposition):
+    config = parameterize(FabricPlannerConfig(), attractor_potential={'5.0': 'k_attractor'})
+    planner = ParameterizedFabricPlanner(2, PointFk(), **asdict(config))
+    planner.set_components(collision_links=[1], goal=goal)
+    planner.concretize()
+    harness = TuningHarness(planner, time_step=0.01, horizon=300, goal_tolerance=0.1, max_workers=2)
+    arguments = dict(
+        x_goal_0=np.array([1.0, 0.0]), weight_goal_0=np.array([1.0]),
+        x_obst_0=np.array([0.5, 2.0]), radius_body_1=np.array([0.2]), radius_obst_0=np.array([0.5])
+    )
+    results = harness.run(
+        [{'k_attractor': 0.5}, {'k_attractor': 5.0}], np.zeros(2), np.zeros(2), **arguments
+    )
+    assert results[0].parameters == {'k_attractor': 5.0}
+    assert results[0].time_to_goal < results[1].time_to_goal
+    assert results[0].time_to_goal < np.inf
+    assert results[0].minimum_clearance > 0
+    with pytest.raises(InputMissmatchError):
+        harness.run([{'k_attractor': 0.5}], np.zeros(2), np.zeros(2), x_goal_0=np.array([1.0, 0.0]))
+
+
+def test_tuning_harness_joint_limits(goal: GoalComposition):
+    planner = ParameterizedFabricPlanner(2, PointFk())
+    planner.set_components(collision_links=[1], goal=goal, limits=[[-0.5, 2.0], [-2.0, 0.6]])
+    planner.concretize()
+    harness = TuningHarness(planner, time_step=0.01, horizon=100)
+    arguments = dict(
+        x_goal_0=np.array([1.0, 0.0]), weight_goal_0=np.array([1.0]),
+        x_obst_0=np.array([0.5, 2.0]), radius_body_1=np.array([0.2]), radius_obst_0=np.array([0.5])
+    )
+    _, clearance = harness.metrics_function(planner)(np.array([0.0, 0.5]), *[
+        arguments[name] for name in planner.variables.parameters()
+    ])
+    assert float(clearance) == pytest.approx(0.1)